@@ -0,0 +1,64 @@
+"""
+Measures the cold import time of pyilz modules, each in a fresh interpreter.
+
+Usage:
+    python benchmarks/import_time.py [--repeat N] [--json]
+
+Exits with status 1 if a module that should not need pandas imports it.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+# modules that must import without pandas, numpy or xmltodict
+LIGHT_MODULES = ['pyilz.get_buildings', 'pyilz.calculate_efficiency', 'pyilz.metadata_to_array',
+                 'pyilz.spatial_grid', 'pyilz.get_blueprints', 'pyilz.optimize_layout']
+HEAVY_MODULES = ['pyilz.parse_land', 'pyilz.get_timers', 'pyilz.plot_cache']
+HEAVY_DEPENDENCIES = ['pandas', 'numpy', 'xmltodict', 'requests']
+
+_PROBE = '''
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [name for name in {dependencies!r} if name in sys.modules]}}))
+'''
+
+
+def measure(module, repeat=5):
+    """
+    Imports a module in repeat fresh interpreters.
+
+    Returns:
+        dict: The best import time in milliseconds and the heavy dependencies it loaded.
+    """
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', _PROBE.format(module=module, dependencies=HEAVY_DEPENDENCIES)],
+                                check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(output))
+    return {'module': module, 'ms': round(min(run['seconds'] for run in runs) * 1000, 2), 'loaded': runs[0]['loaded']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    results = [measure(module, args.repeat) for module in LIGHT_MODULES + HEAVY_MODULES]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            print(f"{result['module']:<30} {result['ms']:>8.1f} ms  {', '.join(result['loaded'])}")
+    regressed = [result['module'] for result in results
+                 if result['module'] in LIGHT_MODULES and set(result['loaded']) & {'pandas', 'numpy', 'xmltodict'}]
+    if regressed:
+        print('Heavy dependencies imported by: ' + ', '.join(regressed), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
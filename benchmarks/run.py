@@ -0,0 +1,187 @@
+"""
+Benchmarks parsing, timers, storage, building lookups and efficiency at several plot sizes.
+
+Usage:
+    python benchmarks/run.py [--quick] [--filter TEXT] [--output results.json] [--compare old.json]
+
+Every case runs on tests/example_game_state.json and on synthetic plots from
+pyilz.synthetic, which are seeded so every run measures the same input. Each
+case is timed with timeit: the loop count is picked by Timer.autorange and
+the best, median and mean seconds per call over the repeats are reported.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+warnings.simplefilter('ignore', DeprecationWarning)
+
+from pyilz.calculate_efficiency import compute, compute_vectorized  # noqa: E402
+from pyilz.get_buildings import (get_active_output, get_active_outputs, get_building_dimensions,  # noqa: E402
+                                 get_building_storage, get_catalog, get_passive_output, get_passive_outputs)
+from pyilz.get_resources import get_storage  # noqa: E402
+from pyilz.get_timers import get_timers  # noqa: E402
+from pyilz.metadata_to_array import import_string_to_array, metadata_to_array  # noqa: E402
+from pyilz.parse_land import get_buildings_and_activities, parse_land  # noqa: E402
+from pyilz.synthetic import synthetic_game_state, synthetic_save  # noqa: E402
+
+EXAMPLE_PATH = os.path.join(ROOT, 'tests', 'example_game_state.json')
+SIZES = [50, 200, 1000]
+QUICK_SIZES = [50, 200]
+ACCOUNT_PLOTS = [1, 10]
+# compute() is quadratic in pure Python, so larger layouts only run compute_vectorized
+COMPUTE_LIMIT = 100
+
+
+def measure(func, repeat):
+    """
+    Times func, returning per-call seconds over repeat runs of an autoranged loop.
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    runs = [seconds / number for seconds in timer.repeat(repeat, number)]
+    return {'best': min(runs), 'median': statistics.median(runs), 'mean': statistics.mean(runs),
+            'number': number, 'repeat': repeat}
+
+
+def _lookups():
+    catalog = get_catalog()
+    names = catalog.name_ids[:catalog.known_types]
+    calls = [(name, level, tier) for name in names for level in range(1, 10) for tier in range(1, 6)]
+
+    def run():
+        for name, level, tier in calls:
+            get_active_output(name, level, tier)
+            get_passive_output(name, level, tier)
+            get_building_storage(name, level, tier)
+            get_building_dimensions(name)
+    return run, len(calls)
+
+
+def _batch_lookups():
+    import numpy
+    catalog = get_catalog()
+    names, levels, tiers = zip(*[(name, level, tier) for name in range(catalog.known_types)
+                                 for level in range(1, 10) for tier in range(1, 6)])
+    types, levels, tiers = numpy.array(names), numpy.array(levels), numpy.array(tiers)
+    # every building under three efficiency scenarios
+    efficiencies = numpy.array([[100], [120], [150]])
+
+    def run():
+        get_active_outputs(types, levels, tiers, efficiencies)
+        get_passive_outputs(types, levels, tiers, efficiencies)
+    return run, len(types) * len(efficiencies)
+
+
+def _plot_cases(label, xml):
+    building_data = parse_land(xml)
+    paths, buildings, ca, aa, completed = get_buildings_and_activities(building_data)
+    layout = import_string_to_array(metadata_to_array(xml))
+    cases = [
+        ('parse_land', lambda: parse_land(xml)),
+        # given a copy, as older versions modify their input
+        ('get_buildings_and_activities', lambda: get_buildings_and_activities(building_data.copy())),
+        ('get_timers', lambda: get_timers(ca, aa, completed)),
+        ('get_storage', lambda: get_storage(building_data, 2)),
+        ('compute_vectorized', lambda: compute_vectorized(layout)),
+    ]
+    if len(layout) <= COMPUTE_LIMIT:
+        cases.append(('compute', lambda: compute(layout)))
+    return [(name, label, len(building_data), func) for name, func in cases]
+
+
+def _account_case(plots):
+    state = synthetic_game_state(plots, buildings=100)
+
+    def run():
+        for plot in state['data']:
+            building_data = parse_land(plot['data'])
+            _, _, ca, aa, completed = get_buildings_and_activities(building_data)
+            get_timers(ca, aa, completed)
+            get_storage(building_data, 2)
+    return 'account_pipeline', f'synthetic-{plots}-plots', plots * 100, run
+
+
+def cases(quick=False):
+    """
+    Returns (benchmark, input, size, func) for every case.
+    """
+    with open(EXAMPLE_PATH, 'r') as f:
+        example = json.load(f)['data']
+    found = _plot_cases('example', example[2]['data'])
+    for size in QUICK_SIZES if quick else SIZES:
+        found += _plot_cases(f'synthetic-{size}', synthetic_save(size, seed=size))
+    run, calls = _lookups()
+    found.append(('get_buildings_lookups', 'all-types-levels-tiers', calls, run))
+    run, calls = _batch_lookups()
+    found.append(('get_outputs_batch', 'all-types-levels-tiers-x3', calls, run))
+    for plots in ACCOUNT_PLOTS[:1] if quick else ACCOUNT_PLOTS:
+        found.append(_account_case(plots))
+    return found
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _metadata():
+    import numpy
+    import pandas
+    return {'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(), 'commit': _git_commit(),
+            'python': platform.python_version(), 'platform': platform.platform(),
+            'numpy': numpy.__version__, 'pandas': pandas.__version__}
+
+
+def compare(results, baseline):
+    """
+    Prints the change in best time of every case present in both result sets.
+    """
+    old = {(result['benchmark'], result['input']): result for result in baseline['results']}
+    for result in results['results']:
+        before = old.get((result['benchmark'], result['input']))
+        if before is not None:
+            ratio = result['best'] / before['best']
+            print(f"{result['benchmark']:<30} {result['input']:<24} {before['best'] * 1000:>10.3f} ms -> "
+                  f"{result['best'] * 1000:>10.3f} ms  x{ratio:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help='skip the largest inputs')
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='compare against the results in this JSON file')
+    args = parser.parse_args()
+
+    results = {'meta': _metadata(), 'results': []}
+    for benchmark, label, size, func in cases(args.quick):
+        if args.filter not in benchmark:
+            continue
+        result = dict(benchmark=benchmark, input=label, size=size, **measure(func, args.repeat))
+        results['results'].append(result)
+        print(f"{benchmark:<30} {label:<24} size={size:<6} best={result['best'] * 1000:>10.3f} ms  "
+              f"median={result['median'] * 1000:>10.3f} ms", flush=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+import asyncio
+import contextlib
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import pyilz.get_device_id as get_device_id
+from pyilz.gamedata_client import GameDataClient, get_client
+
+
+class RequestLimiter:
+    """
+    Bounds the number of requests in flight, overall and per host.
+
+    Requests run on the limiter's own thread pool through the pooled, retrying
+    GameDataClient, so a limiter with per_host slots should be paired with clients
+    whose pool_size is at least per_host to keep every connection alive.
+
+    Args:
+        limit (int, optional): The maximum number of requests in flight. Defaults to 20.
+        per_host (int, optional): The maximum number of requests in flight to one host. Defaults to 10.
+    """
+
+    def __init__(self, limit=20, per_host=10):
+        self.limit = limit
+        self.per_host = per_host
+        self._executor = ThreadPoolExecutor(limit, thread_name_prefix='pyilz-request')
+        self._semaphore = None
+        self._hosts = {}
+
+    async def run(self, url, func, *args, **kwargs):
+        """
+        Calls a blocking function in the thread pool once a slot for the url's host is free.
+
+        Returns:
+            The return value of func.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        host = urlsplit(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.per_host)
+        async with self._hosts[host], self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def close(self):
+        """
+        Shuts down the thread pool.
+        """
+        self._executor.shutdown(wait=False)
+
+
+@contextlib.contextmanager
+def _clients(clients):
+    """
+    Yields a GameDataClient per item, sharing one client per API key and closing those on exit.
+    """
+    made = {}
+    resolved = []
+    try:
+        for client in clients:
+            if client is None:
+                client = get_client()
+            elif not isinstance(client, GameDataClient):
+                # anything else is taken to be an account's API key
+                if client not in made:
+                    made[client] = GameDataClient(api_key=client)
+                client = made[client]
+            resolved.append(client)
+        yield resolved
+    finally:
+        for client in made.values():
+            client.close()
+
+
+async def _get_json(limiter, client, path, **kwargs):
+    if limiter is None:
+        limiter = RequestLimiter(1, 1)
+        try:
+            return await _get_json(limiter, client, path, **kwargs)
+        finally:
+            limiter.close()
+    with _clients([client]) as (client,):
+        return await limiter.run(client.base_url + path, client.get_json, path, **kwargs)
+
+
+async def async_get_game_state(api_key=None, device_id=None, client=None, limiter=None):
+    """
+    Returns a dictionary of the game state without blocking the event loop. Auth required.
+
+    Args:
+        api_key (str, optional): API key for authentication. Defaults to the client's token.
+        device_id (str, optional): Device ID for authentication. Defaults to get_device_id.get_device_id().
+        client (GameDataClient or str, optional): The client to send the request with, or an account's API key.
+                                                  Defaults to the shared client.
+        limiter (RequestLimiter, optional): The limiter to run the request under. Defaults to a private one.
+
+    Returns:
+        dict: A dictionary containing the game state, as returned by get_game_state.
+    """
+    DEVICE_ID = get_device_id.get_device_id() if device_id is None else device_id
+    return await _get_json(limiter, client, '/gamestate', api_key=api_key,
+                           params={'active_device_id': DEVICE_ID})
+
+
+async def async_get_my_plots(api_key=None, client=None, limiter=None):
+    """
+    Returns a list of all plots owned by the user without blocking the event loop. Auth required.
+
+    Returns:
+        list: A list of all plots owned by the user, as returned by get_my_plots.
+    """
+    return await _get_json(limiter, client, '/plots', api_key=api_key)
+
+
+async def async_get_plot_metadata(land_id, client=None, limiter=None):
+    """
+    Returns a dictionary of metadata for the specified plot without blocking the event loop.
+
+    Returns:
+        dict: A dictionary containing metadata for the plot, as returned by get_plot_metadata.
+    """
+    return await _get_json(limiter, client, f'/plots/{land_id}/metadata', auth=False)
+
+
+async def async_get_plot_metadata_many(land_ids, client=None, limit=20, per_host=10):
+    """
+    Fetches the metadata of many plots concurrently.
+
+    Args:
+        land_ids (iterable): The IDs of the plots to retrieve metadata for.
+        client (GameDataClient, optional): The client to send the requests with. Defaults to the shared client.
+        limit (int, optional): The maximum number of requests in flight. Defaults to 20.
+        per_host (int, optional): The maximum number of requests in flight to one host. Defaults to 10.
+
+    Returns:
+        list: The metadata dictionaries, in the order of land_ids.
+    """
+    limiter = RequestLimiter(limit, per_host)
+    try:
+        with _clients([client]) as (client,):
+            return await asyncio.gather(*[async_get_plot_metadata(land_id, client, limiter)
+                                          for land_id in land_ids])
+    finally:
+        limiter.close()
+
+
+async def async_get_game_state_many(accounts, device_id=None, limit=20, per_host=10):
+    """
+    Fetches the game states of many accounts concurrently. Auth required.
+
+    Args:
+        accounts (iterable): A GameDataClient or an API key per account. Accounts with the same API key
+                             share one client, which is closed once every request is done.
+        device_id (str, optional): Device ID for authentication. Defaults to get_device_id.get_device_id().
+        limit (int, optional): The maximum number of requests in flight. Defaults to 20.
+        per_host (int, optional): The maximum number of requests in flight to one host. Defaults to 10.
+
+    Returns:
+        list: The game state dictionaries, in the order of accounts.
+    """
+    DEVICE_ID = get_device_id.get_device_id() if device_id is None else device_id
+    limiter = RequestLimiter(limit, per_host)
+    try:
+        with _clients(accounts) as clients:
+            return await asyncio.gather(*[async_get_game_state(device_id=DEVICE_ID, client=client,
+                                                               limiter=limiter) for client in clients])
+    finally:
+        limiter.close()
+
+
+if __name__ == '__main__':
+    from pyilz.get_plots import get_my_plots
+    land_ids = [plot['landId'] for plot in get_my_plots()]
+    print(asyncio.run(async_get_plot_metadata_many(land_ids)))
@@ -1,6 +1,7 @@
 import math
-from pyilz.get_buildings import get_building_dimensions, get_building_starting_efficiency, get_building_radius
+from pyilz.get_buildings import get_building_radius, get_catalog, split_type_string
 from pyilz.metadata_to_array import import_string_to_array
+from pyilz.spatial_grid import SpatialGrid
 
 
 def calculate_efficiency(building_a_pos, building_a_wxh, building_b_pos, building_b_wxh, base_efficiency=80, power=20, radius=7, debuff=False):
@@ -207,10 +208,101 @@ def get_power_influence(this, other):
     return inf
 
 
+_influence_table = None
+_influence_matrix = None
+
+
+def _get_influence_table():
+    """
+    Returns influence_values keyed by catalog type ids as a (pairs, wildcards) tuple.
+    """
+    global _influence_table
+    if _influence_table is None:
+        catalog = get_catalog()
+        pairs = {}
+        wildcards = {}
+        for (this, other), inf in influence_values.items():
+            if other == '*':
+                wildcards[catalog.type_id(this)] = inf
+            else:
+                pairs[(catalog.type_id(this), catalog.type_id(other))] = inf
+        _influence_table = pairs, wildcards
+    return _influence_table
+
+
+def get_influence_matrix():
+    """
+    Returns the power influence of every building type on every other building type.
+
+    Returns:
+        numpy.ndarray: A square float matrix where [a, b] is the influence of type id b on type id a.
+    """
+    global _influence_matrix
+    import numpy as np
+    pairs, wildcards = _get_influence_table()
+    size = len(get_catalog().name_ids)
+    if _influence_matrix is None or len(_influence_matrix) < size:
+        matrix = np.zeros((size, size))
+        for this, inf in wildcards.items():
+            matrix[this, :] = inf
+        for (this, other), inf in pairs.items():
+            if inf:
+                matrix[this, other] = inf
+        _influence_matrix = matrix
+    return _influence_matrix
+
+
+def get_power_influence_by_id(this_type_id, other_type_id):
+    """
+    Calculates the power influence between two building types given their catalog type ids.
+
+    Args:
+        this_type_id (int): The type id of the building being influenced.
+        other_type_id (int): The type id of the influencing building.
+
+    Returns:
+        float: The power influence between the two building types.
+    """
+    pairs, wildcards = _get_influence_table()
+    inf = pairs.get((this_type_id, other_type_id), None)
+    if not inf:
+        inf = wildcards.get(this_type_id, 0)
+    return inf
+
+
+IGNORE_LIST = ['POWER_STATION', 'HYDROGEN_MATTER_SILO', 'ENGINEERING_WORKSHOP',
+               'NEXUS', 'SILICON_MATTER_SILO', 'QUANTUM_FABRICANT', 'CARBON_MATTER_SILO']
+IGNORE_LIST_2 = ['HYDROGEN_MATTER_SILO', 'ENGINEERING_WORKSHOP',
+                 'NEXUS', 'SILICON_MATTER_SILO', 'QUANTUM_FABRICANT', 'CARBON_MATTER_SILO']
+
+
+def _resolve_buildings(import_string):
+    """
+    Looks up the type id, footprint, starting efficiency and radius of every building once.
+
+    Args:
+        import_string (list): A list of dictionaries containing information about each building.
+
+    Returns:
+        list: A list of (building, type_id, (width, height), starting_efficiency, radius) tuples.
+    """
+    catalog = get_catalog()
+    resolved = []
+    for building in import_string:
+        type_id, _ = catalog.parse_type_string(building['buildingTypeString'])
+        name, _ = split_type_string(building['buildingTypeString'])
+        resolved.append((building, type_id, catalog.dimensions(type_id),
+                         catalog.starting_efficiency(type_id), get_building_radius(name)))
+    return resolved
+
+
 def compute(import_string, printing=False):
     """
     Computes the efficiency of each building in the import_string based on its power influence and proximity to other buildings.
 
+    Only the buildings a SpatialGrid finds within a building's radius are compared with it, in
+    layout order; every other building would leave its efficiency unchanged.
+
     Args:
         import_string (list): A list of dictionaries containing information about each building.
         printing (bool, optional): Whether to print the intermediate steps of the computation. Defaults to False.
@@ -218,34 +310,31 @@ def compute(import_string, printing=False):
     Returns:
         list: A list of dictionaries containing the name and efficiency of each building.
     """
-    IGNORE_LIST = ['POWER_STATION', 'HYDROGEN_MATTER_SILO', 'ENGINEERING_WORKSHOP',
-                   'NEXUS', 'SILICON_MATTER_SILO', 'QUANTUM_FABRICANT', 'CARBON_MATTER_SILO']
-    IGNORE_LIST_2 = ['HYDROGEN_MATTER_SILO', 'ENGINEERING_WORKSHOP',
-                     'NEXUS', 'SILICON_MATTER_SILO', 'QUANTUM_FABRICANT', 'CARBON_MATTER_SILO']
+    catalog = get_catalog()
+    ignore = {catalog.type_id(name) for name in IGNORE_LIST}
+    ignore_2 = {catalog.type_id(name) for name in IGNORE_LIST_2}
+    resolved = _resolve_buildings(import_string)
+    grid = SpatialGrid()
+    for i, (building, type_id, (w, h), _, _) in enumerate(resolved):
+        if type_id not in ignore_2:
+            grid.insert(i, building['X'], building['Y'], w, h)
     output = []
-    for building in import_string:
+    for building, type_id, wxh, default_efficiency, radius in resolved:
         name = building['buildingTypeString']
-        if name[:-2] in IGNORE_LIST:
+        if type_id in ignore:
             continue
-        w, h = get_building_dimensions(name[:-2])
-        wxh = (w, h)
-        eff = default_efficiency = get_building_starting_efficiency(name[:-2])
-        radius = get_building_radius(name[:-2])
+        eff = default_efficiency
         if printing and name != 'POWER_STATION_1':
-            print(f'--- {name} - {eff} -{w}x{h}---')
-        for building2 in import_string:
-            name2 = building2['buildingTypeString']
-            if name2[:-2] in IGNORE_LIST_2:
-                continue
-            w2, h2 = get_building_dimensions(name2[:-2])
-            wxh2 = (w2, h2)
+            print(f'--- {name} - {eff} -{wxh[0]}x{wxh[1]}---')
+        for j in sorted(grid.query_radius(building['X'], building['Y'], wxh[0], wxh[1], radius)):
+            building2, type_id2, wxh2, _, _ = resolved[j]
             if building != building2:
-                infl = get_power_influence(building, building2)
+                infl = get_power_influence_by_id(type_id, type_id2)
                 diff = calculate_efficiency((building['X'], building['Y']), wxh,
                                             (building2['X'], building2['Y']), wxh2, base_efficiency=default_efficiency, power=infl, radius=radius)-default_efficiency
                 eff += diff
                 if printing and diff > 0:
-                    print(f'\t{diff} from {name2}')
+                    print(f'\t{diff} from {building2["buildingTypeString"]}')
         if eff > 150:
             eff = 150
         output.append({
@@ -257,6 +346,305 @@ def compute(import_string, printing=False):
     return output
 
 
+def _efficiency_diffs(gap_x, gap_y, in_radius, power, radius_diagonal, base):
+    """
+    Applies the calculate_efficiency rules to arrays of building pairs.
+
+    Args:
+        gap_x (numpy.ndarray): The gap between each pair's footprints on the x axis.
+        gap_y (numpy.ndarray): The gap between each pair's footprints on the y axis.
+        in_radius (numpy.ndarray): Whether each pair is within the influenced building's radius.
+        power (numpy.ndarray): The influence of the second building on the first for each pair.
+        radius_diagonal (numpy.ndarray): The diagonal of the influenced building's radius.
+        base (numpy.ndarray): The starting efficiency of the influenced building.
+
+    Returns:
+        tuple: A tuple of (contributes, diff) arrays, where contributes marks the pairs that
+               calculate_efficiency does not fall back to base_efficiency for, and diff is each
+               pair's change in efficiency.
+    """
+    import numpy as np
+    # overlapping footprints are 1 apart, as the closest distinct tiles are neighbours
+    dist_min = np.where((gap_x == 0) & (gap_y == 0), 1.0,
+                        np.sqrt((gap_x * gap_x + gap_y * gap_y).astype(float)))
+    debuff = power < 0
+    efficiency = power - (dist_min - 1) * (power / radius_diagonal)
+    efficiency = np.where(~debuff & (efficiency > power), power, efficiency)
+    efficiency = efficiency + base
+    contributes = in_radius & (debuff | (efficiency >= base))
+    return contributes, np.where(contributes, efficiency - base, 0.0)
+
+
+def compute_vectorized(import_string):
+    """
+    Computes the same efficiencies as compute, but for the whole layout in one batched NumPy pass.
+
+    Footprints are treated as rectangles, so the minimum distance between two buildings comes
+    from the gap between their rectangles on each axis rather than from every pair of tiles,
+    and a SpatialGrid limits each building to the neighbours within its radius.
+    Contributions are summed in the same order as compute, so the results are identical.
+    Buildings are told apart by their buildingTypeString and position.
+
+    Args:
+        import_string (list): A list of dictionaries containing information about each building.
+
+    Returns:
+        list: A list of dictionaries containing the name and efficiency of each building.
+    """
+    import numpy as np
+    catalog = get_catalog()
+    resolved = _resolve_buildings(import_string)
+    count = len(resolved)
+    type_ids = np.fromiter((entry[1] for entry in resolved), dtype=np.intp, count=count)
+    rows = np.flatnonzero(~np.isin(type_ids, [catalog.type_id(name) for name in IGNORE_LIST]))
+    cols = np.flatnonzero(~np.isin(type_ids, [catalog.type_id(name) for name in IGNORE_LIST_2]))
+    if rows.size == 0:
+        return []
+
+    keys = {}
+    key_ids = np.fromiter((keys.setdefault((building['buildingTypeString'], building['X'], building['Y']), len(keys))
+                           for building, _, _, _, _ in resolved), dtype=np.intp, count=count)
+    x = np.fromiter((entry[0]['X'] for entry in resolved), dtype=np.int64, count=count)
+    y = np.fromiter((entry[0]['Y'] for entry in resolved), dtype=np.int64, count=count)
+    w = np.fromiter((entry[2][0] for entry in resolved), dtype=np.int64, count=count)
+    h = np.fromiter((entry[2][1] for entry in resolved), dtype=np.int64, count=count)
+    radius = np.array([resolved[i][4] for i in rows])[:, None]
+    radius_diagonal = np.array([math.dist((0, 0), (r, r)) for r in radius[:, 0]])[:, None]
+    base = np.array([resolved[i][3] for i in rows], dtype=float)[:, None]
+
+    # only buildings within a building's radius can influence it, so gather those from a
+    # spatial grid into a padded (rows x neighbours) matrix, in their original order
+    grid = SpatialGrid()
+    for i in cols:
+        building, _, (width, height), _, _ = resolved[i]
+        grid.insert(int(i), building['X'], building['Y'], width, height)
+    neighbours = []
+    for i in rows:
+        building, _, (width, height), _, r = resolved[i]
+        neighbours.append(sorted(grid.query_radius(
+            building['X'], building['Y'], width, height, r)))
+    others = np.zeros((rows.size, max(len(n) for n in neighbours)), dtype=np.intp)
+    valid = np.zeros(others.shape, dtype=bool)
+    for k, n in enumerate(neighbours):
+        others[k, :len(n)] = n
+        valid[k, :len(n)] = True
+
+    # gap between the two footprints on each axis, 0 where their projections overlap
+    gap_x = np.maximum(0, np.maximum(x[others] - (x + w - 1)[rows][:, None],
+                                     x[rows][:, None] - (x + w - 1)[others]))
+    gap_y = np.maximum(0, np.maximum(y[others] - (y + h - 1)[rows][:, None],
+                                     y[rows][:, None] - (y + h - 1)[others]))
+    in_radius = valid & (gap_x <= radius) & (gap_y <= radius) & (
+        key_ids[rows][:, None] != key_ids[others])
+    power = get_influence_matrix()[type_ids[rows][:, None], type_ids[others]]
+    contributes, diff = _efficiency_diffs(
+        gap_x, gap_y, in_radius, power, radius_diagonal, base)
+    # accumulate left to right like compute does, so the float sums match exactly
+    totals = np.cumsum(np.concatenate([base, diff], axis=1), axis=1)[:, -1]
+
+    output = []
+    for k, i in enumerate(rows):
+        building, _, _, default_efficiency, _ = resolved[i]
+        if totals[k] > 150:
+            eff = 150
+        elif contributes[k].any():
+            eff = float(totals[k])
+        else:
+            eff = default_efficiency
+        output.append({
+            'name': building['buildingTypeString'],
+            'efficiency': eff
+        })
+    return output
+
+
+class EfficiencyModel:
+    """
+    A layout whose efficiencies are kept up to date as buildings are added, moved and removed.
+
+    The model keeps the contribution of every building pair that affects an efficiency, and an
+    edit only re-evaluates the pairs involving the edited building that are within its radius,
+    or within the radius of a building it influences. compute returns the same records as the
+    compute function would for the current layout.
+
+    Args:
+        import_string (list, optional): A list of dictionaries containing information about each building.
+    """
+
+    def __init__(self, import_string=()):
+        catalog = get_catalog()
+        self._ignore = {catalog.type_id(name) for name in IGNORE_LIST}
+        self._ignore_2 = {catalog.type_id(name) for name in IGNORE_LIST_2}
+        self._grid = SpatialGrid()
+        self._buildings = {}
+        self._contributions = {}
+        self._efficiencies = {}
+        self._next_key = 0
+        self._max_radius = 0
+        for building in import_string:
+            self.add(building)
+
+    def __len__(self):
+        return len(self._buildings)
+
+    def __iter__(self):
+        return iter(self._buildings)
+
+    def building(self, key):
+        """
+        Returns the building dictionary stored under key.
+        """
+        return self._buildings[key][0]
+
+    def rect(self, key):
+        """
+        Returns the footprint of the building stored under key as an (x, y, width, height) tuple.
+        """
+        return self._grid.rect(key)
+
+    def occupied(self, x, y, w, h):
+        """
+        Returns the keys of the buildings whose footprints overlap the given footprint.
+        """
+        return self._grid.query(x, y, x + w - 1, y + h - 1)
+
+    def add(self, building):
+        """
+        Adds a building to the end of the layout.
+
+        Args:
+            building (dict): A dictionary with 'buildingTypeString', 'X' and 'Y' keys.
+
+        Returns:
+            int: The key of the new building, used to move or remove it.
+        """
+        key = self._next_key
+        self._next_key += 1
+        (_, type_id, (w, h), base, radius), = _resolve_buildings([building])
+        influenced = type_id not in self._ignore
+        self._buildings[key] = (building, type_id, w, h, base, radius,
+                                math.dist((0, 0), (radius, radius)), influenced, type_id not in self._ignore_2)
+        if influenced:
+            self._contributions[key] = {}
+            self._max_radius = max(self._max_radius, radius)
+        self._grid.insert(key, building['X'], building['Y'], w, h)
+        self._update(key, set())
+        return key
+
+    def move(self, key, x, y):
+        """
+        Moves a building to a new position, keeping its place in the layout.
+
+        Args:
+            key (int): The key returned by add.
+            x (int): The new x-coordinate of the building.
+            y (int): The new y-coordinate of the building.
+        """
+        building, *rest = self._buildings[key]
+        near_old = self._near(key)
+        self._buildings[key] = (dict(building, X=x, Y=y), *rest)
+        self._grid.move(key, x, y)
+        self._update(key, near_old)
+
+    def remove(self, key):
+        """
+        Removes a building from the layout.
+
+        Args:
+            key (int): The key returned by add.
+        """
+        for other in self._near(key):
+            if self._contributions[other].pop(key, None) is not None:
+                self._efficiencies.pop(other, None)
+        self._grid.remove(key)
+        del self._buildings[key]
+        self._contributions.pop(key, None)
+        self._efficiencies.pop(key, None)
+
+    def _near(self, key):
+        """
+        Returns the influenced buildings whose radius could reach the building stored under key.
+        """
+        x, y, w, h = self._grid.rect(key)
+        return {other for other in self._grid.query_radius(x, y, w, h, self._max_radius)
+                if other != key and self._buildings[other][7]}
+
+    def _update(self, key, near_old):
+        """
+        Re-evaluates every pair that the building stored under key is part of.
+        """
+        building, _, w, h, _, radius, _, influenced, influencer = self._buildings[key]
+        pairs = []
+        if influenced:
+            self._contributions[key] = {}
+            pairs.extend((key, other) for other in self._grid.query_radius(
+                building['X'], building['Y'], w, h, radius) if other != key and self._buildings[other][8])
+        if influencer:
+            pairs.extend((other, key) for other in near_old | self._near(key))
+        self._evaluate(pairs)
+        self._efficiencies.pop(key, None)
+
+    def _evaluate(self, pairs):
+        """
+        Recomputes the contribution of each (influenced, influencer) pair of keys.
+        """
+        import numpy as np
+        if not pairs:
+            return
+        this = [self._buildings[a] for a, _ in pairs]
+        other = [self._buildings[b] for _, b in pairs]
+        x = np.array([[t[0]['X'], o[0]['X']] for t, o in zip(this, other)])
+        y = np.array([[t[0]['Y'], o[0]['Y']] for t, o in zip(this, other)])
+        w = np.array([[t[2], o[2]] for t, o in zip(this, other)])
+        h = np.array([[t[3], o[3]] for t, o in zip(this, other)])
+        radius = np.array([t[5] for t in this])
+        gap_x = np.maximum(0, np.maximum(x[:, 1] - (x[:, 0] + w[:, 0] - 1), x[:, 0] - (x[:, 1] + w[:, 1] - 1)))
+        gap_y = np.maximum(0, np.maximum(y[:, 1] - (y[:, 0] + h[:, 0] - 1), y[:, 0] - (y[:, 1] + h[:, 1] - 1)))
+        same = np.array([t[0]['buildingTypeString'] == o[0]['buildingTypeString'] and t[0]['X'] == o[0]['X'] and t[0]['Y'] == o[0]['Y']
+                         for t, o in zip(this, other)])
+        in_radius = (gap_x <= radius) & (gap_y <= radius) & ~same
+        power = get_influence_matrix()[[t[1] for t in this], [o[1] for o in other]]
+        contributes, diff = _efficiency_diffs(gap_x, gap_y, in_radius, power,
+                                              np.array([t[6] for t in this]), np.array([t[4] for t in this], dtype=float))
+        for (a, b), contributing, change in zip(pairs, contributes.tolist(), diff.tolist()):
+            contributions = self._contributions[a]
+            if contributing:
+                contributions[b] = change
+            elif contributions.pop(b, None) is None:
+                continue
+            self._efficiencies.pop(a, None)
+
+    def efficiency(self, key):
+        """
+        Returns the efficiency of the building stored under key, or None if it is not influenced by other buildings.
+        """
+        if not self._buildings[key][7]:
+            return None
+        eff = self._efficiencies.get(key)
+        if eff is None:
+            eff = self._buildings[key][4]
+            contributions = self._contributions[key]
+            # add contributions in layout order, like compute, so the float sums match exactly
+            for other in sorted(contributions):
+                eff += contributions[other]
+            if eff > 150:
+                eff = 150
+            self._efficiencies[key] = eff
+        return eff
+
+    def compute(self):
+        """
+        Returns the efficiency of each building in the layout.
+
+        Returns:
+            list: A list of dictionaries containing the name and efficiency of each building.
+        """
+        return [{
+            'name': building[0]['buildingTypeString'],
+            'efficiency': self.efficiency(key)
+        } for key, building in self._buildings.items() if building[7]]
+
+
 if __name__ == '__main__':
     import_string = import_string_to_array(
         '[["SOLON_CONTAINMENT_UNIT_1",35,18],["POWER_STATION_1",10,16],["HYDROGEN_MATTER_SILO_5",27,5],["HYDROGEN_PUMP_5",31,31],["MINE_5",35,27],["SEDIMENT_EXCAVATOR_4",35,31],["NEXUS_7",42,22],["ENGINEERING_WORKSHOP_5",25,11],["HYDROGEN_MATTER_SILO_5",24,2],["CARBON_MATTER_SILO_5",24,5],["PHOTODISINTEGRATION_PLANT_4",35,23],["CARBON_MATTER_SILO_5",24,8],["POWER_STATION_1",2,22],["SILICON_MATTER_SILO_5",21,8],["SEQUESTRIAN_PLANT_5",9,28],["CONDENSER_PLANT_4",27,39],["QUANTUM_FABRICANT_4",22,11],["POWER_STATION_1",15,22],["POWER_STATION_1",6,29],["CARBON_MATTER_SILO_5",32,11],["POWER_STATION_1",32,28],["SILICON_MATTER_SILO_5",29,11],["SEQUESTRIAN_PLANT_4",34,34],["POWER_STATION_1",13,32],["POWER_STATION_1",13,22],["L-CRYPTON_COLLIDER_3",9,19],["CONDENSER_PLANT_5",5,21],["PHOTODISINTEGRATION_PLANT_5",13,25],["POWER_STATION_1",32,26],["POWER_STATION_1",9,22],["POWER_STATION_1",11,22],["POWER_STATION_1",6,18],["POWER_STATION_1",11,32],["CARBON_MATTER_SILO_5",27,8],["HYDROGEN_MATTER_SILO_5",30,8],["ANTI-SOLON_INVERTER_2",38,31],["L-CRYPTON_COLLIDER_2",28,28],["CARBON_MATTER_SILO_5",18,8],["SINGULARITY_SCANNER_1",23,45],["CARBON_MATTER_SILO_5",21,5],["CARBON_MATTER_SILO_5",19,11],["CONDENSER_PLANT_5",13,18],["CRYPTON_CONTAINMENT_UNIT_2",35,14],["HYPERION_CONTAINMENT_UNIT_2",39,18],["SEQUESTRIAN_PLANT_4",31,22],["CARBON_MATTER_SILO_5",16,11],["POWER_STATION_1",28,25],["MATERIALS_LAB_1",13,29],["HYPERION_RESERVOIR_1",9,25],["HYPERION_LATHE_1",6,25]]')
@@ -264,3 +652,5 @@ if __name__ == '__main__':
     import timeit
     print('Original Method Finished:', timeit.timeit('compute(import_string, printing=True)',
                                                      setup='from __main__ import compute, import_string', number=1))
+    print('Vectorized Method Finished:', timeit.timeit('compute_vectorized(import_string)',
+                                                       setup='from __main__ import compute_vectorized, import_string', number=1))
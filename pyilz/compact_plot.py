@@ -0,0 +1,274 @@
+import json
+import threading
+import uuid
+import numpy as np
+import pandas as pd
+from pyilz.get_buildings import get_catalog
+
+ACTIVITY_SLOTS = ('currentActivity', 'autoActivity', 'completedActivity')
+ACTIVITY_DTYPE = np.dtype([
+    ('type', np.int32),
+    ('sprite', np.int32),
+    ('start', np.int64),
+    ('end', np.int64),
+    ('duration', np.int32),
+    ('supporting', np.int32),
+])
+BUILDING_DTYPE = np.dtype([
+    ('uid', 'V16'),
+    ('type', np.int32),
+    ('type_id', np.int16),
+    ('level', np.int8),
+    ('state', np.int32),
+    ('x', np.int16),
+    ('y', np.int16),
+    ('start', np.int64),
+    ('fractional', np.float64),
+    ('activities', ACTIVITY_DTYPE, (len(ACTIVITY_SLOTS),)),
+])
+# the columns of parse_land that have a field, every other column is kept as is
+_fields = {'uid', 'buildingTypeString', 'state', 'position', 'startTime', 'fractionalGeneratedResources'} | set(
+    ACTIVITY_SLOTS)
+_activity_keys = ('Type', 'SpriteName', 'StartTime', 'EndTime', 'DurationInSeconds', 'SupportingIds')
+NAT = np.iinfo(np.int64).min
+# times are kept in the 100 ns ticks the game writes
+TICKS_PER_SECOND = 10 ** 7
+# 0001-01-01T00:00:00, which the game writes without a fraction or a Z for times that never happened
+MIN_TICKS = np.datetime64('0001-01-01T00:00:00', 's').astype(np.int64) * TICKS_PER_SECOND
+
+# the table lives as long as the process and is never evicted, so only the small vocabulary of
+# buildingTypeStrings, states, activity types and sprite names goes in it
+_strings = []
+_string_ids = {}
+_strings_lock = threading.Lock()
+
+
+def intern_string(value):
+    """
+    Returns the id of a string in the table shared by every CompactPlot in this process. Thread-safe.
+    """
+    string_id = _string_ids.get(value)
+    if string_id is None:
+        with _strings_lock:
+            string_id = _string_ids.get(value)
+            if string_id is None:
+                string_id = len(_strings)
+                _strings.append(value)
+                _string_ids[value] = string_id
+    return string_id
+
+
+def string(string_id):
+    """
+    Returns the string with the given id from intern_string, or None for -1.
+    """
+    return _strings[string_id] if string_id >= 0 else None
+
+
+def _intern_column(values):
+    return np.array([intern_string(value) if isinstance(value, str) else -1 for value in values], np.int32)
+
+
+def _ticks(values):
+    """
+    Converts ISO timestamps like '2023-06-11T14:33:45.0590111Z' to int64 epoch ticks, NAT where missing.
+    """
+    seconds = []
+    fractions = []
+    for value in values:
+        if isinstance(value, str):
+            seconds.append(value[:19])
+            fractions.append(int(value[20:].rstrip('Z').ljust(7, '0')[:7]) if value[19:20] == '.' else 0)
+        else:
+            seconds.append('NaT')
+            fractions.append(0)
+    ticks = np.array(seconds, 'datetime64[s]').view(np.int64)
+    return np.where(ticks == NAT, NAT, ticks * TICKS_PER_SECOND + np.array(fractions, np.int64))
+
+
+def _iso(values):
+    """
+    Formats int64 epoch ticks the way the game writes them, with up to 7 fractional digits and a Z,
+    None where missing.
+    """
+    values = np.asarray(values)
+    seconds = np.where(values == NAT, NAT, values // TICKS_PER_SECOND)
+    text = np.datetime_as_string(seconds.view('datetime64[s]'), unit='s')
+    formatted = []
+    for value, second in zip(values.tolist(), text.tolist()):
+        if value == NAT:
+            formatted.append(None)
+        elif value == MIN_TICKS:
+            formatted.append(second)
+        else:
+            fraction = f'{value % TICKS_PER_SECOND:07d}'.rstrip('0')
+            formatted.append(f'{second}.{fraction}Z' if fraction else f'{second}Z')
+    return formatted
+
+
+def _amount(value):
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class CompactPlot:
+    """
+    A plot's BuildingData as one structured NumPy array instead of a DataFrame of object columns.
+
+    Each building is a BUILDING_DTYPE record: the uid as 16 bytes, the buildingTypeString and
+    state as ids into a string table shared by all plots, the catalog type id and level,
+    int16 coordinates, times as int64 ticks of 100 ns since the unix epoch, the game's precision, and
+    up to three activities in the currentActivity, autoActivity and completedActivity slots,
+    with type -1 where a building has none. Divide times by TICKS_PER_SECOND for epoch seconds.
+    Only the small vocabulary of types, states and sprites is shared; the SupportingIds of
+    activities, which differ from plot to plot, index the plot's own supporting tuple instead.
+    to_frame rebuilds the parse_land DataFrame, with times written back the way the game writes them.
+
+    Args:
+        buildings (numpy.ndarray): The BUILDING_DTYPE records.
+        land_id (optional): The plot's landId. Defaults to None.
+        last_updated (optional): The plot's lastUpdated. Defaults to None.
+        columns (tuple, optional): The parse_land column order to rebuild. Defaults to the BuildingData order.
+        extra (dict, optional): Any other parse_land columns, as lists. Defaults to None.
+        supporting (tuple, optional): The distinct SupportingIds of the activities, as JSON. Defaults to none.
+    """
+
+    __slots__ = ('buildings', 'land_id', 'last_updated', 'columns', 'extra', 'supporting')
+
+    def __init__(self, buildings, land_id=None, last_updated=None, columns=None, extra=None, supporting=()):
+        self.buildings = buildings
+        self.supporting = tuple(supporting)
+        self.land_id = land_id
+        self.last_updated = last_updated
+        self.columns = ('uid', 'buildingTypeString', 'state', 'position', 'startTime') + ACTIVITY_SLOTS + (
+            'fractionalGeneratedResources',) if columns is None else tuple(columns)
+        self.extra = extra or {}
+
+    def __len__(self):
+        return len(self.buildings)
+
+    def __repr__(self):
+        return f'CompactPlot(land_id={self.land_id}, buildings={len(self)}, nbytes={self.nbytes})'
+
+    @property
+    def nbytes(self):
+        """
+        The bytes held by the building records.
+        """
+        return self.buildings.nbytes
+
+    @classmethod
+    def from_frame(cls, df, land_id=None, last_updated=None):
+        """
+        Converts a DataFrame from parse_land.
+
+        Raises:
+            ValueError: If a uid is not a UUID.
+        """
+        buildings = np.zeros(len(df), BUILDING_DTYPE)
+        buildings['uid'] = np.array([uuid.UUID(value).bytes for value in df['uid']], 'V16')
+        catalog = get_catalog()
+        type_strings = df['buildingTypeString'].tolist()
+        buildings['type'] = _intern_column(type_strings)
+        parsed = [catalog.parse_type_string(value) for value in type_strings]
+        buildings['type_id'] = [type_id for type_id, _ in parsed]
+        buildings['level'] = [level for _, level in parsed]
+        buildings['state'] = _intern_column(df['state'])
+        positions = df['position'].tolist()
+        buildings['x'] = [int(position['@x']) for position in positions]
+        buildings['y'] = [int(position['@y']) for position in positions]
+        buildings['start'] = _ticks(df['startTime'])
+        buildings['fractional'] = pd.to_numeric(df['fractionalGeneratedResources'], errors='coerce').fillna(0)
+
+        supporting = {}
+        slots = buildings['activities']
+        slots['type'] = -1
+        slots['start'] = NAT
+        slots['end'] = NAT
+        slots['supporting'] = -1
+        for slot, column in enumerate(ACTIVITY_SLOTS):
+            if column not in df.columns:
+                continue
+            activities = [value if isinstance(value, dict) else {} for value in df[column].tolist()]
+            slots['type'][:, slot] = _intern_column([activity.get('Type') for activity in activities])
+            slots['sprite'][:, slot] = _intern_column([activity.get('SpriteName') for activity in activities])
+            slots['start'][:, slot] = _ticks([activity.get('StartTime') for activity in activities])
+            slots['end'][:, slot] = _ticks([activity.get('EndTime') for activity in activities])
+            slots['duration'][:, slot] = [int(activity.get('DurationInSeconds') or 0) for activity in activities]
+            slots['supporting'][:, slot] = [
+                supporting.setdefault(json.dumps(activity['SupportingIds']), len(supporting))
+                if 'SupportingIds' in activity else -1 for activity in activities]
+
+        extra = {column: df[column].tolist() for column in df.columns if column not in _fields}
+        return cls(buildings, land_id, last_updated, df.columns, extra, supporting)
+
+    @classmethod
+    def from_plot(cls, plot):
+        """
+        Parses a plot from the 'data' list returned by get_game_state.
+        """
+        from pyilz.parse_land import parse_land
+        return cls.from_frame(parse_land(plot['data']), plot.get('landId'), plot.get('lastUpdated'))
+
+    def _activities(self, slot):
+        activities = self.buildings['activities'][:, slot]
+        present = (activities['type'] >= 0).tolist()
+        starts = _iso(activities['start'])
+        ends = _iso(activities['end'])
+        column = []
+        for i, has_activity in enumerate(present):
+            if not has_activity:
+                column.append(np.nan)
+                continue
+            activity = activities[i]
+            values = (string(activity['type']), string(activity['sprite']), starts[i], ends[i],
+                      str(activity['duration']),
+                      json.loads(self.supporting[activity['supporting']]) if activity['supporting'] >= 0 else None)
+            column.append(dict(zip(_activity_keys, values)))
+        return column
+
+    def to_frame(self):
+        """
+        Returns the plot as the DataFrame parse_land returns.
+        """
+        buildings = self.buildings
+        columns = {
+            'uid': [str(uuid.UUID(bytes=value)) for value in buildings['uid'].tolist()],
+            'buildingTypeString': [string(value) for value in buildings['type'].tolist()],
+            'state': [string(value) for value in buildings['state'].tolist()],
+            'position': [{'@x': str(x), '@y': str(y)} for x, y in zip(buildings['x'].tolist(), buildings['y'].tolist())],
+            'startTime': _iso(buildings['start']),
+            'fractionalGeneratedResources': [_amount(value) for value in buildings['fractional'].tolist()],
+        }
+        for slot, column in enumerate(ACTIVITY_SLOTS):
+            if column in self.columns:
+                columns[column] = self._activities(slot)
+        columns.update(self.extra)
+        return pd.DataFrame({column: columns[column] for column in self.columns})
+
+    def __getstate__(self):
+        # string ids are only meaningful in this process, so pickles carry the strings
+        used = np.unique(np.concatenate([self.buildings['type'], self.buildings['state']] + [
+            self.buildings['activities'][field].ravel() for field in ('type', 'sprite')]))
+        used = used[used >= 0]
+        return (self.buildings, self.land_id, self.last_updated, self.columns, self.extra, self.supporting,
+                used, [_strings[string_id] for string_id in used.tolist()])
+
+    def __setstate__(self, state):
+        buildings, self.land_id, self.last_updated, self.columns, self.extra, self.supporting, used, strings = state
+        # one spare entry at the end, so -1 still maps to -1
+        remap = np.full(int(used.max()) + 2 if len(used) else 1, -1, np.int32)
+        remap[used] = [intern_string(value) for value in strings]
+        buildings = buildings.copy()
+        buildings['type'] = remap[buildings['type']]
+        buildings['state'] = remap[buildings['state']]
+        for field in ('type', 'sprite'):
+            buildings['activities'][field] = remap[buildings['activities'][field]]
+        self.buildings = buildings
+
+
+if __name__ == '__main__':
+    from pyilz.parse_land import parse_land
+    from pyilz.synthetic import synthetic_save
+    df = parse_land(synthetic_save(buildings=1000))
+    plot = CompactPlot.from_frame(df)
+    print(plot, 'DataFrame bytes:', df.memory_usage(deep=True).sum())
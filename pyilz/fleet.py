@@ -0,0 +1,213 @@
+import queue
+import time
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+import pyilz.get_device_id as get_device_id
+from pyilz.gamedata_client import GameDataClient
+from pyilz.get_game_state import stream_game_state
+from pyilz.metadata_store import MetadataStore
+from pyilz.plot_cache import ParsedPlot
+
+
+class FleetResult:
+    """
+    The outcome of one plot, or of an account whose game state could not be fetched.
+
+    Attributes:
+        account (int): The index of the account in the credentials list.
+        land_id (int): The plot's landId, or None for an account error.
+        last_updated: The plot's lastUpdated, or None for an account error.
+        tier (int): The plot's tier from its metadata, or None if it has no landId.
+        plot (ParsedPlot): The parsed frames and timers of the plot, or None on error.
+        storage (dict): The plot's total storage at its tier, or None on error or without a tier.
+        error (Exception): The error that stopped the account or plot, or None.
+        timings (dict): Seconds spent per stage: fetch (from the request to the plot arriving), metadata,
+                        process (from submission to the result arriving back), and the parse,
+                        normalize, timers and storage stages measured in the worker.
+    """
+
+    def __init__(self, account, land_id=None, last_updated=None, tier=None, plot=None, storage=None,
+                 error=None, timings=None):
+        self.account = account
+        self.land_id = land_id
+        self.last_updated = last_updated
+        self.tier = tier
+        self.plot = plot
+        self.storage = storage
+        self.error = error
+        self.timings = {} if timings is None else timings
+
+    def __repr__(self):
+        state = f'error={self.error!r}' if self.error is not None else f'tier={self.tier}'
+        return f'FleetResult(account={self.account}, land_id={self.land_id}, {state})'
+
+
+def _account_client(credential):
+    """
+    Returns a (client, device_id, created) tuple for a GameDataClient, a refresh token, or a
+    dictionary of GameDataClient arguments with an optional 'device_id'. created is whether the
+    client was made here, and so should be closed by the caller.
+    """
+    if isinstance(credential, GameDataClient):
+        return credential, None, False
+    if isinstance(credential, str):
+        return GameDataClient(ref_token=credential), None, True
+    credential = dict(credential)
+    device_id = credential.pop('device_id', None)
+    return GameDataClient(**credential), device_id, True
+
+
+def _fetch(client, device_id, store, submit, lookups):
+    """
+    Streams an account's game state in an I/O thread. As each plot arrives, its tier is looked up on
+    the lookups executor, so the stream keeps reading, and the plot is handed to submit with its
+    tier and fetch timings, or with the error if its tier could not be read. Returns once every
+    plot has been handed over.
+    """
+    start = time.perf_counter()
+
+    def lookup(plot, fetched):
+        land_id = plot.get('landId')
+        try:
+            tier = store.tier(land_id) if land_id is not None else None
+        except Exception as e:
+            tier, error = None, e
+        else:
+            error = None
+        submit(plot, tier, {'fetch': fetched - start, 'metadata': time.perf_counter() - fetched}, error)
+
+    handed = []
+    try:
+        for plot in stream_game_state(device_id=device_id, client=client):
+            handed.append(lookups.submit(lookup, plot, time.perf_counter()))
+    finally:
+        # every plot is handed over before the account is reported done, even if the stream fails
+        wait(handed)
+    for future in handed:
+        future.result()
+
+
+def _process_plot(plot, tier):
+    """
+    Parses and normalizes one plot and computes its timers and storage, in a worker process.
+    """
+    parsed = ParsedPlot(plot)
+    storage = None
+    if tier is not None:
+        start = time.perf_counter()
+        storage = parsed.storage(tier)
+        parsed.timings['storage'] = time.perf_counter() - start
+    return parsed, storage
+
+
+def run_fleet(credentials, fetch_workers=8, processes=None, metadata=None, device_id=None, lookup_workers=10):
+    """
+    Fetches, parses and normalizes the plots of many accounts, yielding each plot as it completes.
+
+    Game states are streamed on a pool of I/O threads, each through the account's pooled
+    GameDataClient. Every plot is handed to a process pool as soon as it has downloaded and its
+    tier has been read from the metadata store on a pool of lookup threads, so XML parsing,
+    normalization, timers and storage run on all cores while the rest of the game states are
+    still arriving. Results are yielded in completion order, not in the order of credentials.
+    Errors are yielded as results rather than raised, so one failing account does not stop the
+    others; the plots an account streamed before failing are still yielded, and a plot whose tier
+    cannot be read is yielded with the error. Clients made from credentials are closed at the end.
+    Like optimize_layout, this must run under an `if __name__ == '__main__':` guard on Windows.
+
+    Args:
+        credentials (list): A GameDataClient, a refresh token, or a dictionary of GameDataClient arguments
+                            (optionally with a 'device_id') per account.
+        fetch_workers (int, optional): The maximum number of accounts fetched at once. Defaults to 8.
+        processes (int, optional): The number of worker processes, 1 parses in this process. Defaults to the number of CPUs.
+        metadata (MetadataStore, optional): The store plot tiers are read from. Defaults to a new in-memory store
+                                            fetching through the first account's client.
+        device_id (str, optional): The device ID for accounts without one. Defaults to get_device_id.get_device_id().
+        lookup_workers (int, optional): The maximum number of plot metadata lookups at once. Defaults to 10.
+
+    Yields:
+        FleetResult: The parsed plot, or the error, with per-stage timings.
+    """
+    accounts = [_account_client(credential) for credential in credentials]
+    if metadata is None:
+        # plot metadata needs no auth, so any account's pooled client can fetch it
+        metadata = MetadataStore(client=accounts[0][0] if accounts else None)
+    default_device_id = get_device_id.get_device_id() if device_id is None else device_id
+    pool = None if processes == 1 else ProcessPoolExecutor(processes)
+    # ('submitted',), ('plot', result, job, submitted) and ('account', account, future) events
+    # from the I/O threads and the pool
+    events = queue.Queue()
+
+    def submitter(account):
+        def submit(plot, tier, timings, error=None):
+            result = FleetResult(account, plot.get('landId'), plot.get('lastUpdated'), tier, timings=timings)
+            submitted = time.perf_counter()
+            # counted before the job can finish, so its result is never missed
+            events.put(('submitted',))
+            if error is not None:
+                events.put(('plot', result, partial(_raise, error), submitted))
+            elif pool is None:
+                events.put(('plot', result, lambda: _process_plot(plot, tier), submitted))
+            else:
+                try:
+                    job = pool.submit(_process_plot, plot, tier)
+                except Exception as e:
+                    # e.g. BrokenProcessPool after a worker crashed, reported as the plot's error
+                    events.put(('plot', result, partial(_raise, e), submitted))
+                else:
+                    job.add_done_callback(lambda job: events.put(('plot', result, job.result, submitted)))
+        return submit
+
+    try:
+        with ThreadPoolExecutor(fetch_workers, thread_name_prefix='pyilz-fleet') as io, \
+                ThreadPoolExecutor(lookup_workers, thread_name_prefix='pyilz-fleet-metadata') as lookups:
+            for account, (client, account_device_id, _) in enumerate(accounts):
+                fetch = io.submit(_fetch, client, account_device_id or default_device_id, metadata,
+                                  submitter(account), lookups)
+                fetch.add_done_callback(lambda future, account=account: events.put(('account', account, future)))
+            fetching = len(accounts)
+            in_flight = 0
+            while fetching or in_flight:
+                event = events.get()
+                if event[0] == 'submitted':
+                    in_flight += 1
+                elif event[0] == 'plot':
+                    _, result, job, submitted = event
+                    in_flight -= 1
+                    yield _finish(result, job, submitted)
+                else:
+                    _, account, future = event
+                    fetching -= 1
+                    if future.exception() is not None:
+                        yield FleetResult(account, error=future.exception())
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        for client, _, created in accounts:
+            if created:
+                client.close()
+
+
+def _raise(error):
+    raise error
+
+
+def _finish(result, job, submitted):
+    """
+    Fills in a result from a job returning (parsed, storage), recording its wall time and worker timings.
+    """
+    try:
+        parsed, storage = job()
+    except Exception as e:
+        result.error = e
+    else:
+        result.plot = parsed
+        result.storage = storage
+        result.timings.update(parsed.timings)
+    result.timings['process'] = time.perf_counter() - submitted
+    return result
+
+
+if __name__ == '__main__':
+    import os
+    for result in run_fleet([os.environ['REFRESH_TOKEN']]):
+        print(result, {stage: round(seconds, 4) for stage, seconds in result.timings.items()})
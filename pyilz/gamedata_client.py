@@ -0,0 +1,165 @@
+import os
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from pyilz.token_manager import TokenManager, get_token_manager
+
+BASE_URL = 'http://api.illuvium-game.io/gamedata/api/zero'
+# overrides BASE_URL, e.g. to point every client at pyilz.mock_server
+BASE_URL_ENV = 'PYILZ_GAMEDATA_URL'
+
+# status codes worth retrying, the request never reached a healthy backend
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+class GameDataClient:
+    """
+    A pooled, retrying client for the gamedata API.
+
+    Requests share one keep-alive Session, so polling many plots reuses connections instead
+    of opening a new one per call. Connection errors, timeouts and 5xx responses are retried
+    with jittered exponential backoff. Tokens come from a TokenManager, which refreshes them
+    ahead of expiry; a 401 still makes it refresh once for every request that saw the same
+    token, and the request is then retried with the new token. A client given an api_key
+    without a ref_token only uses that key, and returns the 401 once it is rejected.
+
+    Args:
+        api_key (str, optional): The ID token to start with. Defaults to the account's shared TokenManager.
+        ref_token (str, optional): The account's refresh token. Defaults to the REFRESH_TOKEN environment variable.
+        base_url (str, optional): The gamedata API root. Defaults to the PYILZ_GAMEDATA_URL environment variable, or BASE_URL.
+        timeout (float or tuple, optional): The (connect, read) timeout in seconds. Defaults to (5, 30).
+        retries (int, optional): The number of retries after a failed attempt. Defaults to 3.
+        backoff (float, optional): The base delay in seconds, doubled after every retry. Defaults to 0.5.
+        pool_size (int, optional): The number of keep-alive connections kept per host. Defaults to 10.
+        session (requests.Session, optional): The session to send requests with. Defaults to a new pooled Session.
+        tokens (TokenManager, optional): The token manager to authenticate with. Overrides api_key and ref_token.
+    """
+
+    def __init__(self, api_key=None, ref_token=None, base_url=None, timeout=(5, 30), retries=3,
+                 backoff=0.5, pool_size=10, session=None, tokens=None):
+        if base_url is None:
+            base_url = os.getenv(BASE_URL_ENV, BASE_URL)
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        # only a manager made for this client is closed with it, shared ones keep refreshing
+        self._owns_tokens = tokens is None and api_key is not None
+        if tokens is None:
+            if api_key is None:
+                tokens = get_token_manager(ref_token)
+            else:
+                # a bare key must not be swapped for the REFRESH_TOKEN account's token
+                tokens = TokenManager(ref_token, api_key, refreshable=ref_token is not None)
+        self.tokens = tokens
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self.session = session
+
+    def token(self):
+        """
+        Returns a valid ID token.
+        """
+        return self.tokens.token()
+
+    def _delay(self, attempt):
+        # full jitter, so clients that failed together do not retry together
+        return random.uniform(0, self.backoff * 2 ** attempt)
+
+    def _send(self, method, url, **kwargs):
+        """
+        Sends a request, retrying connection errors, timeouts and 5xx responses.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if last:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or last:
+                    return response
+                # releases the connection of a streamed response
+                response.close()
+            time.sleep(self._delay(attempt))
+
+    def request(self, method, path, auth=True, api_key=None, **kwargs):
+        """
+        Sends a request to the gamedata API.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The path below base_url, e.g. '/plots'.
+            auth (bool, optional): Whether to send the ID token. Defaults to True.
+            api_key (str, optional): A token to use instead of the client's own. Defaults to None.
+            **kwargs: Passed on to requests.Session.request.
+
+        Returns:
+            requests.Response: The final response.
+        """
+        url = self.base_url + path
+        if not auth:
+            return self._send(method, url, **kwargs)
+
+        headers = kwargs.pop('headers', None) or {}
+        token = self.token() if api_key is None else api_key
+        response = self._send(method, url, headers=dict(headers, Authorization='Bearer ' + token), **kwargs)
+        if response.status_code == 401 and self.tokens.refreshable:
+            response.close()
+            token = self.tokens.invalidate(token)
+            response = self._send(method, url, headers=dict(headers, Authorization='Bearer ' + token), **kwargs)
+        return response
+
+    def get_json(self, path, auth=True, api_key=None, **kwargs):
+        """
+        Sends a GET request to the gamedata API and returns the decoded JSON body.
+        """
+        return self.request('GET', path, auth=auth, api_key=api_key, **kwargs).json()
+
+    def close(self):
+        """
+        Closes the pooled connections, and the background refresh of a token manager made for this client.
+        """
+        if self._owns_tokens:
+            self.tokens.close()
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Returns the shared GameDataClient used by get_game_state and get_plots, creating it on first use.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = GameDataClient()
+        return _client
+
+
+def set_client(client):
+    """
+    Replaces the shared GameDataClient, e.g. to change its timeouts or base URL.
+
+    Args:
+        client (GameDataClient): The client to share, or None to create a default one on next use.
+    """
+    global _client
+    with _client_lock:
+        _client = client
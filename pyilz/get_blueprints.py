@@ -1,10 +1,14 @@
-import importlib.resources
-import json
-with importlib.resources.open_text("pyilz", "reference_data.json") as file:
-    biodata_mapping = json.load(file)['biodata']
+from pyilz.reference_data import get_reference_data
+
+
+def __getattr__(name):
+    if name == 'biodata_mapping':
+        return get_reference_data()['biodata']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def _name_to_common(name):
-    return biodata_mapping.get(name, None)
+    return get_reference_data()['biodata'].get(name, None)
 
 def _name_to_dict(name):
     name = name.split('_')
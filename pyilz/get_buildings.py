@@ -1,8 +1,229 @@
-import json
 import math
-import importlib.resources
-with importlib.resources.open_text("pyilz", "buildings.json") as file:
-    buildings = json.load(file)['buildings']
+import re
+import threading
+from pyilz.reference_data import get_buildings_data
+
+land_tier_bonus_multiplier_percent = [0, 0, 33.33333333333, 100, 300, 900]
+# the number of names outside buildings.json that get a type id of their own
+MAX_UNKNOWN_TYPES = 256
+
+
+def normalize_building_name(name):
+    """
+    Normalizes a building name to the nameId form used in buildings.json.
+
+    Args:
+        name (str): The name of the building, e.g. "Hydrogen Pump" or "HYDROGEN_PUMP".
+
+    Returns:
+        str: The normalized name, e.g. "hydrogenpump".
+    """
+    return name.lower().replace(' ', '').replace('_', '').replace('-', '')
+
+
+class BuildingCatalog:
+    """
+    An indexed view of buildings.json.
+
+    Every building name is interned to an integer type id the first time it is seen, so
+    repeated lookups by (type id, level) are plain list and dict accesses instead of a
+    scan over the whole buildings list. Names that are not in buildings.json are interned
+    as well and resolve to the same defaults the scalar lookups have always returned. Only
+    the first MAX_UNKNOWN_TYPES of them are, under a lock; any further unknown name shares
+    the unknown_type id, so arbitrary names from saves cannot grow the catalog without bound.
+
+    Args:
+        buildings (list): The 'buildings' list from buildings.json.
+    """
+
+    def __init__(self, buildings):
+        self._ids = {}
+        self._type_strings = {}
+        self._lock = threading.Lock()
+        self.name_ids = []
+        self.width = []
+        self.height = []
+        self.efficiency = []
+        self.levels = []
+        for building in buildings:
+            if building['nameId'] in self._ids:
+                continue
+            type_id = self._intern(building['nameId'])
+            self.width[type_id] = building['width']
+            self.height[type_id] = building['height']
+            self.efficiency[type_id] = building['efficiency'] if 'efficiency' in building else 100
+            levels = self.levels[type_id]
+            for detail in building['details']:
+                if detail['level'] in levels:
+                    continue
+                storage = detail['storage'] if 'storage' in detail else None
+                activities = detail['activities']
+                active = activities['active']
+                passive = activities['passive']
+                levels[detail['level']] = (
+                    (int(storage['amount']), storage['resource']
+                     ) if storage is not None else (0, None),
+                    int(active['amount']) if active is not None else 0,
+                    int(passive['amount']) if passive is not None else 0,
+                )
+        self.known_types = len(self.name_ids)
+        # the shared id of unknown names past the cap, with the default dimensions and efficiency
+        self.unknown_type = self._intern('')
+
+    def _intern(self, name_id):
+        type_id = len(self.name_ids)
+        self._ids[name_id] = type_id
+        self.name_ids.append(name_id)
+        self.width.append(2)
+        self.height.append(2)
+        self.efficiency.append(100)
+        self.levels.append({})
+        return type_id
+
+    def type_id(self, name):
+        """
+        Returns the interned type id for a building name in any spelling.
+
+        Args:
+            name (str): The name of the building, e.g. "HYDROGEN_PUMP", "Hydrogen Pump" or "hydrogenpump".
+
+        Returns:
+            int: The type id of the building, or unknown_type for an unknown name once
+                 MAX_UNKNOWN_TYPES have been interned.
+        """
+        type_id = self._ids.get(name)
+        if type_id is None:
+            name_id = normalize_building_name(name)
+            with self._lock:
+                type_id = self._ids.get(name_id)
+                if type_id is None:
+                    if len(self.name_ids) - self.known_types > MAX_UNKNOWN_TYPES:
+                        return self.unknown_type
+                    type_id = self._intern(name_id)
+                self._ids[name] = type_id
+        return type_id
+
+    def parse_type_string(self, building_type_string):
+        """
+        Splits a buildingTypeString such as "HYDROGEN_PUMP_5" into its type id and level.
+
+        Args:
+            building_type_string (str): The buildingTypeString from the game state.
+
+        Returns:
+            tuple: A tuple containing the type id (int) and level (int, 0 if there is none).
+        """
+        parsed = self._type_strings.get(building_type_string)
+        if parsed is None:
+            name, level = split_type_string(building_type_string)
+            parsed = self.type_id(name), level
+            if parsed[0] != self.unknown_type:
+                self._type_strings[building_type_string] = parsed
+        return parsed
+
+    def is_known(self, type_id):
+        """
+        Returns whether the type id belongs to a building defined in buildings.json.
+        """
+        return type_id < self.known_types
+
+    def dimensions(self, type_id):
+        """
+        Returns the width and height of a building type, defaulting to 2x2.
+        """
+        return self.width[type_id], self.height[type_id]
+
+    def starting_efficiency(self, type_id):
+        """
+        Returns the starting efficiency of a building type, defaulting to 100.
+        """
+        return self.efficiency[type_id]
+
+    def storage(self, type_id, level, tier):
+        """
+        Returns the storage capacity and resource type of a building type at a given level and tier.
+
+        Returns:
+            tuple: A tuple containing the storage capacity (int) and resource type (str),
+                   (0, None) if the level has no storage, or None if the level does not exist.
+        """
+        entry = self.levels[type_id].get(level)
+        if entry is None:
+            return None
+        amount, resource = entry[0]
+        if resource is None:
+            return 0, None
+        return math.ceil(amount * (1 + (land_tier_bonus_multiplier_percent[tier] / 100))), resource
+
+    def active_output(self, type_id, level, tier, efficiency=100):
+        """
+        Returns the active output of a building type, or None if the level does not exist.
+        """
+        entry = self.levels[type_id].get(level)
+        if entry is None:
+            return None
+        return _output(entry[1], tier, efficiency)
+
+    def passive_output(self, type_id, level, tier, efficiency=100):
+        """
+        Returns the passive output of a building type, or None if the level does not exist.
+        """
+        entry = self.levels[type_id].get(level)
+        if entry is None:
+            return None
+        return _output(entry[2], tier, efficiency)
+
+
+def _output(amount, tier, efficiency):
+    return math.ceil((amount * efficiency / 100) * (1 + (land_tier_bonus_multiplier_percent[tier] / 100)))
+
+
+_type_string_pattern = re.compile(r'(.+?)_?(\d+)$')
+_split_type_strings = {}
+
+
+def split_type_string(building_type_string):
+    """
+    Splits a buildingTypeString such as "HYDROGEN_PUMP_5" into its name and level.
+
+    Args:
+        building_type_string (str): The buildingTypeString from the game state.
+
+    Returns:
+        tuple: A tuple containing the name (str) and level (int, 0 if there is none).
+    """
+    split = _split_type_strings.get(building_type_string)
+    if split is None:
+        match = _type_string_pattern.match(building_type_string)
+        if match is None:
+            split = building_type_string, 0
+        else:
+            split = match.group(1), int(match.group(2))
+        _split_type_strings[building_type_string] = split
+    return split
+
+
+def __getattr__(name):
+    # buildings.json is only read when something first needs it
+    if name == 'buildings':
+        return get_buildings_data()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+_catalog = None
+
+
+def get_catalog():
+    """
+    Returns the shared BuildingCatalog, building it from buildings.json on first use.
+
+    Returns:
+        BuildingCatalog: The shared building catalog.
+    """
+    global _catalog
+    if _catalog is None:
+        _catalog = BuildingCatalog(get_buildings_data())
+    return _catalog
 
 
 def get_building_dimensions(name):
@@ -17,11 +238,8 @@ def get_building_dimensions(name):
                If the building is not found, returns a tuple with default
                values of 2 for width and height.
     """
-    name = name.lower().replace(' ', '').replace('_', '').replace('-', '')
-    for building in buildings:  # This should probably be a dict
-        if building['nameId'] == name:
-            return building['width'], building['height']
-    return 2, 2
+    catalog = get_catalog()
+    return catalog.dimensions(catalog.type_id(name))
 
 
 def get_building_starting_efficiency(name):
@@ -34,11 +252,8 @@ def get_building_starting_efficiency(name):
     Returns:
         int: The starting efficiency of the building, or 100 if not found.
     """
-    name = name.lower().replace(' ', '').replace('_', '').replace('-', '')
-    for building in buildings:  # This should probably be a dict
-        if building['nameId'] == name:
-            return building['efficiency'] if 'efficiency' in building else 100
-    return 100
+    catalog = get_catalog()
+    return catalog.starting_efficiency(catalog.type_id(name))
 
 
 def get_building_radius(name):
@@ -73,21 +288,8 @@ def get_building_storage(name: str, level: int, tier: int) -> tuple:
     Returns:
         tuple: A tuple containing the storage capacity (int) and resource type (str) of the building.
     """
-    name = name.lower().replace(' ', '').replace('_', '').replace('-', '')
-    land_tier_bonus_multiplier_percent = [0, 0, 33.33333333333, 100, 300, 900]
-    for building in buildings:  # This should probably be a dict
-        if building['nameId'] == name:
-            details = building['details']
-            for detail in details:
-                if detail['level'] == level:
-                    if 'storage' not in detail:
-                        return 0, None
-                    storage = detail['storage']
-                    if storage is None:
-                        return 0, None
-                    amount = int(storage['amount'])
-                    resource = storage['resource']
-                    return math.ceil(amount * (1 + (land_tier_bonus_multiplier_percent[tier] / 100))), resource
+    catalog = get_catalog()
+    return catalog.storage(catalog.type_id(name), level, tier)
 
 
 def get_active_output(name: str, level: int, tier: int, efficiency: int = 100) -> int:
@@ -103,19 +305,8 @@ def get_active_output(name: str, level: int, tier: int, efficiency: int = 100) -
     Returns:
         int: The active output of the building.
     """
-    name = name.lower().replace(' ', '').replace('_', '').replace('-', '')
-    land_tier_bonus_multiplier_percent = [0, 0, 33.33333333333, 100, 300, 900]
-    for building in buildings:  # This should probably be a dict
-        if building['nameId'] == name:
-            details = building['details']
-            for detail in details:
-                if detail['level'] == level:
-                    activities = detail['activities']
-                    active = activities['active']
-                    if active is None:
-                        return 0
-                    amount = int(active['amount'])
-                    return math.ceil((amount * efficiency / 100) * (1 + (land_tier_bonus_multiplier_percent[tier] / 100)))
+    catalog = get_catalog()
+    return catalog.active_output(catalog.type_id(name), level, tier, efficiency)
 
 
 def get_passive_output(name: str, level: int, tier: int, efficiency: int = 100) -> int:
@@ -131,19 +322,95 @@ def get_passive_output(name: str, level: int, tier: int, efficiency: int = 100)
     Returns:
         int: The calculated passive output of the building. 
     """
-    name = name.lower().replace(' ', '').replace('_', '').replace('-', '')
-    land_tier_bonus_multiplier_percent = [0, 0, 33.33333333333, 100, 300, 900]
-    for building in buildings:  # This should probably be a dict
-        if building['nameId'] == name:
-            details = building['details']
-            for detail in details:
-                if detail['level'] == level:
-                    activities = detail['activities']
-                    passive = activities['passive']
-                    if passive is None:
-                        return 0
-                    amount = int(passive['amount'])
-                    return math.ceil((amount * efficiency / 100) * (1 + (land_tier_bonus_multiplier_percent[tier] / 100)))
+    catalog = get_catalog()
+    return catalog.passive_output(catalog.type_id(name), level, tier, efficiency)
+
+
+def type_string_arrays(building_type_strings):
+    """
+    Splits many buildingTypeStrings into arrays of type ids and levels, for the batch output functions.
+
+    Args:
+        building_type_strings (iterable): buildingTypeStrings such as "HYDROGEN_PUMP_5", e.g. a
+                                          parse_land 'buildingTypeString' column.
+
+    Returns:
+        tuple: A tuple containing the type ids and the levels, as numpy int arrays.
+    """
+    import numpy as np
+    catalog = get_catalog()
+    parsed = [catalog.parse_type_string(value) for value in building_type_strings]
+    if not parsed:
+        return np.zeros(0, np.intp), np.zeros(0, np.intp)
+    type_ids, levels = zip(*parsed)
+    return np.array(type_ids, np.intp), np.array(levels, np.intp)
+
+
+def _batch_output(kind, types, levels, tiers, efficiencies):
+    import numpy as np
+    from pyilz.reference_tables import get_reference_tables
+    tables = get_reference_tables()
+    catalog = get_catalog()
+    types = np.asarray(types)
+    if not np.issubdtype(types.dtype, np.integer):
+        types = np.array([catalog.type_id(name) for name in types.ravel()], np.intp).reshape(types.shape)
+    types, levels, tiers = np.broadcast_arrays(types.astype(np.intp), np.asarray(levels, np.intp),
+                                               np.asarray(tiers, np.intp))
+    # plain ndarray views of the mapped tables, which index faster than numpy.memmap
+    has_level = np.asarray(tables.has_level)
+    # unknown building types and missing levels produce nothing
+    valid = (types < has_level.shape[0]) & (levels >= 0) & (levels < has_level.shape[1])
+    types, levels = np.where(valid, types, 0), np.where(valid, levels, 0)
+    valid &= has_level[types, levels]
+    efficiencies = np.asarray(efficiencies)
+    if efficiencies.ndim == 0 and efficiencies == 100:
+        # the tables hold the output at 100% efficiency, rounded by the scalar functions
+        output = np.asarray(tables.arrays[kind + '_output'])[types, levels, tiers]
+    else:
+        amount = np.asarray(tables.arrays[kind + '_amount'])[types, levels]
+        multiplier = np.asarray(tables.tier_multiplier)[tiers]
+        # the same operations in the same order as _output, so the ceil rounds identically
+        output = np.ceil((amount * efficiencies / 100) * multiplier).astype(np.int64)
+    return np.where(valid, output, 0)
+
+
+def get_active_outputs(types, levels, tiers, efficiencies=100):
+    """
+    Returns the active output of many buildings at once.
+
+    The arguments are broadcast against each other, so a whole plot or portfolio is one call,
+    and efficiencies of shape (scenarios, 1) evaluate every building under every scenario.
+    Each result equals get_active_output for the same building, level, tier and efficiency.
+
+    Args:
+        types (array_like): The type ids from get_catalog(), or the building names.
+        levels (array_like): The levels of the buildings.
+        tiers (array_like): The tiers of the land the buildings are on.
+        efficiencies (array_like, optional): The efficiencies of the buildings. Defaults to 100.
+
+    Returns:
+        numpy.ndarray: The active outputs as int64, 0 for unknown buildings and levels that do not exist.
+    """
+    return _batch_output('active', types, levels, tiers, efficiencies)
+
+
+def get_passive_outputs(types, levels, tiers, efficiencies=100):
+    """
+    Returns the passive output of many buildings at once.
+
+    Broadcasts like get_active_outputs, and each result equals get_passive_output for the same
+    building, level, tier and efficiency.
+
+    Args:
+        types (array_like): The type ids from get_catalog(), or the building names.
+        levels (array_like): The levels of the buildings.
+        tiers (array_like): The tiers of the land the buildings are on.
+        efficiencies (array_like, optional): The efficiencies of the buildings. Defaults to 100.
+
+    Returns:
+        numpy.ndarray: The passive outputs as int64, 0 for unknown buildings and levels that do not exist.
+    """
+    return _batch_output('passive', types, levels, tiers, efficiencies)
 
 
 if __name__ == '__main__':
@@ -1,31 +1,67 @@
-import requests
 import pyilz.get_device_id as get_device_id
-import pyilz.refresh_token as refresh_token
-import pyilz.get_token as get_token
-import os
+from pyilz.gamedata_client import get_client
+from pyilz.json_stream import iter_array_items
 
 
-def get_game_state(api_key=None, device_id=None):
+def get_game_state(api_key=None, device_id=None, client=None):
     """
     Returns a dictionary of the game state. Auth required.
 
     Args:
-        api_key (str): API key for authentication. If None, it will be fetched using get_token.get_token().
+        api_key (str): API key for authentication. If None, the client's token is used, fetched using get_token.get_token().
         device_id (str): Device ID for authentication. If None, it will be fetched using get_device_id.get_device_id().
+        client (GameDataClient, optional): The client to send the request with. Defaults to the shared client.
 
     Returns:
         dict: A dictionary containing the game state.
     """
     DEVICE_ID = get_device_id.get_device_id() if device_id is None else device_id
-    API_KEY = get_token.get_token() if api_key is None else api_key
-    url = f'http://api.illuvium-game.io/gamedata/api/zero/gamestate?active_device_id={DEVICE_ID}'
-
-    response = requests.get(url, headers={'Authorization':
-                            'Bearer ' + API_KEY})
-    if response.status_code == 401:
-        API_KEY = refresh_token.refresh_token()
-        response = requests.get(url, headers={'Authorization':
-                                              'Bearer ' + API_KEY})
-        os.environ['API_KEY'] = API_KEY
-
-    return response.json()
+    client = get_client() if client is None else client
+    return client.get_json('/gamestate', api_key=api_key, params={'active_device_id': DEVICE_ID})
+
+
+def _iter_body(response, chunk_size):
+    """
+    Yields the decompressed body of a streamed response as it arrives.
+    """
+    raw = getattr(response, 'raw', None)
+    if not hasattr(raw, 'read1'):
+        yield from response.iter_content(chunk_size)
+        return
+    # iter_content waits for chunk_size compressed bytes, read1 returns whatever has arrived (urllib3 2)
+    while True:
+        chunk = raw.read1(chunk_size, decode_content=True)
+        if not chunk:
+            return
+        yield chunk
+
+
+def stream_game_state(api_key=None, device_id=None, client=None, chunk_size=64 * 1024):
+    """
+    Yields the plots of the game state one at a time, as each one finishes downloading. Auth required.
+
+    The response is requested with gzip or deflate transfer encoding and decoded incrementally,
+    so a plot can be parsed while the rest of the body is still arriving, and only the plot
+    being read is held in memory instead of the whole body.
+
+    Args:
+        api_key (str): API key for authentication. If None, the client's token is used, fetched using get_token.get_token().
+        device_id (str): Device ID for authentication. If None, it will be fetched using get_device_id.get_device_id().
+        client (GameDataClient, optional): The client to send the request with. Defaults to the shared client.
+        chunk_size (int, optional): The number of decompressed bytes read at a time. Defaults to 64 KiB.
+
+    Yields:
+        dict: Each plot of the 'data' list returned by get_game_state.
+
+    Raises:
+        requests.HTTPError: If the response is an error.
+    """
+    DEVICE_ID = get_device_id.get_device_id() if device_id is None else device_id
+    client = get_client() if client is None else client
+    response = client.request('GET', '/gamestate', api_key=api_key, params={'active_device_id': DEVICE_ID},
+                              headers={'Accept-Encoding': 'gzip, deflate'}, stream=True)
+    try:
+        response.raise_for_status()
+        yield from iter_array_items(_iter_body(response, chunk_size), 'data')
+    finally:
+        response.close()
@@ -1,26 +1,103 @@
-from pyilz.get_buildings import get_building_storage
+import re
+import numpy as np
+import pandas as pd
+from pyilz.get_buildings import get_catalog
+from pyilz.reference_tables import get_reference_tables
 
+STORAGE_BUILDING_SUFFIXES = ('SILO', 'UNIT')
 
-def _get_storage_buildings(df):
+_type_pattern = re.compile(r'(.+?)_\d+$')
+_storage_types = {}
+_storage_rows = None
+
+
+def _storage_table():
+    """
+    Returns the (type id, level) storage table flattened to one row per type and level, as
+    (amounts by tier, resource ids), with an extra last row of zeros for buildings without storage.
+    """
+    global _storage_rows
+    if _storage_rows is None:
+        tables = get_reference_tables()
+        # plain ndarray views of the mapped tables, which index faster than numpy.memmap
+        storage = np.asarray(tables.storage)
+        types, levels, tiers = storage.shape
+        amounts = np.vstack([storage.reshape(types * levels, tiers), np.zeros((1, tiers), dtype=storage.dtype)])
+        resources = np.append(np.where(np.asarray(tables.has_level).ravel(),
+                                       np.asarray(tables.storage_resource).ravel(), -1), -1).astype(np.intp)
+        _storage_rows = amounts, resources, levels
+    return _storage_rows
+
+
+def _storage_row(building_type_string):
+    """
+    Returns the row of a buildingTypeString in the flattened storage table.
     """
-    Returns a filtered DataFrame containing only the storage buildings from the input DataFrame.
+    row = _storage_types.get(building_type_string)
+    if row is None:
+        amounts, _, levels = _storage_table()
+        row = len(amounts) - 1
+        match = _type_pattern.match(building_type_string)
+        if match is not None and match.group(1).rstrip('_').endswith(STORAGE_BUILDING_SUFFIXES):
+            type_id, level = get_catalog().parse_type_string(building_type_string)
+            # unknown types and levels store nothing
+            if type_id < len(get_reference_tables().name_ids) and level < levels:
+                row = type_id * levels + level
+        _storage_types[building_type_string] = row
+    return row
+
+
+def get_storage_many(parsed_lands, tiers=1):
+    """
+    Calculates the storage capacity of many plots at once.
+
+    Every distinct buildingTypeString across all plots is resolved once against the precomputed
+    (type id, level, tier) storage table from get_reference_tables, and the capacities are summed
+    per plot and resource with a single bincount. The inputs are not modified.
 
     Args:
-        df (pandas.DataFrame): The input DataFrame containing the building data.
+        parsed_lands (list): A DataFrame from parse_land per plot.
+        tiers (int or list, optional): The land tier of every plot, or one per plot. Defaults to 1.
 
     Returns:
-        pandas.DataFrame: A filtered DataFrame containing only the storage buildings.
+        list: A dictionary per plot, as returned by get_storage.
     """
-    storage_buildings_suffix = ['SILO', 'UNIT']
-    # pop off _{number} from buildingTypeString and put into column Level
-    df['Level'] = df['buildingTypeString'].str.extract(
-        r'_(\d+)', expand=False).fillna(0).astype(int)
-    # remove _{number} from buildingTypeString and put into column Type
-    df['Type'] = df['buildingTypeString'].str.extract(
-        r'(.+?)_\d+$', expand=False).str.rstrip('_')
-    # get rows where Type ends with SILO or UNIT
-    df = df[df['Type'].str.endswith(tuple(storage_buildings_suffix))]
-    return df
+    table, table_resources, _ = _storage_table()
+    names = get_reference_tables().resources
+    count = len(parsed_lands)
+    tiers = np.broadcast_to(np.asarray(tiers, dtype=np.intp), (count,))
+    sizes = [len(parsed_land) for parsed_land in parsed_lands]
+    type_strings = np.concatenate([parsed_land['buildingTypeString'].to_numpy(dtype=object)
+                                   for parsed_land in parsed_lands]) if count else np.empty(0, dtype=object)
+    plots = np.repeat(np.arange(count), sizes)
+
+    codes, uniques = pd.factorize(type_strings)
+    unique_rows = np.fromiter((_storage_row(value) for value in uniques), dtype=np.intp, count=len(uniques))
+    rows = unique_rows[codes[codes >= 0]]
+    plots = plots[codes >= 0]
+    resource = table_resources[rows]
+    keep = resource >= 0
+    rows, plots, resource = rows[keep], plots[keep], resource[keep]
+    cells = plots * len(names) + resource
+    totals = np.bincount(cells, weights=table[rows, tiers[plots]], minlength=count * len(names))
+    present = np.bincount(cells, minlength=count * len(names)) > 0
+    totals = np.rint(totals).astype(np.int64).reshape(count, len(names))
+    present = present.reshape(count, len(names))
+
+    storages = []
+    for plot in range(count):
+        storage = {
+            'hydrogen': 0,
+            'silicon': 0,
+            'carbon': 0,
+            'crypton': 0,
+            'hyperion': 0,
+            'solon': 0,
+        }
+        for resource in np.flatnonzero(present[plot]):
+            storage[names[resource]] = int(totals[plot, resource])
+        storages.append(storage)
+    return storages
 
 
 def get_storage(parsed_land, tier=1):
@@ -28,23 +105,10 @@ def get_storage(parsed_land, tier=1):
     Calculates the total amount of resources that can be stored in the player's storage buildings.
 
     Args:
-        parsed_land (pandas.DataFrame): A DataFrame containing information about the player's land.
+        parsed_land (pandas.DataFrame): A DataFrame containing information about the player's land. It is not modified.
         tier (int, optional): The tier of the storage buildings to consider. Defaults to 1.
 
     Returns:
         dict: A dictionary containing the total amount of each resource that can be stored.
     """
-    storage_buildings = _get_storage_buildings(parsed_land)
-    storage = {
-        'hydrogen': 0,
-        'silicon': 0,
-        'carbon': 0,
-        'crypton': 0,
-        'hyperion': 0,
-        'solon': 0,
-    }
-    for _, row in storage_buildings.iterrows():
-        amount, resource = get_building_storage(
-            row['Type'], row['Level'], tier)
-        storage[resource] += amount
-    return storage
+    return get_storage_many([parsed_land], tier)[0]
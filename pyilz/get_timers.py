@@ -1,8 +1,10 @@
+import time
+import numpy as np
 import pandas as pd
 import pytz
 import pyilz.parse_land as parse_land
 from pyilz.metadata_to_array import timer_to_iz
-from pyilz.get_buildings import get_building_dimensions
+from pyilz.get_buildings import get_catalog
 
 
 def get_timers_from_state(gamestate):
@@ -32,6 +34,7 @@ def get_timers(ca, aa, completed, init=False):
     Returns:
         dict: A dictionary of timers for the specified activities.
     """
+    catalog = get_catalog()
     timers = {}
     if ca is not None:
         for i, row in ca.iterrows():
@@ -54,7 +57,8 @@ def get_timers(ca, aa, completed, init=False):
             if init and diff_minutes <= 0:
                 notified = True
 
-            w, h = get_building_dimensions(row['buildingTypeString'][:-2])
+            w, h = catalog.dimensions(
+                catalog.parse_type_string(row['buildingTypeString'])[0])
             x, y = timer_to_iz(row['x'], row['y'], w, h)
 
             timers[f'{row["uid"]}-current'] = {'uid': row['uid'],
@@ -88,7 +92,8 @@ def get_timers(ca, aa, completed, init=False):
             if init and diff_minutes <= 0:
                 notified = True
 
-            w, h = get_building_dimensions(row['buildingTypeString'][:-2])
+            w, h = catalog.dimensions(
+                catalog.parse_type_string(row['buildingTypeString'])[0])
             x, y = timer_to_iz(row['x'], row['y'], w, h)
 
             timers[f'{row["uid"]}-auto'] = {'uid': row['uid'],
@@ -136,7 +141,8 @@ def get_timers(ca, aa, completed, init=False):
             elif row['fractionalGeneratedResources'] == '0':
                 completed_type = 'EXTRACT'
 
-            w, h = get_building_dimensions(row['buildingTypeString'][:-2])
+            w, h = catalog.dimensions(
+                catalog.parse_type_string(row['buildingTypeString'])[0])
             x, y = timer_to_iz(row['x'], row['y'], w, h)
 
             timers[f'{row["uid"]}-current'] = {'uid': row['uid'],
@@ -154,3 +160,177 @@ def get_timers(ca, aa, completed, init=False):
     timers = {k: v for k, v in sorted(
         timers.items(), key=lambda item: item[1]['minutes'])}
     return timers
+
+
+def refresh_timers(timers, now=None):
+    """
+    Returns a copy of timers from get_timers with minutes and percentage recomputed for the given time.
+
+    Args:
+        timers (dict): A dictionary of timers returned by get_timers.
+        now (float, optional): The unix time to compute the timers for. Defaults to the current time.
+
+    Returns:
+        dict: A dictionary of timers for the specified activities.
+    """
+    if now is None:
+        now = pd.Timestamp.now(tz='utc').timestamp()
+    refreshed = {}
+    for key, timer in timers.items():
+        timer = dict(timer)
+        timer['minutes'] = (timer['end'] - now) / 60
+        timer['percentage'] = (now - timer['start']) / \
+            (timer['end'] - timer['start']) * 100
+        refreshed[key] = timer
+    return refreshed
+
+
+class TimerTable:
+    """
+    The timers of a plot as parallel NumPy arrays, sorted by end time.
+
+    minutes, percentage and notified are 1-D when the table was built for a single time, and
+    2-D with one row per time when it was built for an array of times.
+
+    Attributes:
+        keys, uid, name, type (numpy.ndarray): The timer keys used by get_timers and the activity details.
+        start, end (numpy.ndarray): The unix start and end times of each activity.
+        x, y (numpy.ndarray): The Iz coordinates of each building.
+        now (float or numpy.ndarray): The unix time or times the table was computed for.
+        minutes, percentage, notified (numpy.ndarray): The time left, progress and notified flag of each activity.
+    """
+
+    def __init__(self, keys, uid, name, type, start, end, x, y, now, minutes, percentage, notified):
+        self.keys = keys
+        self.uid = uid
+        self.name = name
+        self.type = type
+        self.start = start
+        self.end = end
+        self.x = x
+        self.y = y
+        self.now = now
+        self.minutes = minutes
+        self.percentage = percentage
+        self.notified = notified
+
+    def __len__(self):
+        return len(self.keys)
+
+    def to_dict(self):
+        """
+        Returns the timers in the same dictionary format as get_timers.
+
+        Returns:
+            dict: A dictionary of timers for the specified activities.
+        """
+        if self.minutes.ndim != 1:
+            raise ValueError('to_dict needs a table built for a single time')
+        columns = zip(self.keys.tolist(), self.uid.tolist(), self.name.tolist(), self.type.tolist(), self.minutes.tolist(),
+                      self.notified.tolist(), self.percentage.tolist(), self.end.tolist(), self.start.tolist(),
+                      self.x.tolist(), self.y.tolist())
+        return {key: {'uid': uid,
+                      'name': name,
+                      'type': type,
+                      'minutes': minutes,
+                      'notified': notified,
+                      'percentage': percentage,
+                      'end': end,
+                      'start': start,
+                      'x': x,
+                      'y': y} for key, uid, name, type, minutes, notified, percentage, end, start, x, y in columns}
+
+    def to_frame(self):
+        """
+        Returns the timers as a pandas DataFrame indexed by timer key.
+        """
+        if self.minutes.ndim != 1:
+            raise ValueError('to_frame needs a table built for a single time')
+        return pd.DataFrame({'uid': self.uid, 'name': self.name, 'type': self.type, 'minutes': self.minutes,
+                             'notified': self.notified, 'percentage': self.percentage, 'end': self.end,
+                             'start': self.start, 'x': self.x, 'y': self.y}, index=pd.Index(self.keys, name='key'))
+
+
+def _unix_seconds(times):
+    """
+    Converts a column of datetimes to float unix seconds, treating naive datetimes as UTC.
+    """
+    times = pd.to_datetime(times, utc=True)
+    return (times - pd.Timestamp(0, tz='utc')).dt.total_seconds().to_numpy()
+
+
+def _timer_columns(frame, column, suffix):
+    """
+    Returns the key, uid, name, type, start, end, x and y arrays of one activity frame.
+    """
+    catalog = get_catalog()
+    names = frame['buildingTypeString']
+    codes, uniques = pd.factorize(names)
+    dimensions = np.array([catalog.dimensions(catalog.parse_type_string(name)[0])
+                           for name in uniques], dtype=np.int64).reshape(-1, 2)
+    w, h = dimensions[codes, 0], dimensions[codes, 1]
+    uid = frame['uid'].to_numpy(dtype=object)
+    # same as timer_to_iz, which swaps and mirrors the axes, then corrects for the building size
+    x = 51 - frame['x'].to_numpy(dtype=np.int64) - w
+    y = 51 - frame['y'].to_numpy(dtype=np.int64) - h
+    return (uid + suffix, uid, names.to_numpy(dtype=object), frame[column + '.Type'].to_numpy(dtype=object),
+            _unix_seconds(frame[column + '.StartTime']), _unix_seconds(frame[column + '.EndTime']), x, y)
+
+
+def get_timer_table(ca, aa, completed, init=False, now=None):
+    """
+    Returns the timers for the specified activities, computed as array operations from one clock reading.
+
+    Args:
+        ca (pandas.DataFrame): A DataFrame containing information about current activities.
+        aa (pandas.DataFrame): A DataFrame containing information about auto activities.
+        completed (pandas.DataFrame): A DataFrame containing information about completed activities.
+        init (bool): A flag indicating whether all timers should be marked as notified.
+        now (float or array-like, optional): The unix time, or times, to compute the timers for.
+                                             Defaults to the current time.
+
+    Returns:
+        TimerTable: The timers for the specified activities, sorted by end time.
+    """
+    now = time.time() if now is None else now
+    now = np.asarray(now, dtype=float)
+
+    groups = []
+    if ca is not None:
+        groups.append(_timer_columns(ca, 'currentActivity', '-current'))
+    if aa is not None:
+        groups.append(_timer_columns(aa, 'autoActivity', '-auto'))
+    if completed is not None:
+        # Correct type for completed buildings
+        columns = _timer_columns(completed, 'completedActivity', '-current')
+        sprite = completed['completedActivity.SpriteName'].astype(str)
+        completed_type = np.select(
+            [sprite.str.contains('build', regex=False).to_numpy(),
+             sprite.str.contains('scan', regex=False).to_numpy(),
+             sprite.str.contains('illuvials', regex=False).to_numpy(),
+             # if no resources have been generated then it is an extract
+             (completed['fractionalGeneratedResources'] == '0').to_numpy()],
+            ['UPGRADE', 'SCAN', 'RESEARCH', 'EXTRACT'], columns[3])
+        groups.append(columns[:3] + (completed_type.astype(object),) + columns[4:])
+    if groups:
+        keys, uid, name, type, start, end, x, y = (np.concatenate(column) for column in zip(*groups))
+    else:
+        keys = uid = name = type = np.empty(0, dtype=object)
+        start = end = np.empty(0)
+        x = y = np.empty(0, dtype=np.int64)
+
+    # a completed activity replaces the current activity with the same key, like in get_timers,
+    # taking its values but keeping the position the key was first inserted at
+    _, first = np.unique(keys, return_index=True)
+    _, last = np.unique(keys[::-1], return_index=True)
+    keep = (len(keys) - 1 - last)[np.argsort(first)]
+    order = keep[np.argsort(end[keep], kind='stable')]
+    keys, uid, name, type, start, end, x, y = (
+        column[order] for column in (keys, uid, name, type, start, end, x, y))
+
+    minutes = (end - now[..., None]) / 60
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentage = (now[..., None] - start) / (end - start) * 100
+    notified = (minutes <= 0) & init
+    return TimerTable(keys, uid, name, type, start, end, x, y, now if now.ndim else float(now),
+                      minutes, percentage, notified)
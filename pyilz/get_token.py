@@ -1,10 +1,10 @@
-import os
-import pyilz.refresh_token as refresh_token
+from pyilz.token_manager import get_token_manager
 
 
 def get_token(ref_token=None):
     """
-    Returns the API_KEY from the environment. If it doesn't exist, refreshes the token and returns it.
+    Returns a valid API_KEY for the account of the refresh token, refreshing it if it has expired.
+    The API_KEY environment variable is used as the starting token when no refresh token is given.
     If the refresh token is not provided, it will be retrieved from the environment.
 
     Args:
@@ -13,10 +13,4 @@ def get_token(ref_token=None):
     Returns:
         str: The API key.
     """
-    API_KEY = os.getenv('API_KEY')
-    if API_KEY:
-        return API_KEY
-    else:
-        API_KEY = refresh_token.refresh_token(ref_token)
-        os.environ['API_KEY'] = API_KEY
-    return API_KEY
+    return get_token_manager(ref_token).token()
@@ -0,0 +1,227 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import pandas as pd
+from pyilz.get_buildings import split_type_string
+from pyilz.plot_cache import ParsedPlot
+
+_schema = [
+    'CREATE TABLE IF NOT EXISTS snapshots (id INTEGER PRIMARY KEY, land_id TEXT NOT NULL, '
+    'last_updated TEXT NOT NULL, time REAL NOT NULL, digest TEXT NOT NULL, tier INTEGER, '
+    'UNIQUE (land_id, last_updated))',
+    'CREATE INDEX IF NOT EXISTS snapshots_plot_time ON snapshots (land_id, time)',
+    'CREATE TABLE IF NOT EXISTS buildings (snapshot INTEGER NOT NULL, land_id TEXT NOT NULL, '
+    'time REAL NOT NULL, uid TEXT, type TEXT, level INTEGER, state TEXT, x INTEGER, y INTEGER, '
+    'fractional REAL)',
+    'CREATE INDEX IF NOT EXISTS buildings_plot_time ON buildings (land_id, time)',
+    'CREATE INDEX IF NOT EXISTS buildings_type_time ON buildings (type, time)',
+    'CREATE TABLE IF NOT EXISTS timers (snapshot INTEGER NOT NULL, land_id TEXT NOT NULL, '
+    'time REAL NOT NULL, key TEXT, uid TEXT, name TEXT, type TEXT, start REAL, end REAL)',
+    'CREATE INDEX IF NOT EXISTS timers_plot_time ON timers (land_id, time)',
+    'CREATE INDEX IF NOT EXISTS timers_type_time ON timers (type, time)',
+    'CREATE TABLE IF NOT EXISTS storage (snapshot INTEGER NOT NULL, land_id TEXT NOT NULL, '
+    'time REAL NOT NULL, resource TEXT, amount INTEGER)',
+    'CREATE INDEX IF NOT EXISTS storage_plot_time ON storage (land_id, time)',
+]
+
+
+def _unix_time(last_updated):
+    """
+    Converts a lastUpdated timestamp to unix seconds, treating naive times as UTC.
+    """
+    timestamp = pd.Timestamp(last_updated)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize('UTC')
+    return timestamp.timestamp()
+
+
+class HistoryStore:
+    """
+    An append-only SQLite history of parsed plots, one snapshot per (landId, lastUpdated).
+
+    Each snapshot stores the plot's buildings, its timers and, when its tier is known, its
+    storage, each row tagged with the landId and the unix time of lastUpdated. Snapshots that
+    are already stored, or whose save XML is the same as the plot's latest snapshot, are skipped
+    before they are parsed. Every append is one transaction, and the tables are indexed on
+    (land_id, time) and (type, time) for time-range queries per plot and per building or
+    activity type.
+
+    Args:
+        path (str, optional): The SQLite database file. Defaults to an in-memory database.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._latest = {}
+        if path is not None:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path or ':memory:', check_same_thread=False)
+        if path is not None:
+            # readers do not block the appending writer
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+        with self._db:
+            for statement in _schema:
+                self._db.execute(statement)
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM snapshots').fetchone()[0]
+
+    def _latest_snapshot(self, land_id):
+        """
+        Returns the time and digest of the plot's latest snapshot, or None. Must hold the lock.
+        """
+        if land_id not in self._latest:
+            row = self._db.execute('SELECT time, digest FROM snapshots WHERE land_id = ? '
+                                   'ORDER BY time DESC, id DESC LIMIT 1', (land_id,)).fetchone()
+            self._latest[land_id] = tuple(row) if row is not None else None
+        return self._latest[land_id]
+
+    def append(self, plots, tiers=None, cache=None):
+        """
+        Appends the snapshots of plots that are not stored yet, in one transaction.
+
+        Args:
+            plots (list): Plots from the 'data' list returned by get_game_state.
+            tiers (dict, optional): The tier of each landId, for storage. Defaults to None.
+            cache (PlotCache, optional): A cache to parse plots through. Defaults to None.
+
+        Returns:
+            int: The number of snapshots appended.
+        """
+        tiers = tiers or {}
+        with self._lock:
+            pending = []
+            keys = set()
+            for plot in plots:
+                land_id = str(plot.get('landId'))
+                last_updated = plot.get('lastUpdated') or ''
+                digest = hashlib.sha1(plot['data'].encode('utf-8')).hexdigest()
+                known = (land_id, last_updated) in keys or self._db.execute(
+                    'SELECT 1 FROM snapshots WHERE land_id = ? AND last_updated = ?',
+                    (land_id, last_updated)).fetchone() is not None
+                latest = self._latest_snapshot(land_id)
+                if known or (latest is not None and digest == latest[1]):
+                    self.skipped += 1
+                    continue
+                keys.add((land_id, last_updated))
+                when = _unix_time(last_updated) if last_updated else time.time()
+                # an older snapshot arriving late does not replace the latest one
+                if latest is None or when >= latest[0]:
+                    self._latest[land_id] = (when, digest)
+                pending.append((plot, land_id, last_updated, when, digest, tiers.get(plot.get('landId'))))
+
+            try:
+                with self._db:
+                    for plot, land_id, last_updated, when, digest, tier in pending:
+                        self._insert(plot, land_id, last_updated, when, digest, tier, cache)
+            except Exception:
+                # the transaction was rolled back, so the latest digests are read again
+                self._latest.clear()
+                raise
+        return len(pending)
+
+    def _insert(self, plot, land_id, last_updated, when, digest, tier, cache):
+        parsed = cache.get(plot) if cache is not None else ParsedPlot(plot)
+        snapshot = self._db.execute('INSERT INTO snapshots (land_id, last_updated, time, digest, tier) '
+                                    'VALUES (?, ?, ?, ?, ?)', (land_id, last_updated, when, digest, tier)).lastrowid
+
+        building_data = parsed.building_data
+        buildings = []
+        for uid, type_string, state, position, fractional in zip(
+                building_data['uid'].tolist(), building_data['buildingTypeString'].tolist(),
+                building_data['state'].tolist(), building_data['position'].tolist(),
+                pd.to_numeric(building_data['fractionalGeneratedResources'], errors='coerce').tolist()):
+            name, level = split_type_string(type_string)
+            buildings.append((snapshot, land_id, when, uid, name, level, state,
+                              int(position['@x']), int(position['@y']), fractional))
+        self._db.executemany('INSERT INTO buildings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', buildings)
+
+        self._db.executemany('INSERT INTO timers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', [
+            (snapshot, land_id, when, key, timer['uid'], timer['name'], timer['type'], timer['start'], timer['end'])
+            for key, timer in parsed.timers(when).items()])
+
+        if tier is not None:
+            self._db.executemany('INSERT INTO storage VALUES (?, ?, ?, ?, ?)', [
+                (snapshot, land_id, when, resource, amount) for resource, amount in parsed.storage(tier).items()])
+
+    def _query(self, table, columns, land_id=None, type_name=None, start=None, end=None):
+        conditions = []
+        params = []
+        for column, operator, value in (('land_id', '=', land_id), ('type', '=', type_name),
+                                        ('time', '>=', start), ('time', '<', end)):
+            if value is not None:
+                conditions.append(f'{column} {operator} ?')
+                params.append(str(value) if column == 'land_id' else value)
+        where = f' WHERE {" AND ".join(conditions)}' if conditions else ''
+        with self._lock:
+            return pd.read_sql_query(f'SELECT {columns} FROM {table}{where} ORDER BY time', self._db, params=params)
+
+    def snapshots(self, land_id=None, start=None, end=None):
+        """
+        Returns the stored snapshots, optionally of one plot and between two unix times.
+
+        Returns:
+            pandas.DataFrame: The land_id, last_updated, time, digest and tier of each snapshot.
+        """
+        return self._query('snapshots', 'land_id, last_updated, time, digest, tier', land_id, None, start, end)
+
+    def buildings(self, land_id=None, building_type=None, start=None, end=None):
+        """
+        Returns the buildings of the stored snapshots.
+
+        Args:
+            land_id (optional): Only this plot. Defaults to every plot.
+            building_type (str, optional): Only this type, as in buildingTypeString without the level,
+                                           e.g. 'HYDROGEN_PUMP'. Defaults to every type.
+            start (float, optional): Only snapshots at or after this unix time. Defaults to None.
+            end (float, optional): Only snapshots before this unix time. Defaults to None.
+
+        Returns:
+            pandas.DataFrame: One row per building per snapshot, with the snapshot's land_id and time.
+        """
+        return self._query('buildings', 'land_id, time, uid, type, level, state, x, y, fractional',
+                           land_id, building_type, start, end)
+
+    def timers(self, land_id=None, activity_type=None, start=None, end=None):
+        """
+        Returns the timers of the stored snapshots, filtered like buildings by their activity type.
+
+        Returns:
+            pandas.DataFrame: One row per timer per snapshot, with the start and end unix times of the activity.
+        """
+        return self._query('timers', 'land_id, time, key, uid, name, type, start, end',
+                           land_id, activity_type, start, end)
+
+    def storage(self, land_id=None, start=None, end=None):
+        """
+        Returns the storage of the stored snapshots that have a tier.
+
+        Returns:
+            pandas.DataFrame: One row per resource per snapshot.
+        """
+        return self._query('storage', 'land_id, time, resource, amount', land_id, None, start, end)
+
+    def close(self):
+        """
+        Closes the SQLite database.
+        """
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+if __name__ == '__main__':
+    from pyilz.synthetic import synthetic_game_state
+    store = HistoryStore()
+    state = synthetic_game_state(plots=3)
+    print('appended', store.append(state['data'], {plot['landId']: 2 for plot in state['data']}))
+    print('appended', store.append(state['data']))
+    print(store.buildings(building_type='HYDROGEN_PUMP').head())
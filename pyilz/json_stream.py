@@ -0,0 +1,96 @@
+import codecs
+import json
+import re
+
+_structural = re.compile(r'["{}\[\]]')
+
+
+def iter_array_items(chunks, key='data', encoding='utf-8'):
+    """
+    Yields the objects of the array under a top-level key of a JSON document as each one completes.
+
+    The document arrives in chunks, e.g. from requests.Response.iter_content. Only the structure
+    outside strings is scanned: inside a string the scanner jumps from quote to quote, so the
+    long save XML strings of a game state cost a few searches each. Every object is decoded with
+    json.loads as soon as its closing brace arrives, and only the object being read is buffered.
+
+    Args:
+        chunks (iterable): The document as bytes chunks.
+        key (str, optional): The top-level key of the array. Defaults to 'data'.
+        encoding (str, optional): The encoding of the document. Defaults to 'utf-8'.
+
+    Yields:
+        The decoded items of the array, in order.
+
+    Raises:
+        ValueError: If the document ends before the array does, or has no such array.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    buffer = ''
+    pos = 0
+    depth = 0
+    in_string = False
+    string_start = 0
+    last_string = None
+    # the depth inside the array once it is found, and where the current item starts
+    array_depth = None
+    item_start = None
+    found = False
+    for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        while True:
+            if in_string:
+                end = buffer.find('"', pos)
+                if end < 0:
+                    pos = len(buffer)
+                    break
+                # a quote after an odd number of backslashes is escaped
+                before = end - 1
+                while buffer[before] == '\\':
+                    before -= 1
+                pos = end + 1
+                if (end - 1 - before) % 2:
+                    continue
+                in_string = False
+                if depth == 1:
+                    last_string = buffer[string_start + 1:end]
+                continue
+
+            match = _structural.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            char = match.group()
+            pos = match.end()
+            if char == '"':
+                in_string = True
+                string_start = match.start()
+            elif char in '{[':
+                depth += 1
+                if array_depth is None and not found and char == '[' and depth == 2 and last_string == key:
+                    array_depth = depth
+                    found = True
+                elif array_depth is not None and depth == array_depth + 1:
+                    item_start = match.start()
+            else:
+                depth -= 1
+                if array_depth is None:
+                    continue
+                if depth == array_depth and item_start is not None:
+                    yield json.loads(buffer[item_start:pos])
+                    item_start = None
+                    buffer = buffer[pos:]
+                    pos = 0
+                elif depth < array_depth:
+                    return
+
+        # keep only the item being read, or the open string outside one
+        keep = item_start if item_start is not None else (string_start if in_string else pos)
+        buffer = buffer[keep:]
+        pos -= keep
+        string_start -= keep
+        if item_start is not None:
+            item_start = 0
+    if not found:
+        raise ValueError(f'The document has no {key!r} array')
+    raise ValueError(f'The document ended inside the {key!r} array')
@@ -0,0 +1,185 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pyilz.get_plots import get_plot_metadata
+
+
+class MetadataStore:
+    """
+    A store of plot metadata with an in-memory LRU tier and an optional SQLite tier.
+
+    Tier and region never change for a plot, so metadata is only fetched again once an
+    entry is older than the TTL. With a path the entries survive restarts, so a warm
+    store answers get() without touching the network. Responses without a tier, such as
+    error bodies, are never stored.
+
+    Args:
+        path (str, optional): The SQLite database file for the on-disk tier. Defaults to None.
+        ttl (float, optional): The age in seconds after which an entry is fetched again. Defaults to 7 days.
+        maxsize (int, optional): The number of entries kept in memory. Defaults to 1024.
+        client (GameDataClient, optional): The client to fetch metadata with. Defaults to the shared client.
+    """
+
+    def __init__(self, path=None, ttl=7 * 24 * 60 * 60, maxsize=1024, client=None):
+        self.path = path
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.client = client
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS metadata '
+                             '(land_id TEXT PRIMARY KEY, fetched REAL NOT NULL, data TEXT NOT NULL)')
+            self._db.commit()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _valid(metadata):
+        return isinstance(metadata, dict) and metadata.get('tier') is not None
+
+    def _fresh(self, fetched, now):
+        return self.ttl is None or now - fetched < self.ttl
+
+    def _remember(self, land_id, fetched, metadata):
+        self._entries[land_id] = (fetched, metadata)
+        self._entries.move_to_end(land_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _cached(self, land_id, now):
+        """
+        Returns the fresh cached metadata of a plot, or None. Must hold the lock.
+        """
+        entry = self._entries.get(land_id)
+        if entry is not None and self._fresh(entry[0], now):
+            self._entries.move_to_end(land_id)
+            return entry[1]
+        if self._db is None:
+            return None
+        row = self._db.execute('SELECT fetched, data FROM metadata WHERE land_id = ?',
+                               (str(land_id),)).fetchone()
+        if row is None or not self._fresh(row[0], now):
+            return None
+        metadata = json.loads(row[1])
+        self._remember(land_id, row[0], metadata)
+        return metadata
+
+    def _store(self, items, now):
+        with self._lock:
+            for land_id, metadata in items:
+                self._remember(land_id, now, metadata)
+            if self._db is not None:
+                with self._db:
+                    self._db.executemany('INSERT OR REPLACE INTO metadata VALUES (?, ?, ?)',
+                                         [(str(land_id), now, json.dumps(metadata)) for land_id, metadata in items])
+
+    def get(self, land_id):
+        """
+        Returns the metadata of a plot, fetching it only if no fresh entry is stored.
+
+        Args:
+            land_id (int): The ID of the plot.
+
+        Returns:
+            dict: The metadata returned by get_plot_metadata.
+
+        Raises:
+            ValueError: If the response has no tier, e.g. an error body.
+        """
+        now = time.time()
+        with self._lock:
+            metadata = self._cached(land_id, now)
+            if metadata is not None:
+                self.hits += 1
+                return metadata
+            self.misses += 1
+        metadata = get_plot_metadata(land_id, self.client)
+        if not self._valid(metadata):
+            raise ValueError(f'No metadata for plot {land_id}: {metadata!r}')
+        self._store([(land_id, metadata)], now)
+        return metadata
+
+    def tier(self, land_id):
+        """
+        Returns the tier of a plot.
+        """
+        return self.get(land_id)['tier']
+
+    def region(self, land_id):
+        """
+        Returns the region of a plot.
+        """
+        return self.get(land_id)['region']
+
+    def prefetch(self, land_ids, workers=10):
+        """
+        Fetches the metadata of every plot without a fresh entry, concurrently and in one batch.
+
+        Args:
+            land_ids (iterable): The IDs of the plots.
+            workers (int, optional): The number of requests in flight. Defaults to 10.
+
+        Returns:
+            int: The number of plots that were fetched and stored. Plots whose response has no tier are skipped.
+
+        Raises:
+            Exception: The first error of a failed request, once every successful fetch has been stored.
+        """
+        now = time.time()
+        with self._lock:
+            missing = list(dict.fromkeys(land_id for land_id in land_ids if self._cached(land_id, now) is None))
+        if not missing:
+            return 0
+        items = []
+        error = None
+        with ThreadPoolExecutor(min(workers, len(missing))) as executor:
+            futures = [(land_id, executor.submit(get_plot_metadata, land_id, self.client)) for land_id in missing]
+            for land_id, future in futures:
+                try:
+                    metadata = future.result()
+                except Exception as e:
+                    error = error or e
+                    continue
+                if self._valid(metadata):
+                    items.append((land_id, metadata))
+        self._store(items, now)
+        if error is not None:
+            raise error
+        return len(items)
+
+    def clear(self):
+        """
+        Empties both tiers.
+        """
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                with self._db:
+                    self._db.execute('DELETE FROM metadata')
+
+    def close(self):
+        """
+        Closes the SQLite database.
+        """
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+if __name__ == '__main__':
+    store = MetadataStore('metadata.sqlite')
+    store.prefetch([53721])
+    print(store.get(53721))
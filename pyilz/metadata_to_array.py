@@ -1,11 +1,11 @@
-from pyilz.get_game_state import get_game_state
-from pyilz.parse_land import parse_land
-from pyilz.get_plots import get_plot_metadata
-import json
-import importlib.resources
+from pyilz.reference_data import get_reference_data
 
-with importlib.resources.open_text("pyilz", "reference_data.json") as file:
-    reference_data = json.load(file)
+
+def __getattr__(name):
+    # reference_data.json is only read when something first needs it
+    if name == 'reference_data':
+        return get_reference_data()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def nft_to_iz(x, y):
@@ -59,7 +59,7 @@ def get_building_reference_data(building_name):
     Returns:
         tuple: A tuple containing the width (int), height (int), and image (str or None) of the building.
     """
-    buildings = reference_data['buildings']
+    buildings = get_reference_data()['buildings']
     if building_name in buildings:
         building = buildings[building_name]
         img = None
@@ -81,6 +81,8 @@ def metadata_to_array(gamestate):
     Returns:
         str: A string representation of the array of building data.
     """
+    # parse_land needs pandas, which the rest of this module does not
+    from pyilz.parse_land import parse_land
     state = parse_land(gamestate)
     output = ""
     for k, v in state.iterrows():
@@ -111,7 +113,21 @@ def import_string_to_array(string):
     return [{'buildingTypeString': s[i], 'X': int(s[i+1]), 'Y': int(s[i+2])} for i in range(0, len(s), 3)]
 
 
+def array_to_import_string(array):
+    """
+    Converts a list of building dictionaries back into the string format read by import_string_to_array.
+
+    Args:
+    array (list): A list of dictionaries with the keys 'buildingTypeString', 'X', and 'Y'.
+
+    Returns:
+    str: A string representation of the array of building types and their coordinates.
+    """
+    return '[' + ','.join(f'["{building["buildingTypeString"]}",{building["X"]},{building["Y"]}]' for building in array) + ']'
+
+
 if __name__ == '__main__':
     import dotenv
+    from pyilz.get_game_state import get_game_state
     dotenv.load_dotenv()
     print(metadata_to_array(get_game_state()['data'][1]['data']))
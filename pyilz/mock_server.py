@@ -0,0 +1,286 @@
+import base64
+import gzip
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+from pyilz.synthetic import synthetic_game_state
+
+GAMEDATA_PATH = '/gamedata/api/zero'
+REGIONS = ['Taiga', 'Abyssal Basin', 'Brightland Steppes', 'Crimson Waste', 'Halcyon Sea', 'Shardbluff Labyrinth']
+
+
+def _jwt(claims):
+    def encode(part):
+        return base64.urlsafe_b64encode(json.dumps(part).encode('utf-8')).rstrip(b'=').decode('ascii')
+    return f'{encode({"alg": "none", "typ": "JWT"})}.{encode(claims)}.'
+
+
+class MockServer:
+    """
+    A local stand-in for the gamedata API and the Cognito token endpoint.
+
+    It serves game states, plot lists and plot metadata on the gamedata paths, and issues
+    unsigned JWTs from refresh tokens on the Cognito path, so GameDataClient, TokenManager and
+    everything built on them can run offline against it. Faults are injected per request:
+    latency before the response, 5xx errors either at a seeded error_rate or for the next
+    requests queued with fail_next, 401s for tokens that have expired or were revoked with
+    expire_tokens, and bodies sent in chunks spread over slow_body seconds. Bodies are gzipped
+    for clients that accept it, unless compress is False.
+
+    Args:
+        game_states (dict, optional): The game state served per refresh token, as returned by get_game_state.
+                                      None maps to the state served to tokens of unknown refresh tokens.
+                                      Defaults to a synthetic game state for any refresh token.
+        metadata (dict, optional): The metadata served per landId. Plots without an entry get a
+                                   deterministic tier and region. Defaults to None.
+        latency (float or tuple, optional): Seconds to wait before responding, or a (min, max) range. Defaults to 0.
+        error_rate (float, optional): The probability of answering a request with a 503. Defaults to 0.
+        token_lifetime (float, optional): The lifetime in seconds of issued ID tokens. Defaults to 3600.
+        slow_body (float, optional): Seconds over which each response body is sent. Defaults to 0.
+        seed (int, optional): The seed of the latency and error random numbers. Defaults to 0.
+        host (str, optional): The interface to listen on. Defaults to '127.0.0.1'.
+        port (int, optional): The port to listen on, 0 picks a free one. Defaults to 0.
+        compress (bool, optional): Whether to gzip bodies for clients that send Accept-Encoding: gzip. Defaults to True.
+    """
+
+    def __init__(self, game_states=None, metadata=None, latency=0, error_rate=0, token_lifetime=3600,
+                 slow_body=0, seed=0, host='127.0.0.1', port=0, compress=True):
+        self.game_states = {None: synthetic_game_state()} if game_states is None else game_states
+        self.metadata = {} if metadata is None else metadata
+        self.latency = latency
+        self.error_rate = error_rate
+        self.token_lifetime = token_lifetime
+        self.slow_body = slow_body
+        self.compress = compress
+        # requests received per path, including those answered with an injected failure
+        self.requests = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._failures = []
+        self._tokens = {}
+        self._issued = 0
+        self._server = ThreadingHTTPServer((host, port), _handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def gamedata_url(self):
+        """
+        The base_url to give GameDataClient, or to set as PYILZ_GAMEDATA_URL.
+        """
+        return self.url + GAMEDATA_PATH
+
+    @property
+    def cognito_url(self):
+        """
+        The url to give refresh_token, or to set as PYILZ_COGNITO_URL.
+        """
+        return self.url + '/'
+
+    def start(self):
+        """
+        Serves requests on a background thread.
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops serving and closes the socket.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def fail_next(self, count=1, status=503):
+        """
+        Answers the next count requests with the given status code.
+        """
+        with self._lock:
+            self._failures.extend([status] * count)
+
+    def issue_token(self, ref_token=None, lifetime=None):
+        """
+        Returns a new ID token for a refresh token, valid for lifetime seconds.
+        """
+        lifetime = self.token_lifetime if lifetime is None else lifetime
+        with self._lock:
+            self._issued += 1
+            token = _jwt({'sub': str(ref_token), 'exp': time.time() + lifetime, 'jti': self._issued})
+            self._tokens[token] = ref_token
+        return token
+
+    def expire_tokens(self):
+        """
+        Revokes every issued ID token, so the next request with one gets a 401.
+        """
+        with self._lock:
+            self._tokens.clear()
+
+    def _account(self, authorization):
+        """
+        Returns (valid, refresh token) for an Authorization header.
+        """
+        token = authorization[len('Bearer '):] if authorization.startswith('Bearer ') else None
+        with self._lock:
+            if token not in self._tokens:
+                return False, None
+            ref_token = self._tokens[token]
+        try:
+            payload = token.split('.')[1]
+            expiry = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))['exp']
+        except (IndexError, ValueError, KeyError):
+            return False, None
+        return expiry > time.time(), ref_token
+
+    def _game_state(self, ref_token):
+        return self.game_states.get(ref_token, self.game_states.get(None))
+
+    def _plot_metadata(self, land_id):
+        if land_id in self.metadata:
+            return self.metadata[land_id]
+        seed = zlib.crc32(land_id.encode('utf-8'))
+        return {'landId': land_id, 'tier': seed % 5 + 1, 'region': REGIONS[seed % len(REGIONS)]}
+
+    def _fault(self):
+        """
+        Draws the latency and injected status code of one request.
+        """
+        with self._lock:
+            if isinstance(self.latency, tuple):
+                delay = self._random.uniform(*self.latency)
+            else:
+                delay = self.latency
+            if self._failures:
+                return delay, self._failures.pop(0)
+            if self.error_rate and self._random.random() < self.error_rate:
+                return delay, 503
+        return delay, None
+
+    def handle(self, method, path, headers, body):
+        """
+        Returns (status, JSON body) for one request. Called on the server's handler threads.
+        """
+        path = urlsplit(path).path
+        if method == 'POST' and path == '/':
+            if 'InitiateAuth' not in headers.get('x-amz-target', ''):
+                return 400, {'message': 'Unknown target'}
+            ref_token = json.loads(body or b'{}').get('AuthParameters', {}).get('REFRESH_TOKEN')
+            if ref_token not in self.game_states and None not in self.game_states:
+                return 400, {'__type': 'NotAuthorizedException', 'message': 'Invalid Refresh Token'}
+            return 200, {'AuthenticationResult': {'IdToken': self.issue_token(ref_token), 'AccessToken': 'access',
+                                                  'ExpiresIn': self.token_lifetime, 'TokenType': 'Bearer'}}
+
+        if method != 'GET' or not path.startswith(GAMEDATA_PATH):
+            return 404, {'message': 'Not Found'}
+        parts = path[len(GAMEDATA_PATH):].strip('/').split('/')
+        if len(parts) == 3 and parts[0] == 'plots' and parts[2] == 'metadata':
+            return 200, self._plot_metadata(parts[1])
+
+        valid, ref_token = self._account(headers.get('authorization', ''))
+        if not valid:
+            return 401, {'message': 'Unauthorized'}
+        state = self._game_state(ref_token)
+        if parts == ['gamestate']:
+            return 200, state
+        if parts == ['plots']:
+            return 200, [{'landId': plot['landId'], 'lastUpdated': plot.get('lastUpdated')} for plot in state['data']]
+        return 404, {'message': 'Not Found'}
+
+
+def _handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _respond(self, method):
+            path = urlsplit(self.path).path
+            with server._lock:
+                server.requests[path] = server.requests.get(path, 0) + 1
+                server.in_flight += 1
+                server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                delay, status = server._fault()
+                if delay:
+                    time.sleep(delay)
+                if status is None:
+                    status, payload = server.handle(method, self.path, {k.lower(): v for k, v in self.headers.items()}, body)
+                else:
+                    payload = {'message': 'Injected failure'}
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                if server.compress and 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    data = gzip.compress(data)
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self._write(data)
+            finally:
+                with server._lock:
+                    server.in_flight -= 1
+
+        def _write(self, data):
+            if not server.slow_body:
+                self.wfile.write(data)
+                return
+            chunks = 10
+            size = -(-len(data) // chunks)
+            for i in range(0, len(data), size):
+                self.wfile.write(data[i:i + size])
+                self.wfile.flush()
+                time.sleep(server.slow_body / chunks)
+
+        def do_GET(self):
+            self._respond('GET')
+
+        def do_POST(self):
+            self._respond('POST')
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Serves a local stand-in for the gamedata API and Cognito.')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--state', help='a game state JSON file to serve, defaults to a synthetic one')
+    parser.add_argument('--latency', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--token-lifetime', type=float, default=3600)
+    parser.add_argument('--slow-body', type=float, default=0)
+    args = parser.parse_args()
+    game_states = None
+    if args.state:
+        with open(args.state, 'r') as f:
+            game_states = {None: json.load(f)}
+    server = MockServer(game_states, latency=args.latency, error_rate=args.error_rate,
+                        token_lifetime=args.token_lifetime, slow_body=args.slow_body, port=args.port)
+    print(f'PYILZ_GAMEDATA_URL={server.gamedata_url}')
+    print(f'PYILZ_COGNITO_URL={server.cognito_url}')
+    server.start()
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
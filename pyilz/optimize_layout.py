@@ -0,0 +1,145 @@
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from pyilz.calculate_efficiency import EfficiencyModel
+from pyilz.get_buildings import get_catalog
+from pyilz.metadata_to_array import import_string_to_array, array_to_import_string
+
+# buildings whose efficiency is maximized by default
+CONVERTERS = ['CONDENSER_PLANT', 'SEQUESTRIAN_PLANT', 'PHOTODISINTEGRATION_PLANT',
+              'L-CRYPTON_COLLIDER', 'HYPERION_LATHE', 'ANTI-SOLON_INVERTER']
+
+# inclusive tile bounds of a plot as (min x, min y, max x, max y)
+PLOT_BOUNDS = (0, 0, 49, 49)
+
+
+def score_layout(import_string, targets=CONVERTERS):
+    """
+    Returns the total efficiency of the target buildings in a layout.
+
+    Args:
+        import_string (list): A list of dictionaries containing information about each building.
+        targets (list, optional): The building names whose efficiency counts. Defaults to CONVERTERS.
+
+    Returns:
+        float: The sum of the efficiencies of the target buildings.
+    """
+    model = EfficiencyModel(import_string)
+    return _score(model, _target_keys(model, targets))
+
+
+def _target_keys(model, targets):
+    catalog = get_catalog()
+    target_ids = {catalog.type_id(name) for name in targets}
+    return [key for key in model
+            if catalog.parse_type_string(model.building(key)['buildingTypeString'])[0] in target_ids]
+
+
+def _score(model, keys):
+    # buildings nothing can influence have no efficiency
+    return sum(model.efficiency(key) or 0 for key in keys)
+
+
+def _fits(model, key, x, y, bounds):
+    _, _, w, h = model.rect(key)
+    if x < bounds[0] or y < bounds[1] or x + w - 1 > bounds[2] or y + h - 1 > bounds[3]:
+        return False
+    return model.occupied(x, y, w, h) <= {key}
+
+
+def _anneal(import_string, fixed, bounds, targets, iterations, temperature, seed):
+    """
+    Runs one simulated annealing restart and returns its best (score, layout) pair.
+    """
+    rnd = random.Random(seed)
+    catalog = get_catalog()
+    model = EfficiencyModel(import_string)
+    keys = list(model)
+    movable = [key for i, key in enumerate(keys) if i not in fixed and catalog.is_known(
+        catalog.parse_type_string(model.building(key)['buildingTypeString'])[0])]
+    target_keys = _target_keys(model, targets)
+    score = best_score = _score(model, target_keys)
+    best = [model.building(key) for key in keys]
+    if not movable or not target_keys:
+        return best_score, best
+
+    # cool geometrically from temperature to 1% of it over the run
+    cooling = 0.01 ** (1 / iterations)
+    t = temperature
+    for _ in range(iterations):
+        t *= cooling
+        key = rnd.choice(movable)
+        x0, y0, _, _ = model.rect(key)
+        if rnd.random() < 0.2:
+            x, y = rnd.randint(bounds[0], bounds[2]), rnd.randint(bounds[1], bounds[3])
+        else:
+            x, y = x0 + rnd.randint(-3, 3), y0 + rnd.randint(-3, 3)
+        if (x, y) == (x0, y0) or not _fits(model, key, x, y, bounds):
+            continue
+        model.move(key, x, y)
+        new_score = _score(model, target_keys)
+        delta = new_score - score
+        if delta >= 0 or rnd.random() < math.exp(delta / t):
+            score = new_score
+            if score > best_score:
+                best_score = score
+                best = [model.building(key) for key in keys]
+        else:
+            model.move(key, x0, y0)
+    return best_score, best
+
+
+def optimize_layout(import_string, fixed=(), bounds=PLOT_BOUNDS, targets=CONVERTERS, iterations=20000,
+                    restarts=None, processes=None, temperature=5.0, top=1, seed=None):
+    """
+    Searches for building placements that maximize the total efficiency of the target buildings.
+
+    Each restart runs simulated annealing from the given layout, moving one building at a time to a
+    free spot inside the plot bounds. Buildings that are not in buildings.json (lakes, outcrops and
+    other natural features) never move. Restarts run in a process pool, so on Windows this must be
+    called from under an `if __name__ == '__main__':` guard.
+
+    Args:
+        import_string (str or list): The starting layout, as a string or the output of import_string_to_array.
+        fixed (iterable, optional): Indices of buildings in the layout that must not move. Defaults to ().
+        bounds (tuple, optional): Inclusive (min x, min y, max x, max y) tile bounds. Defaults to PLOT_BOUNDS.
+        targets (list, optional): The building names whose efficiency is maximized. Defaults to CONVERTERS.
+        iterations (int, optional): The number of moves tried per restart. Defaults to 20000.
+        restarts (int, optional): The number of independent restarts. Defaults to the number of CPUs.
+        processes (int, optional): The number of worker processes, 1 runs in this process. Defaults to the number of CPUs.
+        temperature (float, optional): The starting annealing temperature in efficiency points. Defaults to 5.0.
+        top (int, optional): The number of layouts to return. Defaults to 1.
+        seed (int, optional): The random seed of the first restart. Defaults to None.
+
+    Returns:
+        list: Up to top layout strings in import_string_to_array format, best first.
+    """
+    if isinstance(import_string, str):
+        import_string = import_string_to_array(import_string)
+    restarts = (os.cpu_count() or 1) if restarts is None else restarts
+    base_seed = random.randrange(2 ** 32) if seed is None else seed
+    jobs = [(import_string, set(fixed), bounds, targets, iterations, temperature, base_seed + i)
+            for i in range(restarts)]
+    if processes == 1:
+        results = [_anneal(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(processes) as executor:
+            results = list(executor.map(_anneal, *zip(*jobs)))
+
+    layouts = []
+    for _, layout in sorted(results, key=lambda result: result[0], reverse=True):
+        layout = array_to_import_string(layout)
+        if layout not in layouts:
+            layouts.append(layout)
+    return layouts[:top]
+
+
+if __name__ == '__main__':
+    import time
+    layout = '[["POWER_STATION_1",10,16],["HYDROGEN_PUMP_5",31,31],["MINE_5",35,27],["SEDIMENT_EXCAVATOR_4",35,31],["PHOTODISINTEGRATION_PLANT_4",35,23],["POWER_STATION_1",2,22],["SEQUESTRIAN_PLANT_5",9,28],["CONDENSER_PLANT_4",27,39],["POWER_STATION_1",32,28],["SEQUESTRIAN_PLANT_4",34,34],["L-CRYPTON_COLLIDER_3",9,19],["CONDENSER_PLANT_5",5,21],["PHOTODISINTEGRATION_PLANT_5",13,25],["ANTI-SOLON_INVERTER_2",38,31],["HYPERION_RESERVOIR_1",9,25],["HYPERION_LATHE_1",6,25]]'
+    print('Starting score:', score_layout(import_string_to_array(layout)))
+    start = time.perf_counter()
+    best = optimize_layout(layout, iterations=5000, seed=0)[0]
+    print(f'Best score: {score_layout(import_string_to_array(best))} in {time.perf_counter() - start:.2f}s')
+    print(best)
@@ -1,122 +1,226 @@
+import numpy as np
 import pandas as pd
 import xmltodict
+from xml.parsers import expat
 from pyilz.get_blueprints import _clean_biodata, _clean_blueprint_collection
 
 
+class SaveGame:
+    """
+    A save game XML document that is scanned once and decoded one top-level section at a time.
+
+    The constructor only records where each child of the root element (Buildings, ResearchData,
+    ScanningData, Resources, ...) starts and ends. A section is decoded with xmltodict the first
+    time it is accessed and cached, so its value is the same as in xmltodict.parse of the whole
+    document.
+
+    Args:
+        data (str or bytes): The XML data to parse.
+    """
+
+    def __init__(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self._data = data
+        self._spans = {}
+        self._sections = {}
+        self.root = None
+        self.attributes = {}
+
+        depth = 0
+        start = 0
+        parser = expat.ParserCreate('utf-8')
+
+        def start_element(name, attributes):
+            nonlocal depth, start
+            if depth == 0:
+                self.root = name
+                self.attributes = attributes
+            elif depth == 1:
+                start = parser.CurrentByteIndex
+            depth += 1
+
+        def end_element(name):
+            nonlocal depth
+            depth -= 1
+            if depth == 1:
+                # expat reports the end of <name /> just after the tag, and of </name> at the tag
+                end = parser.CurrentByteIndex
+                if data.startswith(b'</' + name.encode('utf-8'), end):
+                    end = data.index(b'>', end) + 1
+                self._spans.setdefault(name, []).append((start, end))
+
+        parser.StartElementHandler = start_element
+        parser.EndElementHandler = end_element
+        parser.Parse(data, True)
+
+    @property
+    def sections(self):
+        """
+        Returns the names of the top-level sections in document order.
+        """
+        return list(self._spans)
+
+    def __contains__(self, name):
+        return name in self._spans
+
+    def __getitem__(self, name):
+        if name not in self._sections:
+            values = [xmltodict.parse(self._data[start:end])[name]
+                      for start, end in self._spans[name]]
+            self._sections[name] = values[0] if len(values) == 1 else values
+        return self._sections[name]
+
+    def get(self, name, default=None):
+        """
+        Returns the decoded section with the given name, or default if the document does not have it.
+        """
+        return self[name] if name in self._spans else default
+
+    def to_dict(self):
+        """
+        Decodes every section and returns the same dictionary as xmltodict.parse of the whole document.
+        """
+        root = {'@' + key: value for key, value in self.attributes.items()}
+        for name in self._spans:
+            root[name] = self[name]
+        return {self.root: root or None}
+
+
+def _save_game(data):
+    return data if isinstance(data, SaveGame) else SaveGame(data)
+
+
 def parse_land(data):
     """
     Parses the given XML data and returns a pandas dataframe of the land.
 
     Args:
-        data (str): The XML data to parse.
+        data (str or SaveGame): The XML data to parse.
 
     Returns:
         pandas.DataFrame: A dataframe containing the land data.
     """
-    data = xmltodict.parse(data)
-    building_data = data['SaveGameData']['Buildings']['BuildingData']
+    building_data = _save_game(data)['Buildings']['BuildingData']
     building_data = pd.DataFrame(building_data)
     return building_data
 
 
-def get_buildings_and_activities(df):
+def _map_unique(values, func):
+    """
+    Applies a vectorized Series -> Series function once per unique value instead of once per row.
+
+    Args:
+        values (pandas.Series): The values to map.
+        func (callable): A function that takes and returns a pandas.Series of the same length.
+
+    Returns:
+        pandas.Series: The mapped values, aligned with values.
+    """
+    codes, uniques = pd.factorize(values)
+    if len(uniques) == 0:
+        return func(values)
+    mapped = func(pd.Series(uniques)).take(codes)
+    mapped.index = values.index
+    return mapped.where(codes >= 0)
+
+
+def _unpack_activity(buildings, column):
+    """
+    Returns the buildings that have the given activity, with the activity unpacked into prefixed columns.
+
+    Args:
+        buildings (pandas.DataFrame): The buildings dataframe.
+        column (str): The activity column, e.g. 'currentActivity'.
+
+    Returns:
+        pandas.DataFrame: The buildings with the activity, or None if no building has the column.
+    """
+    if column not in buildings.columns:
+        return None
+    # get rows where the activity is not null
+    rows = buildings[buildings[column].notnull()]
+    # unpack json column into one column per key
+    activity_cols = pd.json_normalize(
+        rows[column].tolist()).set_index(rows.index)
+    rows = rows.drop(columns=[column]).join(
+        activity_cols.add_prefix(column + '.'), how='outer')
+    # convert StartTime and EndTime to datetime
+    rows[column + '.StartTime'] = pd.to_datetime(rows[column + '.StartTime'])
+    rows[column + '.EndTime'] = pd.to_datetime(rows[column + '.EndTime'])
+    return rows
+
+
+def _compact(df, categories=(), small_ints=()):
+    """
+    Converts the given columns to category and int8 dtypes, where present.
+    """
+    for column in categories:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    for column in small_ints:
+        if column in df.columns:
+            df[column] = df[column].astype('int8')
+
+
+def get_buildings_and_activities(df, typed=False):
     """
     Returns a tuple of paths, buildings, current activities, auto activities, and completed activities.
     These are all pandas dataframes.
 
+    The input dataframe is not modified. Names and levels are extracted once per unique
+    buildingTypeString rather than once per row.
+
     Args:
         df (pandas.DataFrame): The input dataframe containing information about buildings and activities.
+        typed (bool, optional): Whether to return compact columns: int16 coordinates, int8 levels and
+                                categorical names and types. Defaults to False.
 
     Returns:
         tuple: A tuple of pandas dataframes containing information about paths, buildings, current activities, auto activities, and completed activities.
     """
 
-    # convert position column from {'@x': '38', '@y': '17'} to '38,17'
-    df['position'] = df['position'].apply(lambda x: x['@x'] + ',' + x['@y'])
-    # split position column into x and y columns
-    df[['x', 'y']] = df['position'].str.split(',', expand=True)
-    # set x and y to int
-    df['x'] = df['x'].astype(int)
-    df['y'] = df['y'].astype(int)
+    # split position column from {'@x': '38', '@y': '17'} into int x and y columns
+    positions = df['position'].tolist()
+    coordinate_dtype = 'int16' if typed else int
     df = df.drop(columns=['position'])
+    df['x'] = np.array([int(position['@x'])
+                       for position in positions], dtype=coordinate_dtype)
+    df['y'] = np.array([int(position['@y'])
+                       for position in positions], dtype=coordinate_dtype)
 
-    paths = df[df['buildingTypeString'] == 'PATH']
+    is_path = (df['buildingTypeString'] == 'PATH').to_numpy()
+    paths = df[is_path]
     # drop all columns except for position
     paths = paths[['x', 'y']]
 
     # Drop all rows where buildingTypeString is PATH
-    buildings = df[df['buildingTypeString'] != 'PATH']
-
-    if 'currentActivity' in buildings.columns:
-        # get rows where currentActivity is not null
-        ca = buildings[buildings['currentActivity'].notnull()]
-
-        # unpack json column currentActivity
-        current_activity_cols = pd.json_normalize(
-            ca['currentActivity']).set_index(ca.index)
-        ca = ca.join(current_activity_cols.add_prefix(
-            'currentActivity.'), how='outer')
-        ca = ca.drop(columns=['currentActivity'])
-        # convert currentActivity.StartTime and currentActivity.EndTime to datetime
-        ca['currentActivity.StartTime'] = pd.to_datetime(
-            ca['currentActivity.StartTime'])
-        ca['currentActivity.EndTime'] = pd.to_datetime(
-            ca['currentActivity.EndTime'])
-        # remove _{number} from currentActivity.Type and put into column currentActivity.Level
-        ca['currentActivity.Level'] = ca['currentActivity.Type'].str.extract(
-            r'_(\d+)', expand=False).fillna(0).astype(int)
-        ca['currentActivity.Type'] = ca['currentActivity.Type'].str.replace(
-            r'_(\d+)', '', regex=True)
+    buildings = df[~is_path]
 
-    else:
-        ca = None
-
-    if 'autoActivity' in buildings.columns:
-        # get rows where autoActivity is not null
-        aa = buildings[buildings['autoActivity'].notnull()]
-
-        # unpack json column autoActivity
-        auto_activity_cols = pd.json_normalize(
-            aa['autoActivity']).set_index(aa.index)
-        aa = aa.join(auto_activity_cols.add_prefix(
-            'autoActivity.'), how='outer')
-        aa = aa.drop(columns=['autoActivity'])
-        # convert autoActivity.StartTime and autoActivity.EndTime to datetime
-        aa['autoActivity.StartTime'] = pd.to_datetime(
-            aa['autoActivity.StartTime'])
-        aa['autoActivity.EndTime'] = pd.to_datetime(aa['autoActivity.EndTime'])
-        # remove _{number} from autoActivity.Type and put into column autoActivity.Level
-        aa['autoActivity.Level'] = buildings['buildingTypeString'].str.extract(
-            r'(\d+)$', expand=False).fillna(0).astype(int)
-        aa['autoActivity.Type'] = buildings['buildingTypeString'].str.extract(
-            r'(.+?)\d+$', expand=False).str.rstrip('_') + '_AUTOMATIC'
-        # aa['autoActivity.GeneratedResources'] = buildings['fractionalGeneratedResources']
-    else:
-        aa = None
-
-    if 'completedActivity' in buildings.columns:
-        # get rows where completedActivity is not null
-        completed = buildings[buildings['completedActivity'].notnull()]
-
-        # unpack json column completedActivity
-        auto_activity_cols = pd.json_normalize(
-            completed['completedActivity']).set_index(completed.index)
-        completed = completed.join(auto_activity_cols.add_prefix(
-            'completedActivity.'), how='outer')
-        completed = completed.drop(columns=['completedActivity'])
-        # convert completedActivity.StartTime and completedActivity.EndTime to datetime
-        completed['completedActivity.StartTime'] = pd.to_datetime(
-            completed['completedActivity.StartTime'])
-        completed['completedActivity.EndTime'] = pd.to_datetime(
-            completed['completedActivity.EndTime'])
-        # remove _{number} from completedActivity.Type and put into column completedActivity.Level
-        completed['completedActivity.Level'] = buildings['buildingTypeString'].str.extract(
-            r'(\d+)$', expand=False).fillna(0).astype(int)
-        completed['completedActivity.Type'] = buildings['buildingTypeString'].str.extract(
-            r'(.+?)\d+$', expand=False).str.rstrip('_') + '_AUTOMATIC'
-        # completed['completedActivity.GeneratedResources'] = buildings['fractionalGeneratedResources']
-    else:
-        completed = None
+    # the last number of the buildingTypeString, and everything before it
+    type_level = _map_unique(buildings['buildingTypeString'], lambda types: types.str.extract(
+        r'(\d+)$', expand=False))
+    type_name = _map_unique(buildings['buildingTypeString'], lambda types: types.str.extract(
+        r'(.+?)\d+$', expand=False).str.rstrip('_'))
+
+    ca = _unpack_activity(buildings, 'currentActivity')
+    if ca is not None:
+        # remove _{number} from currentActivity.Type and put into column currentActivity.Level
+        ca['currentActivity.Level'] = _map_unique(ca['currentActivity.Type'], lambda types: types.str.extract(
+            r'_(\d+)', expand=False)).fillna(0).astype(int)
+        ca['currentActivity.Type'] = _map_unique(ca['currentActivity.Type'], lambda types: types.str.replace(
+            r'_(\d+)', '', regex=True))
+
+    aa = _unpack_activity(buildings, 'autoActivity')
+    if aa is not None:
+        aa['autoActivity.Level'] = type_level.fillna(0).astype(int)
+        aa['autoActivity.Type'] = type_name + '_AUTOMATIC'
+
+    completed = _unpack_activity(buildings, 'completedActivity')
+    if completed is not None:
+        completed['completedActivity.Level'] = type_level.fillna(
+            0).astype(int)
+        completed['completedActivity.Type'] = type_name + '_AUTOMATIC'
 
     # drop columns uid, state, startTime
     buildings = buildings.drop(columns=[
@@ -128,26 +232,25 @@ def get_buildings_and_activities(df):
         buildings['generatedResources'] = buildings['generatedResources'].astype(
             int)
 
-    # create column that is the last number of the buildingTypeString
-    buildings['level'] = buildings['buildingTypeString'].str.extract(r'(\d+)$',
-                                                                     expand=False)
-
-    buildings['name'] = buildings['buildingTypeString'].str.extract(
-        r'(.+?)\d+$', expand=False).str.rstrip('_')
-
+    buildings['level'] = type_level
     # if name is nan set name to buildingTypeString
-    buildings['name'] = buildings['name'].fillna(
-        buildings['buildingTypeString'])
+    buildings['name'] = type_name.fillna(buildings['buildingTypeString'])
     buildings['level'] = buildings['level'].fillna(0)
 
     buildings = buildings.drop(columns=['buildingTypeString'])
 
+    if typed:
+        buildings['level'] = buildings['level'].astype(int)
+        _compact(buildings, ['name'], ['level'])
+        for frame, column in ((ca, 'currentActivity'), (aa, 'autoActivity'), (completed, 'completedActivity')):
+            if frame is not None:
+                _compact(frame, ['buildingTypeString', column + '.Type'], [column + '.Level'])
+
     return paths, buildings, ca, aa, completed
 
 
 def parse_research_data(data):
-    data = xmltodict.parse(data)
-    research_data = data['SaveGameData']['ResearchData']
+    research_data = _save_game(data)['ResearchData']
 
     if research_data['blueprintCollection'] is None:
         blueprint_collection = []
@@ -165,8 +268,7 @@ def parse_research_data(data):
 
 
 def parse_scanning_data(data):
-    data = xmltodict.parse(data)
-    scanning_data = data['SaveGameData']['ScanningData']
+    scanning_data = _save_game(data)['ScanningData']
 
     if scanning_data['Biodata'] is None:
         biodata = []
@@ -0,0 +1,159 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pyilz.parse_land import SaveGame, parse_land, get_buildings_and_activities
+from pyilz.get_timers import get_timers, refresh_timers
+from pyilz.get_resources import get_storage
+
+
+def plot_key(plot):
+    """
+    Returns the cache key of a plot from get_game_state.
+
+    Args:
+        plot (dict): A plot from the 'data' list returned by get_game_state.
+
+    Returns:
+        tuple: (landId, lastUpdated) if the plot has both, otherwise ('sha1', hash of the save XML).
+    """
+    if plot.get('landId') is not None and plot.get('lastUpdated') is not None:
+        return plot['landId'], plot['lastUpdated']
+    return 'sha1', hashlib.sha1(plot['data'].encode('utf-8')).hexdigest()
+
+
+class ParsedPlot:
+    """
+    The parsed frames, timers and storage of one plot.
+
+    The frames are shared with the cache, so they should be treated as read-only. The seconds
+    spent in each stage of parsing are kept in timings.
+
+    Args:
+        plot (dict): A plot from the 'data' list returned by get_game_state.
+    """
+
+    def __init__(self, plot):
+        self.land_id = plot.get('landId')
+        self.last_updated = plot.get('lastUpdated')
+        start = time.perf_counter()
+        save = SaveGame(plot['data'])
+        self.building_data = parse_land(save)
+        parsed = time.perf_counter()
+        self.paths, self.buildings, self.ca, self.aa, self.completed = get_buildings_and_activities(
+            self.building_data)
+        normalized = time.perf_counter()
+        self._timers = get_timers(self.ca, self.aa, self.completed)
+        self._storage = {}
+        self.timings = {'parse': parsed - start, 'normalize': normalized - parsed,
+                        'timers': time.perf_counter() - normalized}
+
+    def timers(self, now=None):
+        """
+        Returns the plot's timers with minutes and percentage computed for the given unix time.
+        """
+        return refresh_timers(self._timers, now)
+
+    def storage(self, tier=1):
+        """
+        Returns the plot's total storage for the given land tier.
+        """
+        if tier not in self._storage:
+            self._storage[tier] = get_storage(self.building_data, tier)
+        return dict(self._storage[tier])
+
+
+class PlotCache:
+    """
+    A cache of parsed plots keyed on (landId, lastUpdated), or on a hash of the save XML.
+
+    Parsed plots are kept in memory with least-recently-used eviction. If a directory is
+    given they are also pickled there, so they survive restarts and evictions. Files in the
+    directory are unpickled without any check, so it must only be writable by trusted users.
+
+    Args:
+        maxsize (int, optional): The number of parsed plots kept in memory. Defaults to 128.
+        directory (str, optional): A trusted directory for the on-disk tier. Defaults to None.
+    """
+
+    def __init__(self, maxsize=128, directory=None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._plots = OrderedDict()
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self._plots)
+
+    def __contains__(self, plot):
+        return plot_key(plot) in self._plots
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(repr(key).encode('utf-8')).hexdigest() + '.pkl')
+
+    def _load(self, key):
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(key), 'rb') as file:
+                return pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _store(self, key, parsed):
+        if self.directory is None:
+            return
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as file:
+            pickle.dump(parsed, file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self._path(key))
+
+    def _remember(self, key, parsed, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self._plots[key] = parsed
+            self._plots.move_to_end(key)
+            while len(self._plots) > self.maxsize:
+                self._plots.popitem(last=False)
+
+    def get(self, plot):
+        """
+        Returns the parsed plot, parsing it only if this version of the plot has not been seen.
+
+        Args:
+            plot (dict): A plot from the 'data' list returned by get_game_state.
+
+        Returns:
+            ParsedPlot: The parsed frames, timers and storage of the plot.
+        """
+        key = plot_key(plot)
+        with self._lock:
+            parsed = self._plots.get(key)
+            if parsed is not None:
+                self._plots.move_to_end(key)
+                self.hits += 1
+                return parsed
+        parsed = self._load(key)
+        loaded = parsed is not None
+        if not loaded:
+            parsed = ParsedPlot(plot)
+            self._store(key, parsed)
+        self._remember(key, parsed, loaded)
+        return parsed
+
+    def clear(self):
+        """
+        Empties the in-memory tier. The on-disk tier is left as is.
+        """
+        with self._lock:
+            self._plots.clear()
@@ -0,0 +1,33 @@
+import importlib.resources
+import json
+
+_buildings = None
+_reference_data = None
+
+
+def get_buildings_data():
+    """
+    Returns the 'buildings' list from buildings.json, loading it on first use.
+
+    Returns:
+        list: A dictionary per building, shared between callers and not to be modified.
+    """
+    global _buildings
+    if _buildings is None:
+        with importlib.resources.open_text("pyilz", "buildings.json") as file:
+            _buildings = json.load(file)['buildings']
+    return _buildings
+
+
+def get_reference_data():
+    """
+    Returns the contents of reference_data.json, loading it on first use.
+
+    Returns:
+        dict: The 'biodata', 'activities' and 'buildings' sections, shared between callers and not to be modified.
+    """
+    global _reference_data
+    if _reference_data is None:
+        with importlib.resources.open_text("pyilz", "reference_data.json") as file:
+            _reference_data = json.load(file)
+    return _reference_data
@@ -0,0 +1,357 @@
+import hashlib
+import importlib.resources
+import json
+import math
+import os
+import re
+import numpy as np
+from pyilz.get_buildings import land_tier_bonus_multiplier_percent
+
+FORMAT_VERSION = 1
+MAGIC = b'PYILZREF'
+# every array starts on a 64 byte boundary so views into the mapped file stay aligned
+ALIGNMENT = 64
+TABLES_PATH = os.path.join(os.path.dirname(__file__), 'reference_tables.bin')
+
+_duration_pattern = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*(s|m|min|h|d)?\s*$')
+_duration_units = {None: 1, 's': 1, 'm': 60, 'min': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_duration(duration):
+    """
+    Converts a duration from buildings.json such as "15s", "1.5h" or "2d" to seconds.
+
+    Args:
+        duration (str or int): The duration. Bare numbers are taken to be seconds.
+
+    Returns:
+        int: The duration in seconds, or -1 if there is none.
+    """
+    if duration is None:
+        return -1
+    match = _duration_pattern.match(str(duration))
+    if match is None:
+        raise ValueError(f'Unknown duration {duration!r}')
+    return int(round(float(match.group(1)) * _duration_units[match.group(2)]))
+
+
+_amount_pattern = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([kKmM])?\s*$')
+_amount_units = {None: 1, 'k': 1000, 'm': 1000000}
+
+
+def parse_amount(amount):
+    """
+    Converts an amount from buildings.json such as 250, "7100" or "9.9K" to an integer.
+
+    Args:
+        amount (str or int): The amount.
+
+    Returns:
+        int: The amount.
+    """
+    if isinstance(amount, int):
+        return amount
+    match = _amount_pattern.match(str(amount))
+    if match is None:
+        raise ValueError(f'Unknown amount {amount!r}')
+    unit = match.group(2).lower() if match.group(2) else None
+    return int(round(float(match.group(1)) * _amount_units[unit]))
+
+
+def _sources():
+    with importlib.resources.open_binary("pyilz", "buildings.json") as file:
+        buildings = file.read()
+    with importlib.resources.open_binary("pyilz", "reference_data.json") as file:
+        reference_data = file.read()
+    return buildings, reference_data
+
+
+def _source_hash(buildings, reference_data):
+    # hashed as canonical JSON, so line endings and formatting of the checkout do not matter
+    canonical = json.dumps([buildings, reference_data], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+def source_sha1():
+    """
+    Returns the SHA-1 of the JSON reference data bundled with pyilz, as stored in compiled tables.
+    """
+    buildings_source, reference_source = _sources()
+    return _source_hash(json.loads(buildings_source), json.loads(reference_source))
+
+
+def compile_reference_data():
+    """
+    Compiles buildings.json and reference_data.json into flat arrays.
+
+    Building tables are indexed by the type ids of get_catalog() and by level, and tier
+    tables have one column per land tier with the tier bonus already applied. Strings
+    that index the arrays are kept separately.
+
+    Returns:
+        tuple: A tuple containing a dictionary of numpy arrays, a dictionary of strings and lists,
+               and the source_sha1 of the source files.
+    """
+    buildings_source, reference_source = _sources()
+    buildings_data = json.loads(buildings_source)
+    reference_data = json.loads(reference_source)
+    source_hash = _source_hash(buildings_data, reference_data)
+    buildings = buildings_data['buildings']
+
+    # the same first-occurrence-wins order BuildingCatalog interns type ids in
+    name_ids = list(dict.fromkeys(building['nameId'] for building in buildings))
+    type_ids = {name_id: type_id for type_id, name_id in enumerate(name_ids)}
+    resources = set()
+    for building in buildings:
+        for detail in building['details']:
+            resources.update(cost['resource'] for cost in detail['cost'] or ())
+            if detail.get('storage'):
+                resources.add(detail['storage']['resource'])
+            for activity in detail['activities'].values():
+                if activity:
+                    resources.add(activity['resource'])
+                    resources.update(cost['resource'] for cost in activity.get('cost') or ())
+    resources = sorted(resources)
+    resource_ids = {resource: i for i, resource in enumerate(resources)}
+
+    types = len(name_ids)
+    levels = max(detail['level'] for building in buildings for detail in building['details']) + 1
+    tiers = len(land_tier_bonus_multiplier_percent)
+    multipliers = np.array([1 + pct / 100 for pct in land_tier_bonus_multiplier_percent])
+
+    arrays = {
+        'tier_multiplier': multipliers,
+        'width': np.full(types, 2, np.int16),
+        'height': np.full(types, 2, np.int16),
+        'efficiency': np.full(types, 100, np.int16),
+        'max_level': np.zeros(types, np.int8),
+        'has_level': np.zeros((types, levels), bool),
+        'build_seconds': np.full((types, levels), -1, np.int64),
+        'cost': np.zeros((types, levels, len(resources)), np.int64),
+        'storage_resource': np.full((types, levels), -1, np.int8),
+        'storage_amount': np.zeros((types, levels), np.int64),
+        'storage': np.zeros((types, levels, tiers), np.int64),
+        'active_resource': np.full((types, levels), -1, np.int8),
+        'active_amount': np.zeros((types, levels), np.int64),
+        'active_seconds': np.full((types, levels), -1, np.int64),
+        'active_output': np.zeros((types, levels, tiers), np.int64),
+        'passive_resource': np.full((types, levels), -1, np.int8),
+        'passive_amount': np.zeros((types, levels), np.int64),
+        'passive_seconds': np.full((types, levels), -1, np.int64),
+        'passive_capacity': np.zeros((types, levels), np.int64),
+        'passive_output': np.zeros((types, levels, tiers), np.int64),
+    }
+    seen = set()
+    for building in buildings:
+        type_id = type_ids[building['nameId']]
+        if type_id in seen:
+            continue
+        seen.add(type_id)
+        arrays['width'][type_id] = building['width']
+        arrays['height'][type_id] = building['height']
+        arrays['efficiency'][type_id] = building.get('efficiency', 100)
+        for detail in building['details']:
+            level = detail['level']
+            if arrays['has_level'][type_id, level]:
+                continue
+            arrays['has_level'][type_id, level] = True
+            arrays['max_level'][type_id] = max(arrays['max_level'][type_id], level)
+            arrays['build_seconds'][type_id, level] = parse_duration(detail['time'])
+            for cost in detail['cost'] or ():
+                arrays['cost'][type_id, level, resource_ids[cost['resource']]] += parse_amount(cost['amount'])
+            storage = detail.get('storage')
+            if storage is not None:
+                arrays['storage_resource'][type_id, level] = resource_ids[storage['resource']]
+                arrays['storage_amount'][type_id, level] = int(storage['amount'])
+                # the same rounding as BuildingCatalog.storage
+                arrays['storage'][type_id, level] = [math.ceil(int(storage['amount']) * m) for m in multipliers]
+            for kind in ('active', 'passive'):
+                activity = detail['activities'][kind]
+                if activity is None:
+                    continue
+                arrays[kind + '_resource'][type_id, level] = resource_ids[activity['resource']]
+                arrays[kind + '_amount'][type_id, level] = int(activity['amount'])
+                arrays[kind + '_seconds'][type_id, level] = parse_duration(activity.get('time'))
+                # the same rounding as get_active_output and get_passive_output at 100% efficiency
+                arrays[kind + '_output'][type_id, level] = [
+                    math.ceil((int(activity['amount']) * 100 / 100) * m) for m in multipliers]
+            if detail['activities']['passive'] is not None:
+                arrays['passive_capacity'][type_id, level] = detail['activities']['passive'].get('storage') or 0
+
+    activity_names = list(reference_data['activities'])
+    activity_types = sorted({activity['type'] for activity in reference_data['activities'].values()})
+    activity_levels = max(len(activity['amount'] or ()) for activity in reference_data['activities'].values())
+    count = len(activity_names)
+    arrays.update({
+        'activity_type': np.zeros(count, np.int8),
+        'activity_output': np.full(count, -1, np.int8),
+        'activity_levels': np.zeros(count, np.int8),
+        'activity_amount': np.zeros((count, activity_levels + 1), np.int64),
+        'activity_totals': np.zeros((count, activity_levels + 1), np.int64),
+        'activity_seconds': np.full((count, activity_levels + 1), -1, np.int64),
+    })
+    for i, activity in enumerate(reference_data['activities'].values()):
+        arrays['activity_type'][i] = activity_types.index(activity['type'])
+        if activity['output'] is not None:
+            arrays['activity_output'][i] = resource_ids[activity['output']]
+        amounts = activity['amount'] or []
+        arrays['activity_levels'][i] = len(amounts)
+        # entry i of each list is level i + 1
+        arrays['activity_amount'][i, 1:len(amounts) + 1] = amounts
+        totals = activity.get('totals') or []
+        arrays['activity_totals'][i, 1:len(totals) + 1] = totals
+        minutes = activity.get('duration_minutes') or []
+        arrays['activity_seconds'][i, 1:len(minutes) + 1] = [m * 60 for m in minutes]
+
+    reference_buildings = reference_data['buildings']
+    arrays['reference_width'] = np.array([b['w'] for b in reference_buildings.values()], np.int16)
+    arrays['reference_height'] = np.array([b['h'] for b in reference_buildings.values()], np.int16)
+
+    strings = {
+        'name_ids': name_ids,
+        'resources': resources,
+        'activity_names': activity_names,
+        'activity_types': activity_types,
+        'reference_buildings': list(reference_buildings),
+        'reference_images': [b.get('img') for b in reference_buildings.values()],
+        'biodata': reference_data['biodata'],
+    }
+    return arrays, strings, source_hash
+
+
+def write_reference_tables(path=TABLES_PATH):
+    """
+    Compiles the reference data and writes it to a single binary file.
+
+    The file is an 8 byte magic, a little-endian uint32 header length, a JSON header with the
+    format version, source hash, strings and the dtype, shape and offset of every array,
+    and then the raw arrays.
+
+    Args:
+        path (str, optional): The file to write. Defaults to TABLES_PATH, the copy bundled with pyilz.
+    """
+    arrays, strings, source_hash = compile_reference_data()
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array, array.dtype.newbyteorder('<'))
+        arrays[name] = array
+        layout[name] = [array.dtype.str, list(array.shape), offset]
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header = json.dumps({'version': FORMAT_VERSION, 'source_sha1': source_hash, 'strings': strings,
+                         'arrays': layout}, separators=(',', ':')).encode('utf-8')
+    start = -(-(len(MAGIC) + 4 + len(header)) // ALIGNMENT) * ALIGNMENT
+    blob = bytearray(start + offset)
+    blob[:len(MAGIC)] = MAGIC
+    blob[len(MAGIC):len(MAGIC) + 4] = len(header).to_bytes(4, 'little')
+    blob[len(MAGIC) + 4:len(MAGIC) + 4 + len(header)] = header
+    for name, array in arrays.items():
+        position = start + layout[name][2]
+        blob[position:position + array.nbytes] = array.tobytes()
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(blob)
+    os.replace(temp_path, path)
+
+
+class ReferenceTables:
+    """
+    The compiled reference data as read-only struct-of-arrays tables.
+
+    Arrays loaded from a file are views into one read-only memory map, so every worker process
+    that loads the same file shares the same physical pages instead of holding its own copy.
+    Building tables are indexed by [type id, level] (level 0 is unused) and tier tables by
+    [type id, level, tier]. Missing levels have has_level False, zero amounts and -1 for
+    resources and durations.
+
+    Args:
+        arrays (dict): The arrays, by name. Each one is also available as an attribute.
+        strings (dict): The strings that index the arrays, e.g. 'name_ids' and 'resources'.
+        source_sha1 (str): The source_sha1 of the buildings.json and reference_data.json the tables were compiled from.
+    """
+
+    def __init__(self, arrays, strings, source_sha1):
+        self.arrays = arrays
+        self.strings = strings
+        self.source_sha1 = source_sha1
+        for name, array in arrays.items():
+            setattr(self, name, array)
+        self.name_ids = strings['name_ids']
+        self.resources = strings['resources']
+        self.activity_names = strings['activity_names']
+        self._activity_ids = {name: i for i, name in enumerate(self.activity_names)}
+
+    @classmethod
+    def load(cls, path=TABLES_PATH):
+        """
+        Memory-maps a file written by write_reference_tables.
+
+        Raises:
+            ValueError: If the file is not a reference table file of this format version.
+        """
+        mapped = np.memmap(path, dtype=np.uint8, mode='r')
+        if bytes(mapped[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f'{path} is not a pyilz reference table file')
+        length = int.from_bytes(bytes(mapped[len(MAGIC):len(MAGIC) + 4]), 'little')
+        header = json.loads(bytes(mapped[len(MAGIC) + 4:len(MAGIC) + 4 + length]))
+        if header['version'] != FORMAT_VERSION:
+            raise ValueError(f'{path} has format version {header["version"]}, expected {FORMAT_VERSION}')
+        start = -(-(len(MAGIC) + 4 + length) // ALIGNMENT) * ALIGNMENT
+        arrays = {}
+        for name, (dtype, shape, offset) in header['arrays'].items():
+            dtype = np.dtype(dtype)
+            count = int(np.prod(shape, dtype=np.int64))
+            position = start + offset
+            arrays[name] = mapped[position:position + count * dtype.itemsize].view(dtype).reshape(shape)
+        return cls(arrays, header['strings'], header['source_sha1'])
+
+    @classmethod
+    def compile(cls):
+        """
+        Compiles the tables in memory from the JSON reference data.
+        """
+        arrays, strings, source_hash = compile_reference_data()
+        for array in arrays.values():
+            array.flags.writeable = False
+        return cls(arrays, strings, source_hash)
+
+    def activity_id(self, name):
+        """
+        Returns the index of an activity from reference_data.json, e.g. 'CONVERT_HYPERION_TO_SOLON'.
+        """
+        return self._activity_ids[name]
+
+
+_tables = None
+
+
+def get_reference_tables():
+    """
+    Returns the shared ReferenceTables, memory-mapping the bundled file on first use.
+
+    If the bundled file is missing or from another format version, the tables are compiled
+    from the JSON reference data instead. The file is not checked against the JSON here, which
+    would cost a full parse of it; test_bundled_tables_are_current compares their source_sha1.
+
+    Returns:
+        ReferenceTables: The shared reference tables.
+    """
+    global _tables
+    if _tables is None:
+        try:
+            _tables = ReferenceTables.load()
+        except (OSError, ValueError):
+            _tables = ReferenceTables.compile()
+    return _tables
+
+
+if __name__ == '__main__':
+    import time
+    write_reference_tables()
+    print(f'Wrote {TABLES_PATH} ({os.path.getsize(TABLES_PATH)} bytes)')
+    start = time.perf_counter()
+    tables = ReferenceTables.load()
+    print(f'Loaded {len(tables.arrays)} tables in {(time.perf_counter() - start) * 1000:.2f}ms')
+    start = time.perf_counter()
+    ReferenceTables.compile()
+    print(f'Compiled from JSON in {(time.perf_counter() - start) * 1000:.2f}ms')
@@ -1,13 +1,18 @@
 import requests
 import os
 
+COGNITO_URL = 'https://cognito-idp.us-east-1.amazonaws.com/'
+# overrides COGNITO_URL, e.g. to point token refreshes at pyilz.mock_server
+COGNITO_URL_ENV = 'PYILZ_COGNITO_URL'
 
-def refresh_token(ref_token=None):
+
+def refresh_token(ref_token=None, url=None):
     """
     Returns a new ID token using the provided refresh token or the refresh token from the environment.
 
     Args:
         ref_token (str, optional): The refresh token to use. Defaults to None.
+        url (str, optional): The Cognito endpoint. Defaults to the PYILZ_COGNITO_URL environment variable, or COGNITO_URL.
 
     Raises:
         Exception: If no refresh token is found.
@@ -21,7 +26,8 @@ def refresh_token(ref_token=None):
         raise Exception(
             'No refresh token found. Please provide a refresh token.')
 
-    response = requests.post('https://cognito-idp.us-east-1.amazonaws.com/', headers={
+    url = os.getenv(COGNITO_URL_ENV, COGNITO_URL) if url is None else url
+    response = requests.post(url, headers={
         'authority': 'cognito-idp.us-east-1.amazonaws.com',
         'content-type': 'application/x-amz-json-1.1',
         'x-amz-target': 'AWSCognitoIdentityProviderService.InitiateAuth'
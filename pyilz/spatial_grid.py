@@ -0,0 +1,136 @@
+from pyilz.get_buildings import get_catalog
+
+
+class SpatialGrid:
+    """
+    A uniform grid (bucket) index over rectangular building footprints on a plot.
+
+    Every footprint is stored in each cell_size x cell_size bucket it overlaps, so a
+    query only has to look at the buckets its rectangle covers instead of every
+    building on the plot.
+
+    Args:
+        cell_size (int, optional): The width and height of each bucket in tiles. Defaults to 8.
+    """
+
+    def __init__(self, cell_size=8):
+        self.cell_size = cell_size
+        self._cells = {}
+        self._rects = {}
+
+    @classmethod
+    def from_layout(cls, import_string, cell_size=8):
+        """
+        Builds a grid from a list of buildings, keyed by their index in the list.
+
+        Args:
+            import_string (list): A list of dictionaries with 'buildingTypeString', 'X' and 'Y' keys.
+            cell_size (int, optional): The width and height of each bucket in tiles. Defaults to 8.
+
+        Returns:
+            SpatialGrid: A grid containing every building's footprint.
+        """
+        catalog = get_catalog()
+        grid = cls(cell_size)
+        for i, building in enumerate(import_string):
+            type_id, _ = catalog.parse_type_string(building['buildingTypeString'])
+            w, h = catalog.dimensions(type_id)
+            grid.insert(i, building['X'], building['Y'], w, h)
+        return grid
+
+    def __len__(self):
+        return len(self._rects)
+
+    def __contains__(self, key):
+        return key in self._rects
+
+    def _buckets(self, x0, y0, x1, y1):
+        size = self.cell_size
+        for cx in range(x0 // size, x1 // size + 1):
+            for cy in range(y0 // size, y1 // size + 1):
+                yield cx, cy
+
+    def rect(self, key):
+        """
+        Returns the footprint of a key as an (x, y, width, height) tuple.
+        """
+        return self._rects[key]
+
+    def insert(self, key, x, y, w, h):
+        """
+        Adds a footprint covering tiles x..x+w-1 and y..y+h-1, replacing any footprint already stored for key.
+
+        Args:
+            key (hashable): The key to store the footprint under.
+            x (int): The x-coordinate of the footprint's origin tile.
+            y (int): The y-coordinate of the footprint's origin tile.
+            w (int): The width of the footprint.
+            h (int): The height of the footprint.
+        """
+        if key in self._rects:
+            self.remove(key)
+        self._rects[key] = (x, y, w, h)
+        for bucket in self._buckets(x, y, x + w - 1, y + h - 1):
+            self._cells.setdefault(bucket, set()).add(key)
+
+    def remove(self, key):
+        """
+        Removes the footprint stored for key.
+        """
+        x, y, w, h = self._rects.pop(key)
+        for bucket in self._buckets(x, y, x + w - 1, y + h - 1):
+            keys = self._cells[bucket]
+            keys.discard(key)
+            if not keys:
+                del self._cells[bucket]
+
+    def move(self, key, x, y):
+        """
+        Moves the footprint stored for key to a new origin tile, keeping its size.
+        """
+        _, _, w, h = self._rects[key]
+        self.insert(key, x, y, w, h)
+
+    def query(self, x0, y0, x1, y1):
+        """
+        Returns the keys whose footprints overlap the tiles x0..x1 and y0..y1 (inclusive).
+
+        Returns:
+            set: The keys of the overlapping footprints.
+        """
+        found = set()
+        seen = set()
+        for bucket in self._buckets(x0, y0, x1, y1):
+            for key in self._cells.get(bucket, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                x, y, w, h = self._rects[key]
+                if x <= x1 and x + w - 1 >= x0 and y <= y1 and y + h - 1 >= y0:
+                    found.add(key)
+        return found
+
+    def query_radius(self, x, y, w, h, radius):
+        """
+        Returns the keys whose footprints are within radius tiles of a footprint on both axes.
+
+        This matches the area a building influences in calculate_efficiency, so only these
+        buildings can affect, or be affected by, a building with the given footprint and radius.
+
+        Args:
+            x (int): The x-coordinate of the footprint's origin tile.
+            y (int): The y-coordinate of the footprint's origin tile.
+            w (int): The width of the footprint.
+            h (int): The height of the footprint.
+            radius (int): The radius around the footprint to search.
+
+        Returns:
+            set: The keys of the footprints within the radius.
+        """
+        return self.query(x - radius, y - radius, x + w - 1 + radius, y + h - 1 + radius)
+
+    def query_point(self, x, y):
+        """
+        Returns the keys whose footprints cover the tile (x, y).
+        """
+        return self.query(x, y, x, y)
@@ -0,0 +1,216 @@
+import hashlib
+import re
+import xmltodict
+
+_building_pattern = re.compile(rb'<BuildingData>.*?</BuildingData>', re.S)
+_uid_pattern = re.compile(rb'<uid>([^<]*)</uid>')
+ACTIVITY_SLOTS = ('currentActivity', 'autoActivity', 'completedActivity')
+
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class PlotIndex:
+    """
+    The BuildingData entries of one plot, indexed by uid and hashed but not decoded.
+
+    The save XML is only scanned for the raw bytes of each <BuildingData> element, which are
+    hashed. An entry is decoded with xmltodict the first time it is asked for, so comparing two
+    versions of a plot only decodes the buildings whose bytes changed. Keep the index of the last
+    poll around and pass it to diff_plots or diff_states with the index of the next one.
+
+    Args:
+        plot (dict or str): A plot from the 'data' list returned by get_game_state, or its save XML.
+    """
+
+    def __init__(self, plot):
+        if isinstance(plot, dict):
+            self.land_id = plot.get('landId')
+            self.last_updated = plot.get('lastUpdated')
+            data = plot['data']
+        else:
+            self.land_id = None
+            self.last_updated = None
+            data = plot
+        self._data = data.encode('utf-8') if isinstance(data, str) else data
+        self.digest = _digest(self._data)
+        self.hashes = {}
+        self._spans = {}
+        self._decoded = {}
+        for match in _building_pattern.finditer(self._data):
+            uid = _uid_pattern.search(self._data, match.start(), match.end())
+            uid = uid.group(1).decode('utf-8') if uid is not None else f'@{match.start()}'
+            self._spans[uid] = match.span()
+            self.hashes[uid] = _digest(match.group())
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def __contains__(self, uid):
+        return uid in self.hashes
+
+    def __iter__(self):
+        return iter(self.hashes)
+
+    def building(self, uid):
+        """
+        Returns the decoded BuildingData of a building, as in a row of parse_land.
+        """
+        if uid not in self._decoded:
+            start, end = self._spans[uid]
+            self._decoded[uid] = xmltodict.parse(self._data[start:end])['BuildingData']
+        return self._decoded[uid]
+
+
+class PlotDiff:
+    """
+    The changes to one plot between two polls. Buildings are identified by uid.
+
+    Attributes:
+        land_id: The plot's landId.
+        last_updated: The plot's lastUpdated in the newer poll, or None if the plot is gone.
+        added (list): (uid, buildingTypeString) of the buildings that appeared.
+        removed (list): (uid, buildingTypeString) of the buildings that disappeared.
+        changed (list): (uid, old buildingTypeString, new buildingTypeString) of upgraded or
+                        otherwise retyped buildings.
+        states (list): (uid, old state, new state) of buildings whose state changed, e.g. to UPGRADE_IN_PROGRESS.
+        started (list): (uid, slot, activity Type, StartTime) of activities that started, where slot is
+                        currentActivity or autoActivity.
+        completed (list): (uid, activity Type, StartTime) of activities that became the building's completedActivity.
+        fractional (list): (uid, old value, new value) of fractionalGeneratedResources changes, as strings.
+    """
+
+    def __init__(self, land_id, last_updated=None):
+        self.land_id = land_id
+        self.last_updated = last_updated
+        self.added = []
+        self.removed = []
+        self.changed = []
+        self.states = []
+        self.started = []
+        self.completed = []
+        self.fractional = []
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed or self.states or self.started
+                    or self.completed or self.fractional)
+
+    def __repr__(self):
+        counts = ', '.join(f'{name}={len(getattr(self, name))}' for name in
+                           ('added', 'removed', 'changed', 'states', 'started', 'completed', 'fractional')
+                           if getattr(self, name))
+        return f'PlotDiff(land_id={self.land_id}, {counts or "unchanged"})'
+
+    def to_dict(self):
+        """
+        Returns the non-empty change lists as a JSON-serializable dictionary.
+        """
+        changes = {'landId': self.land_id, 'lastUpdated': self.last_updated}
+        for name in ('added', 'removed', 'changed', 'states', 'started', 'completed', 'fractional'):
+            if getattr(self, name):
+                changes[name] = [list(change) for change in getattr(self, name)]
+        return changes
+
+
+def _activity(building, slot):
+    activity = building.get(slot)
+    if not isinstance(activity, dict):
+        return None
+    return activity.get('Type'), activity.get('StartTime')
+
+
+def _diff_building(diff, uid, old, new):
+    if old.get('buildingTypeString') != new.get('buildingTypeString'):
+        diff.changed.append((uid, old.get('buildingTypeString'), new.get('buildingTypeString')))
+    if old.get('state') != new.get('state'):
+        diff.states.append((uid, old.get('state'), new.get('state')))
+    for slot in ACTIVITY_SLOTS:
+        activity = _activity(new, slot)
+        if activity is None or activity == _activity(old, slot):
+            continue
+        if slot == 'completedActivity':
+            diff.completed.append((uid,) + activity)
+        else:
+            diff.started.append((uid, slot) + activity)
+    if old.get('fractionalGeneratedResources') != new.get('fractionalGeneratedResources'):
+        diff.fractional.append((uid, old.get('fractionalGeneratedResources'), new.get('fractionalGeneratedResources')))
+
+
+def diff_plots(old, new):
+    """
+    Compares two versions of a plot, decoding only the buildings whose raw XML changed.
+
+    Args:
+        old (PlotIndex, dict or None): The earlier version, a PlotIndex or a plot from get_game_state. None
+                                       if the plot is new.
+        new (PlotIndex, dict or None): The later version. None if the plot is gone.
+
+    Returns:
+        PlotDiff: The changes, which is falsy if there are none.
+    """
+    old = PlotIndex(old) if isinstance(old, dict) else old
+    new = PlotIndex(new) if isinstance(new, dict) else new
+    diff = PlotDiff(new.land_id if new is not None else old.land_id,
+                    new.last_updated if new is not None else None)
+    if old is not None and new is not None and old.digest == new.digest:
+        return diff
+    old_hashes = old.hashes if old is not None else {}
+    new_hashes = new.hashes if new is not None else {}
+    for uid, digest in new_hashes.items():
+        old_digest = old_hashes.get(uid)
+        if old_digest is None:
+            diff.added.append((uid, new.building(uid).get('buildingTypeString')))
+        elif old_digest != digest:
+            _diff_building(diff, uid, old.building(uid), new.building(uid))
+    for uid in old_hashes:
+        if uid not in new_hashes:
+            diff.removed.append((uid, old.building(uid).get('buildingTypeString')))
+    return diff
+
+
+def index_state(game_state):
+    """
+    Indexes every plot of a game state by landId.
+
+    Args:
+        game_state (dict): The game state returned by get_game_state.
+
+    Returns:
+        dict: A PlotIndex per landId.
+    """
+    return {plot.get('landId'): PlotIndex(plot) for plot in game_state['data']}
+
+
+def diff_states(old, new):
+    """
+    Compares two polls of get_game_state plot by plot.
+
+    Plots whose save XML is byte-identical are skipped after one hash, and within a changed plot
+    only the BuildingData entries whose hash changed are decoded. Passing the index_state of the
+    previous poll instead of its game state saves indexing it again.
+
+    Args:
+        old (dict): The earlier game state, or its index_state.
+        new (dict): The later game state, or its index_state.
+
+    Returns:
+        dict: A PlotDiff per landId of the plots that changed, appeared or disappeared.
+    """
+    old = index_state(old) if 'data' in old and isinstance(old['data'], list) else old
+    new = index_state(new) if 'data' in new and isinstance(new['data'], list) else new
+    diffs = {}
+    for land_id in list(new) + [land_id for land_id in old if land_id not in new]:
+        diff = diff_plots(old.get(land_id), new.get(land_id))
+        if diff:
+            diffs[land_id] = diff
+    return diffs
+
+
+if __name__ == '__main__':
+    import datetime
+    from pyilz.synthetic import synthetic_game_state
+    before = synthetic_game_state(plots=3)
+    after = synthetic_game_state(plots=3, now=datetime.datetime(2023, 6, 11, 16))
+    for land_id, diff in diff_states(index_state(before), after).items():
+        print(diff)
@@ -0,0 +1,139 @@
+import datetime
+import random
+import uuid
+from xml.sax.saxutils import escape
+from pyilz.reference_data import get_buildings_data
+
+_time_format = '%Y-%m-%dT%H:%M:%S.%f'
+
+
+def _timestamp(when):
+    # the game writes 7 fractional digits
+    return when.strftime(_time_format) + '0Z'
+
+
+def _activity(tag, activity_type, sprite, start, seconds, indent='      '):
+    return (f'{indent}<{tag}>\n'
+            f'{indent}  <Type>{activity_type}</Type>\n'
+            f'{indent}  <SpriteName>{sprite}</SpriteName>\n'
+            f'{indent}  <StartTime>{_timestamp(start)}</StartTime>\n'
+            f'{indent}  <EndTime>{_timestamp(start + datetime.timedelta(seconds=seconds))}</EndTime>\n'
+            f'{indent}  <DurationInSeconds>{seconds}</DurationInSeconds>\n'
+            f'{indent}  <SupportingIds>\n'
+            f'{indent}    <string />\n'
+            f'{indent}  </SupportingIds>\n'
+            f'{indent}</{tag}>\n')
+
+
+def _building_types():
+    types = []
+    for building in get_buildings_data():
+        levels = []
+        for detail in building['details']:
+            activities = detail['activities']
+            levels.append((detail['level'], activities['active'], activities['passive']))
+        types.append((building['name'].upper().replace(' ', '_'), levels))
+    return types
+
+
+def synthetic_save(buildings=100, paths=50, seed=0, now=None):
+    """
+    Generates a save game XML string shaped like the game's, for tests and benchmarks.
+
+    Buildings get random types and levels from buildings.json, random positions and random
+    uids. Buildings with an active activity at their level are mostly mid-activity, some have
+    a completed activity instead, buildings with a passive activity also run an automatic one,
+    and a few are upgrading. Positions may overlap, as the parsers do not check them.
+
+    Args:
+        buildings (int, optional): The number of buildings. Defaults to 100.
+        paths (int, optional): The number of path tiles. Defaults to 50.
+        seed (int, optional): The random seed, so the same arguments give the same XML. Defaults to 0.
+        now (datetime.datetime, optional): The time activities are running at. Defaults to 2023-06-11T15:00:00.
+
+    Returns:
+        str: The save game XML, as found in the 'data' of a plot from get_game_state.
+    """
+    rnd = random.Random(seed)
+    now = datetime.datetime(2023, 6, 11, 15) if now is None else now
+    types = _building_types()
+    parts = ['<?xml version="1.0" encoding="utf-16"?>\n'
+             '<SaveGameData xmlns:xsd="http://www.w3.org/2001/XMLSchema" '
+             'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">\n'
+             '  <SaveVersionNumber>9</SaveVersionNumber>\n'
+             '  <SaveGameCreationTimeStamp>0001-01-01T00:00:00</SaveGameCreationTimeStamp>\n'
+             '  <LastSaveTimeStamp>0001-01-01T00:00:00</LastSaveTimeStamp>\n'
+             '  <Buildings>\n']
+    for _ in range(buildings):
+        name, levels = rnd.choice(types)
+        level, active, passive = rnd.choice(levels)
+        state = 'UPGRADE_IN_PROGRESS' if rnd.random() < 0.02 else 'BUILT'
+        parts.append('    <BuildingData>\n'
+                     f'      <uid>{uuid.UUID(int=rnd.getrandbits(128), version=4)}</uid>\n'
+                     f'      <buildingTypeString>{escape(name)}_{level}</buildingTypeString>\n'
+                     f'      <state>{state}</state>\n'
+                     f'      <position x="{rnd.randint(0, 49)}" y="{rnd.randint(0, 49)}" />\n'
+                     f'      <startTime>{_timestamp(now - datetime.timedelta(days=rnd.randint(1, 60)))}</startTime>\n')
+        if state == 'UPGRADE_IN_PROGRESS':
+            parts.append(_activity('currentActivity', 'UPGRADE', 'build_icon@2x',
+                                   now - datetime.timedelta(seconds=rnd.randint(0, 3600)), 14400))
+        elif active is not None:
+            resource = active['resource'].upper()
+            seconds = rnd.randint(60, 86400)
+            tag = 'completedActivity' if rnd.random() < 0.1 else 'currentActivity'
+            start = now - datetime.timedelta(seconds=rnd.randint(0, seconds) + (seconds if tag == 'completedActivity' else 0))
+            parts.append(_activity(tag, f'EXTRACT_{resource}_{level}', f'{active["resource"]}_icon_white@2x', start, seconds))
+        if passive is not None and state == 'BUILT':
+            parts.append(_activity('autoActivity', 'AUTOMATIC', f'{passive["resource"]}_icon@2x',
+                                   now - datetime.timedelta(seconds=rnd.randint(0, 180)), 180))
+        parts.append(f'      <fractionalGeneratedResources>{rnd.randint(0, 3000) if passive else 0}'
+                     '</fractionalGeneratedResources>\n'
+                     '    </BuildingData>\n')
+    parts.append('  </Buildings>\n  <Paths>\n')
+    for _ in range(paths):
+        parts.append(f'    <GridPosition x="{rnd.randint(0, 49)}" y="{rnd.randint(0, 49)}" />\n')
+    parts.append('  </Paths>\n'
+                 f'  <Credits>{rnd.randint(0, 5000)}</Credits>\n'
+                 f'  <Xp>{rnd.randint(0, 10 ** 8)}</Xp>\n'
+                 '  <Builders>5</Builders>\n'
+                 '  <Resources>\n')
+    for resource in ('CARBON', 'SILICON', 'HYDROGEN', 'CRYPTON', 'HYPERION', 'SOLON'):
+        parts.append('    <item>\n'
+                     f'      <key>\n        <string>{resource}</string>\n      </key>\n'
+                     f'      <value>\n        <int>{rnd.randint(0, 10 ** 7)}</int>\n      </value>\n'
+                     '    </item>\n')
+    parts.append('  </Resources>\n'
+                 '  <Activities />\n'
+                 '  <ScanningData>\n'
+                 '    <Biodata />\n'
+                 '    <PendingScanRequests />\n'
+                 '    <BiodataScanCounter>0</BiodataScanCounter>\n'
+                 '    <PityChanceCounter>0</PityChanceCounter>\n'
+                 '  </ScanningData>\n'
+                 '  <ActionLogSequenceId>0</ActionLogSequenceId>\n'
+                 '  <IlluviumTimeOffsetInSeconds>0</IlluviumTimeOffsetInSeconds>\n'
+                 '</SaveGameData>')
+    return ''.join(parts)
+
+
+def synthetic_game_state(plots=3, buildings=100, paths=50, seed=0, now=None):
+    """
+    Generates a game state shaped like the one returned by get_game_state.
+
+    Args:
+        plots (int, optional): The number of plots. Defaults to 3.
+        buildings (int, optional): The number of buildings per plot. Defaults to 100.
+        paths (int, optional): The number of path tiles per plot. Defaults to 50.
+        seed (int, optional): The random seed of the first plot. Defaults to 0.
+        now (datetime.datetime, optional): The time activities are running at. Defaults to 2023-06-11T15:00:00.
+
+    Returns:
+        dict: A dictionary with a 'data' list of plots, each with playerId, landId, lastUpdated and data.
+    """
+    rnd = random.Random(seed)
+    player_id = str(uuid.UUID(int=rnd.getrandbits(128), version=4))
+    now = datetime.datetime(2023, 6, 11, 15) if now is None else now
+    return {'data': [{'playerId': player_id,
+                      'landId': str(50000 + seed * 1000 + i),
+                      'lastUpdated': _timestamp(now),
+                      'data': synthetic_save(buildings, paths, seed * 1000 + i, now)} for i in range(plots)]}
@@ -0,0 +1,160 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TimerWatcher:
+    """
+    Watches timers from get_timers and emits an event when each activity completes.
+
+    Timers are kept in a heap ordered by their 'end' time and a single task sleeps until the
+    next one is due. Updated timers are merged in place: timers whose end time changed are
+    pushed again and the outdated heap entries are skipped when they come up. Timers that
+    are already marked as notified never fire, and every timer fires at most once per end time.
+
+    Completed timers are passed to the callback, which may be a plain function or a coroutine
+    function, as (plot, key, timer), and are queued for `async for` once iteration has started.
+    An exception from the callback is logged and does not stop later timers from firing.
+    All methods must be called from the event loop's thread.
+
+    Args:
+        callback (callable, optional): Called with (plot, key, timer) for every completed timer. Defaults to None.
+        clock (callable, optional): Returns the current unix time. Defaults to time.time.
+    """
+
+    def __init__(self, callback=None, clock=time.time):
+        self.callback = callback
+        self.clock = clock
+        self._timers = {}
+        # the number of timers across every plot, kept up to date by update
+        self._count = 0
+        self._heap = []
+        self._counter = itertools.count()
+        self._changed = None
+        self._events = None
+        self._task = None
+
+    def __len__(self):
+        return self._count
+
+    def _wake(self):
+        if self._changed is not None:
+            self._changed.set()
+
+    def update(self, timers, plot=None):
+        """
+        Merges the timers of one plot, replacing that plot's previous timers.
+
+        Args:
+            timers (dict): A dictionary of timers returned by get_timers.
+            plot (hashable, optional): The plot the timers belong to, e.g. its landId. Defaults to None.
+        """
+        previous = self._timers.pop(plot, {})
+        merged = {}
+        for key, timer in timers.items():
+            current = previous.get(key)
+            if current is not None and current['end'] == timer['end']:
+                fired = current['notified']
+            else:
+                heapq.heappush(self._heap, (timer['end'], next(self._counter), plot, key))
+                fired = False
+            timer = dict(timer)
+            timer['notified'] = timer['notified'] or fired
+            merged[key] = timer
+        if merged:
+            self._timers[plot] = merged
+        self._count += len(merged) - len(previous)
+        # drop outdated heap entries once they outnumber the live ones
+        if len(self._heap) > 2 * len(self) + 64:
+            self._heap = [entry for entry in self._heap if self._current(entry) is not None]
+            heapq.heapify(self._heap)
+        self._wake()
+
+    def _current(self, entry):
+        """
+        Returns the timer a heap entry refers to, or None if the entry is outdated.
+        """
+        end, _, plot, key = entry
+        timer = self._timers.get(plot, {}).get(key)
+        if timer is None or timer['end'] != end:
+            return None
+        return timer
+
+    def remove(self, plot):
+        """
+        Stops watching the timers of a plot.
+        """
+        self.update({}, plot)
+
+    def _pop_due(self, now):
+        """
+        Pops the timers that have completed by now and marks them as notified.
+        """
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            timer = self._current(entry)
+            if timer is None or timer['notified']:
+                continue
+            timer['notified'] = True
+            due.append((entry[2], entry[3], timer))
+        return due
+
+    async def run(self):
+        """
+        Sleeps until each timer completes and emits it, until cancelled.
+        """
+        self._changed = asyncio.Event()
+        while True:
+            self._changed.clear()
+            for event in self._pop_due(self.clock()):
+                if self._events is not None:
+                    self._events.put_nowait(event)
+                if self.callback is not None:
+                    try:
+                        result = self.callback(*event)
+                        if asyncio.iscoroutine(result):
+                            await result
+                    except Exception:
+                        logger.exception('TimerWatcher callback failed for timer %s of plot %s', event[1], event[0])
+            timeout = self._heap[0][0] - self.clock() if self._heap else None
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        """
+        Starts the watching task on the running event loop, if it is not already running.
+
+        Returns:
+            asyncio.Task: The watching task.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+        return self._task
+
+    async def stop(self):
+        """
+        Cancels the watching task.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def __aiter__(self):
+        if self._events is None:
+            self._events = asyncio.Queue()
+        self.start()
+        return self
+
+    async def __anext__(self):
+        return await self._events.get()
@@ -0,0 +1,202 @@
+import base64
+import json
+import os
+import threading
+import time
+import pyilz.refresh_token as refresh_token
+
+
+def decode_expiry(token):
+    """
+    Returns the expiry time of a JWT from its 'exp' claim. The signature is not verified.
+
+    Args:
+        token (str): The JWT.
+
+    Returns:
+        float: The expiry as a unix time, or None if the token has no readable 'exp' claim.
+    """
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+    except (IndexError, ValueError, KeyError, TypeError):
+        return None
+
+
+class TokenManager:
+    """
+    Keeps one account's ID token fresh.
+
+    The token is refreshed ahead of its 'exp' claim: once it is within margin seconds of
+    expiring, callers keep getting the current token while a single background refresh
+    replaces it, and a timer thread does the same without any caller. Only one refresh
+    runs at a time; callers that need a new token while it runs wait for its result
+    instead of starting their own. Tokens live in this object, not in os.environ. A manager
+    that cannot refresh keeps handing out its api_key until the server rejects it.
+
+    Args:
+        ref_token (str, optional): The account's refresh token. Defaults to the REFRESH_TOKEN environment variable.
+        api_key (str, optional): A current ID token to start with. Defaults to None.
+        margin (float, optional): How many seconds before expiry to refresh. Defaults to 300.
+        background (bool, optional): Whether a timer refreshes the token ahead of expiry. Defaults to True.
+        refreshable (bool, optional): Whether the token can be refreshed with ref_token. Defaults to True.
+    """
+
+    def __init__(self, ref_token=None, api_key=None, margin=300, background=True, refreshable=True):
+        self.ref_token = ref_token
+        self.margin = margin
+        self.background = background
+        self.refreshable = refreshable
+        self.refreshes = 0
+        self._token = None
+        self._expiry = None
+        self._condition = threading.Condition()
+        self._refreshing = False
+        self._error = None
+        self._timer = None
+        if api_key is not None:
+            self._set(api_key)
+
+    def _set(self, token):
+        """
+        Stores a new token and schedules its background refresh. Must hold the lock.
+        """
+        self._token = token
+        self._expiry = decode_expiry(token)
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self.background and self.refreshable and self._expiry is not None:
+            self._timer = threading.Timer(max(0, self._expiry - self.margin - time.time()), self._refresh_ahead)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _remaining(self):
+        if self._token is None:
+            return 0
+        if self._expiry is None:
+            return float('inf')
+        return self._expiry - time.time()
+
+    def _refresh(self):
+        """
+        Runs the refresh this thread has claimed and wakes every waiting caller.
+        """
+        try:
+            token = refresh_token.refresh_token(self.ref_token)
+        except Exception as e:
+            with self._condition:
+                self._error = e
+                self._refreshing = False
+                self._condition.notify_all()
+            raise
+        with self._condition:
+            self.refreshes += 1
+            self._error = None
+            self._set(token)
+            self._refreshing = False
+            self._condition.notify_all()
+        return token
+
+    def _claim(self):
+        """
+        Claims the refresh if none is running. Must hold the lock.
+        """
+        if self._refreshing:
+            return False
+        self._refreshing = True
+        return True
+
+    def _wait(self):
+        """
+        Waits for the running refresh and returns its token. Must hold the lock.
+        """
+        while self._refreshing:
+            self._condition.wait()
+        if self._error is not None:
+            raise self._error
+        return self._token
+
+    def _refresh_ahead(self, claimed=False):
+        if not claimed:
+            with self._condition:
+                if not self._claim():
+                    return
+        try:
+            self._refresh()
+        except Exception:
+            # callers retry synchronously once the token actually expires
+            pass
+
+    def token(self):
+        """
+        Returns a valid ID token, refreshing it if it has expired.
+
+        Returns:
+            str: The ID token.
+        """
+        with self._condition:
+            if not self.refreshable:
+                return self._token
+            remaining = self._remaining()
+            if remaining > self.margin:
+                return self._token
+            if remaining > 0:
+                if self._claim():
+                    threading.Thread(target=self._refresh_ahead, args=(True,), daemon=True).start()
+                return self._token
+            if not self._claim():
+                return self._wait()
+        return self._refresh()
+
+    def invalidate(self, expired):
+        """
+        Replaces a token the server rejected. Callers that report the same token share one refresh.
+
+        Args:
+            expired (str): The rejected token.
+
+        Returns:
+            str: The new ID token, or the rejected one if the manager cannot refresh.
+        """
+        with self._condition:
+            if not self.refreshable:
+                return self._token
+            if self._refreshing:
+                return self._wait()
+            if self._token is not None and self._token != expired:
+                return self._token
+            self._claim()
+        return self._refresh()
+
+    def close(self):
+        """
+        Cancels the background refresh timer.
+        """
+        with self._condition:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_token_manager(ref_token=None):
+    """
+    Returns the shared TokenManager of an account, creating it on first use.
+
+    Args:
+        ref_token (str, optional): The account's refresh token. Defaults to the REFRESH_TOKEN environment variable.
+
+    Returns:
+        TokenManager: The account's token manager. The environment account starts from the API_KEY environment variable.
+    """
+    with _managers_lock:
+        manager = _managers.get(ref_token)
+        if manager is None:
+            manager = TokenManager(ref_token, os.getenv('API_KEY') if ref_token is None else None)
+            _managers[ref_token] = manager
+        return manager
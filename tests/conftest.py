@@ -0,0 +1,53 @@
+import json
+import requests
+
+
+class Response:
+    """
+    A stand-in for requests.Response with a JSON body.
+    """
+
+    def __init__(self, body=None, status_code=200):
+        self.status_code = status_code
+        self.body = body
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f'{self.status_code} Error', response=self)
+
+    def iter_content(self, chunk_size):
+        body = json.dumps(self.body).encode('utf-8')
+        return (body[i:i + chunk_size] for i in range(0, len(body), chunk_size))
+
+    def close(self):
+        pass
+
+
+class Session:
+    """
+    A stand-in for requests.Session that records its calls.
+
+    Args:
+        responses (list or callable): The responses or exceptions to return in order, or a function
+                                      of (method, url, **kwargs) returning the response.
+    """
+
+    def __init__(self, responses):
+        self.responses = responses if callable(responses) else list(responses)
+        self.calls = []
+        self.closed = False
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        if callable(self.responses):
+            return self.responses(method, url, **kwargs)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def close(self):
+        self.closed = True
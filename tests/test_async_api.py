@@ -0,0 +1,58 @@
+import asyncio
+import threading
+import time
+import pyilz.async_api as async_api
+from pyilz.gamedata_client import GameDataClient
+from pyilz.async_api import async_get_game_state_many, async_get_plot_metadata_many
+from pyilz.mock_server import MockServer
+from pyilz.synthetic import synthetic_game_state
+from tests.conftest import Response, Session
+
+
+class Concurrency:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.most = 0
+
+    def __call__(self, method, url, **kwargs):
+        with self.lock:
+            self.in_flight += 1
+            self.most = max(self.most, self.in_flight)
+        time.sleep(0.05)
+        with self.lock:
+            self.in_flight -= 1
+        return Response({'url': url})
+
+
+def test_metadata_many_is_bounded_and_ordered():
+    concurrency = Concurrency()
+    client = GameDataClient(api_key='key', base_url='http://test', session=Session(concurrency))
+    land_ids = list(range(20))
+    result = asyncio.run(async_get_plot_metadata_many(land_ids, client, limit=8, per_host=5))
+    assert result == [{'url': f'http://test/plots/{land_id}/metadata'} for land_id in land_ids]
+    assert 1 < concurrency.most <= 5
+
+
+def test_game_state_many_shares_and_closes_key_clients(monkeypatch):
+    made = []
+
+    class Client(GameDataClient):
+        closed = False
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            made.append(self)
+
+        def close(self):
+            self.closed = True
+            super().close()
+
+    monkeypatch.setattr(async_api, 'GameDataClient', Client)
+    state = synthetic_game_state(plots=1, buildings=5)
+    with MockServer({None: state}) as server:
+        monkeypatch.setenv('PYILZ_GAMEDATA_URL', server.gamedata_url)
+        first, second = server.issue_token(), server.issue_token()
+        result = asyncio.run(async_get_game_state_many([first, second, first], device_id='device'))
+    assert result == [state] * 3
+    assert len(made) == 2 and all(client.closed for client in made)
@@ -0,0 +1,24 @@
+from pyilz.calculate_efficiency import compute, compute_vectorized, EfficiencyModel
+from pyilz.metadata_to_array import import_string_to_array
+
+LAYOUT = '[["POWER_STATION_1",10,16],["HYDROGEN_MATTER_SILO_5",27,5],["HYDROGEN_PUMP_5",31,31],["MINE_5",35,27],["SEDIMENT_EXCAVATOR_4",35,31],["PHOTODISINTEGRATION_PLANT_4",35,23],["POWER_STATION_1",2,22],["SEQUESTRIAN_PLANT_5",9,28],["CONDENSER_PLANT_4",27,39],["POWER_STATION_1",32,28],["SEQUESTRIAN_PLANT_4",34,34],["L-CRYPTON_COLLIDER_3",9,19],["CONDENSER_PLANT_5",5,21],["PHOTODISINTEGRATION_PLANT_5",13,25],["ANTI-SOLON_INVERTER_2",38,31],["SINGULARITY_SCANNER_1",23,45],["CONDENSER_PLANT_5",13,18],["MATERIALS_LAB_1",13,29],["HYPERION_RESERVOIR_1",9,25],["HYPERION_LATHE_1",6,25],["MARKETPLACE_1",20,36],["DATA_BANK_1",17,33]]'
+
+
+def test_compute_vectorized_matches_compute():
+    buildings = import_string_to_array(LAYOUT)
+    assert compute_vectorized(buildings) == compute(buildings)
+    assert compute_vectorized([]) == compute([]) == []
+
+
+def test_efficiency_model_tracks_edits():
+    buildings = import_string_to_array(LAYOUT)
+    model = EfficiencyModel(buildings)
+    assert model.compute() == compute(buildings)
+    keys = list(model)
+    model.move(keys[0], 30, 30)
+    buildings[0] = dict(buildings[0], X=30, Y=30)
+    model.remove(keys[3])
+    buildings.pop(3)
+    model.add({'buildingTypeString': 'POWER_STATION_1', 'X': 12, 'Y': 27})
+    buildings.append({'buildingTypeString': 'POWER_STATION_1', 'X': 12, 'Y': 27})
+    assert model.compute() == compute(buildings)
@@ -0,0 +1,49 @@
+import json
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from pyilz.compact_plot import TICKS_PER_SECOND, CompactPlot, _string_ids, intern_string, string
+from pyilz.parse_land import parse_land
+
+EXAMPLE_PATH = os.path.join(os.path.dirname(__file__), 'example_game_state.json')
+
+
+def test_compact_plot_round_trip():
+    with open(EXAMPLE_PATH, 'r') as f:
+        plots = json.load(f)['data']
+    for plot in plots:
+        building_data = parse_land(plot['data'])
+        compact = CompactPlot.from_plot(plot)
+        assert compact.land_id == plot['landId'] and len(compact) == len(building_data)
+        assert compact.to_frame().equals(building_data)
+        assert pickle.loads(pickle.dumps(compact)).to_frame().equals(building_data)
+
+
+def test_compact_plot_fields():
+    with open(EXAMPLE_PATH, 'r') as f:
+        plot = json.load(f)['data'][2]
+    first = CompactPlot.from_plot(plot).buildings[0]
+    assert string(first['type']) == 'MINE_5' and first['level'] == 5
+    assert (first['x'], first['y']) == (22, 42)
+    current = first['activities'][0]
+    assert string(current['type']) == 'EXTRACT_SILICON_5'
+    assert (current['end'] - current['start']) // TICKS_PER_SECOND == current['duration'] == 2618
+
+
+def test_compact_plot_string_table_grows_past_int16():
+    with open(EXAMPLE_PATH, 'r') as f:
+        plot = json.load(f)['data'][2]
+    for i in range(33000):
+        intern_string(f'test_compact_plot_{i}')
+    compact = CompactPlot.from_plot(plot)
+    assert compact.to_frame().equals(parse_land(plot['data']))
+    # SupportingIds stay with the plot instead of growing the shared table
+    assert all(value not in _string_ids for value in compact.supporting)
+
+
+def test_intern_string_is_thread_safe():
+    values = [f'test_intern_string_{i}' for i in range(2000)]
+    with ThreadPoolExecutor(8) as executor:
+        ids = list(executor.map(lambda _: [intern_string(value) for value in values], range(8)))
+    assert all(result == ids[0] for result in ids)
+    assert [string(string_id) for string_id in ids[0]] == values
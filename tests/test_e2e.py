@@ -3,6 +3,8 @@ from pyilz.parse_land import parse_land, get_buildings_and_activities
 from pyilz.get_timers import get_timers
 from pyilz.get_resources import get_storage
 from pyilz.get_plots import get_plot_metadata
+from pyilz.gamedata_client import GameDataClient
+from pyilz.mock_server import MockServer
 
 
 def test_e2e():
@@ -12,7 +14,9 @@ def test_e2e():
 
     land = plots[2]['data']
     landId = plots[2]['landId']
-    plot_metadata = get_plot_metadata(landId)
+    # served locally so the test does not depend on the live API
+    with MockServer() as server:
+        plot_metadata = get_plot_metadata(landId, GameDataClient(base_url=server.gamedata_url))
     tier = plot_metadata['tier']
     region = plot_metadata['region']
     building_data = parse_land(land)
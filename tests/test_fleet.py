@@ -0,0 +1,57 @@
+import json
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pyilz.gamedata_client import GameDataClient
+from pyilz.fleet import run_fleet
+from tests.conftest import Response, Session
+
+with open('./tests/example_game_state.json', 'r') as f:
+    GAME_STATE = json.load(f)
+
+
+def respond(method, url, **kwargs):
+    if url.endswith('/gamestate'):
+        return Response(GAME_STATE)
+    return Response({'tier': 2, 'region': 'Taiga'})
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_run_fleet(processes):
+    accounts = [GameDataClient(api_key='key', session=Session(respond)) for _ in range(2)]
+    results = list(run_fleet(accounts, processes=processes, device_id='device'))
+    plots = len(GAME_STATE['data'])
+    assert len(results) == 2 * plots
+    assert all(result.error is None for result in results)
+    assert sorted(result.account for result in results) == [0] * plots + [1] * plots
+    result = results[0]
+    assert result.tier == 2 and set(result.storage) >= {'hydrogen', 'carbon'}
+    assert {'fetch', 'metadata', 'parse', 'normalize', 'timers', 'storage', 'process'} <= set(result.timings)
+
+
+def test_run_fleet_reports_a_broken_pool(monkeypatch):
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool('a worker crashed')
+
+    monkeypatch.setattr(ProcessPoolExecutor, 'submit', submit)
+    accounts = [GameDataClient(api_key='key', session=Session(respond))]
+    results = list(run_fleet(accounts, processes=2, device_id='device'))
+    assert len(results) == len(GAME_STATE['data'])
+    assert all(isinstance(result.error, BrokenProcessPool) for result in results)
+
+
+def test_run_fleet_reports_plot_metadata_errors_and_closes_clients():
+    missing = GAME_STATE['data'][0]['landId']
+
+    def respond_without_metadata(method, url, **kwargs):
+        if url.endswith(f'/plots/{missing}/metadata'):
+            return Response({'message': 'Not Found'}, status_code=404)
+        return respond(method, url, **kwargs)
+
+    session = Session(respond_without_metadata)
+    results = list(run_fleet([{'api_key': 'key', 'session': session}], processes=1, device_id='device'))
+    assert len(results) == len(GAME_STATE['data'])
+    failed = [result for result in results if result.error is not None]
+    assert [result.land_id for result in failed] == [missing]
+    assert isinstance(failed[0].error, ValueError)
+    assert session.closed
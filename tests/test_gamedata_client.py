@@ -0,0 +1,37 @@
+import time
+import requests
+import pyilz.refresh_token as refresh_token
+from pyilz.gamedata_client import GameDataClient
+from pyilz.get_plots import get_my_plots
+from tests.conftest import Response, Session
+from tests.test_token_manager import make_token
+
+
+def test_retries_and_refreshes(monkeypatch):
+    monkeypatch.setattr(refresh_token, 'refresh_token', lambda ref_token=None: 'new')
+    session = Session([requests.ConnectionError(), Response(status_code=503), Response(status_code=401),
+                       Response([1, 2])])
+    client = GameDataClient(api_key='old', ref_token='account', base_url='http://test/', backoff=0, session=session)
+
+    assert get_my_plots(client=client) == [1, 2]
+    assert [call[1] for call in session.calls] == ['http://test/plots'] * 4
+    assert [call[2]['headers']['Authorization'] for call in session.calls] == ['Bearer old'] * 3 + ['Bearer new']
+    assert client.token() == 'new'
+
+
+def test_gives_up_after_retries():
+    session = Session([Response(status_code=500), Response(status_code=502)])
+    client = GameDataClient(api_key='key', retries=1, backoff=0, session=session)
+    assert client.request('GET', '/plots').status_code == 502
+
+
+def test_bare_key_is_never_refreshed(monkeypatch):
+    def refresh(ref_token=None):
+        raise AssertionError('a bare key was refreshed')
+
+    monkeypatch.setattr(refresh_token, 'refresh_token', refresh)
+    session = Session([Response(status_code=401)])
+    client = GameDataClient(api_key=make_token(time.time() + 60), backoff=0, session=session)
+    assert client.tokens._timer is None
+    assert client.request('GET', '/plots').status_code == 401
+    assert len(session.calls) == 1
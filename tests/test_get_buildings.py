@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from pyilz.get_buildings import (MAX_UNKNOWN_TYPES, BuildingCatalog, get_catalog, get_building_dimensions,
+                                 get_building_storage, get_active_output, get_active_outputs, get_passive_outputs,
+                                 type_string_arrays)
+from pyilz.reference_data import get_buildings_data
+
+
+def test_catalog_type_ids():
+    catalog = get_catalog()
+    type_id = catalog.type_id('HYDROGEN_PUMP')
+    assert catalog.type_id('Hydrogen Pump') == type_id
+    assert catalog.type_id('hydrogenpump') == type_id
+    assert catalog.parse_type_string('HYDROGEN_PUMP_5') == (type_id, 5)
+    assert catalog.is_known(type_id)
+    assert not catalog.is_known(catalog.type_id('PATH'))
+
+
+def test_catalog_lookups():
+    catalog = get_catalog()
+    type_id = catalog.type_id('CARBON_MATTER_SILO')
+    assert catalog.storage(type_id, 5, 2) == get_building_storage(
+        'Carbon Matter Silo', 5, 2)
+    assert catalog.dimensions(catalog.type_id('NEXUS')) == (4, 6)
+    assert get_building_dimensions('UNKNOWN_BUILDING') == (2, 2)
+    assert get_active_output('Hydrogen Pump', 9, 1) == 1500000
+    assert get_active_output('Hydrogen Pump', 10, 1) is None
+
+
+def test_batch_outputs_match_scalar():
+    catalog = get_catalog()
+    types = np.repeat(np.arange(catalog.known_types), 10 * 5)
+    levels = np.tile(np.repeat(np.arange(10), 5), catalog.known_types)
+    tiers = np.tile(np.arange(1, 6), catalog.known_types * 10)
+    for efficiency in (100, 150, 99.5, 37):
+        active = get_active_outputs(types, levels, tiers, efficiency)
+        passive = get_passive_outputs(types, levels, tiers, efficiency)
+        for i in range(len(types)):
+            assert active[i] == (catalog.active_output(types[i], levels[i], tiers[i], efficiency) or 0)
+            assert passive[i] == (catalog.passive_output(types[i], levels[i], tiers[i], efficiency) or 0)
+    scenarios = get_active_outputs(types, levels, tiers, np.array([[100], [150]]))
+    assert scenarios.shape == (2, len(types))
+
+
+def test_type_string_arrays():
+    types, levels = type_string_arrays(['HYDROGEN_PUMP_5', 'NEXUS_2'])
+    assert get_active_outputs(types, levels, 2, 150).tolist() == [get_active_output('Hydrogen Pump', 5, 2, 150), 0]
+
+
+def test_catalog_caps_unknown_names():
+    catalog = BuildingCatalog(get_buildings_data())
+    with ThreadPoolExecutor(8) as executor:
+        ids = list(executor.map(catalog.type_id, [f'LAKE_{i}' for i in range(MAX_UNKNOWN_TYPES * 2)]))
+    assert len(catalog.name_ids) == catalog.known_types + 1 + MAX_UNKNOWN_TYPES
+    assert len(set(ids)) == MAX_UNKNOWN_TYPES + 1 and ids.count(catalog.unknown_type) == MAX_UNKNOWN_TYPES
+    assert catalog.type_id('lake_0') == ids[0] and not catalog.is_known(ids[0])
+    assert catalog.dimensions(catalog.parse_type_string('VOLCANO_1')[0]) == (2, 2)
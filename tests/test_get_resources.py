@@ -0,0 +1,24 @@
+from pyilz.get_buildings import get_catalog
+from pyilz.get_resources import get_storage, get_storage_many
+from pyilz.parse_land import parse_land
+from pyilz.synthetic import synthetic_save
+
+
+def test_get_storage_sums_storage_buildings():
+    building_data = parse_land(synthetic_save(buildings=200, seed=5))
+    before = building_data.copy()
+    storage = get_storage(building_data, 3)
+    assert building_data.equals(before)
+    catalog = get_catalog()
+    expected = {}
+    for type_string in building_data['buildingTypeString']:
+        if type_string.rsplit('_', 1)[0].endswith(('SILO', 'UNIT')):
+            amount, resource = catalog.storage(*catalog.parse_type_string(type_string), 3)
+            expected[resource] = expected.get(resource, 0) + amount
+    assert expected and all(storage[resource] == amount for resource, amount in expected.items())
+
+
+def test_get_storage_many_matches_get_storage():
+    lands = [parse_land(synthetic_save(buildings=60, seed=seed)) for seed in range(3)]
+    assert get_storage_many(lands, [1, 2, 5]) == [get_storage(land, tier) for land, tier in zip(lands, [1, 2, 5])]
+    assert get_storage_many([]) == []
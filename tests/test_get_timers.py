@@ -0,0 +1,33 @@
+import json
+import os
+import pytest
+from pyilz.get_timers import get_timer_table, get_timers, refresh_timers
+from pyilz.parse_land import get_buildings_and_activities, parse_land
+
+EXAMPLE_PATH = os.path.join(os.path.dirname(__file__), 'example_game_state.json')
+NOW = 1686495600.0
+
+with open(EXAMPLE_PATH, 'r') as f:
+    SAVES = [plot['data'] for plot in json.load(f)['data']]
+
+
+def _assert_same_timers(table, timers):
+    assert list(table) == list(timers)
+    for key, timer in timers.items():
+        assert table[key] == pytest.approx(timer)
+
+
+@pytest.mark.parametrize('data', SAVES, ids=range(len(SAVES)))
+def test_timer_table_matches_get_timers(data):
+    _, _, ca, aa, completed = get_buildings_and_activities(parse_land(data))
+    table = get_timer_table(ca, aa, completed, now=NOW)
+    _assert_same_timers(table.to_dict(), refresh_timers(get_timers(ca, aa, completed), NOW))
+
+
+def test_timer_table_keeps_replaced_timers_in_place():
+    _, _, ca, aa, _ = get_buildings_and_activities(parse_land(SAVES[2]))
+    # every current activity is replaced by a completed one, all ending at the same time
+    completed = ca.iloc[::-1].rename(columns=lambda column: column.replace('currentActivity.', 'completedActivity.'))
+    completed['completedActivity.EndTime'] = completed['completedActivity.EndTime'].max()
+    table = get_timer_table(ca, aa, completed, now=NOW)
+    _assert_same_timers(table.to_dict(), refresh_timers(get_timers(ca, aa, completed), NOW))
@@ -0,0 +1,45 @@
+import datetime
+from pyilz.history_store import HistoryStore
+from pyilz.synthetic import synthetic_game_state
+
+
+def test_history_store(tmp_path):
+    path = str(tmp_path / 'history.sqlite')
+    store = HistoryStore(path)
+    first = synthetic_game_state(plots=2, buildings=20)
+    later = synthetic_game_state(plots=2, buildings=20, now=datetime.datetime(2023, 6, 12))
+    tiers = {plot['landId']: 2 for plot in first['data']}
+    assert store.append(first['data'], tiers) == 2
+    assert store.append(first['data'], tiers) == 0
+    # the same save under a new lastUpdated is not a new snapshot
+    renamed = [dict(plot, lastUpdated='2023-06-11T16:00:00Z') for plot in first['data']]
+    assert store.append(renamed) == 0 and store.skipped == 4
+    assert store.append(later['data'], tiers) == 2
+    store.close()
+
+    store = HistoryStore(path)
+    assert len(store) == 4 and store.append(later['data']) == 0
+    land_id = first['data'][0]['landId']
+    cutoff = datetime.datetime(2023, 6, 11, 20, tzinfo=datetime.timezone.utc).timestamp()
+    buildings = store.buildings(land_id, start=cutoff)
+    assert len(buildings) == 20 and (buildings['time'] >= cutoff).all()
+    building_type = buildings['type'].iloc[0]
+    by_type = store.buildings(building_type=building_type)
+    assert (by_type['type'] == building_type).all() and set(by_type['land_id']) <= set(tiers)
+    assert len(store.snapshots(land_id)) == 2
+    assert len(store.storage(land_id)) == 12
+    assert len(store.timers(land_id, end=cutoff)) > 0
+    store.close()
+
+
+def test_history_store_keeps_latest_after_older_snapshot():
+    store = HistoryStore()
+    first = synthetic_game_state(plots=1, buildings=20)
+    later = synthetic_game_state(plots=1, buildings=20, now=datetime.datetime(2023, 6, 12))
+    assert store.append(later['data']) == 1
+    # an older snapshot arriving late is stored, but the newer one stays the latest
+    assert store.append(first['data']) == 1
+    resent = [dict(plot, lastUpdated='2023-06-12T01:00:00Z') for plot in later['data']]
+    assert store.append(resent) == 0
+    assert len(store) == 2
+    store.close()
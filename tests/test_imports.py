@@ -0,0 +1,12 @@
+import subprocess
+import sys
+
+
+def test_light_modules_skip_heavy_dependencies():
+    code = ('import sys\n'
+            'import pyilz.calculate_efficiency, pyilz.metadata_to_array, pyilz.optimize_layout, pyilz.get_blueprints\n'
+            'import pyilz.reference_data as reference_data\n'
+            'assert reference_data._buildings is None and reference_data._reference_data is None\n'
+            'print(sorted(name for name in ("pandas", "numpy", "xmltodict", "requests") if name in sys.modules))\n')
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    assert output.strip() == '[]'
@@ -0,0 +1,37 @@
+import json
+import time
+import pytest
+from pyilz.gamedata_client import GameDataClient
+from pyilz.get_game_state import stream_game_state
+from pyilz.json_stream import iter_array_items
+from pyilz.mock_server import MockServer
+from pyilz.synthetic import synthetic_game_state
+
+
+def _chunks(document, size):
+    body = json.dumps(document, ensure_ascii=False).encode('utf-8')
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+def test_iter_array_items():
+    document = {'meta': {'data': [0]}, 'data': [{'xml': '<a b="\\\\">é✓</a>', 'nested': [{'}': ']'}]}, {}], 'after': 1}
+    for size in (1, 5, 1024):
+        assert list(iter_array_items(_chunks(document, size))) == document['data']
+    with pytest.raises(ValueError):
+        list(iter_array_items(_chunks(document, 7)[:-3]))
+    with pytest.raises(ValueError):
+        list(iter_array_items(_chunks({'plots': []}, 7)))
+
+
+def test_stream_game_state():
+    state = synthetic_game_state(plots=3, buildings=50)
+    with MockServer({None: state}, slow_body=0.5) as server:
+        client = GameDataClient(api_key=server.issue_token(), base_url=server.gamedata_url)
+        start = time.perf_counter()
+        stream = stream_game_state(device_id='device', client=client, chunk_size=1024)
+        first = next(stream)
+        arrived = time.perf_counter() - start
+        # the first plot is handed over while the server is still sending the body
+        assert server.in_flight == 1
+        assert arrived < server.slow_body * 0.8
+        assert [first] + list(stream) == state['data']
@@ -0,0 +1,52 @@
+import pytest
+import requests
+import pyilz.metadata_store as metadata_store
+from pyilz.metadata_store import MetadataStore
+
+
+def test_prefetch_and_persist(monkeypatch, tmp_path):
+    fetched = []
+
+    def get_plot_metadata(land_id, client=None):
+        fetched.append(land_id)
+        return {'tier': land_id % 5 + 1, 'region': 'Taiga'}
+
+    monkeypatch.setattr(metadata_store, 'get_plot_metadata', get_plot_metadata)
+    path = str(tmp_path / 'metadata.sqlite')
+    store = MetadataStore(path, maxsize=2)
+    assert store.prefetch([1, 2, 3, 2]) == 3
+    assert store.prefetch([1, 2, 3]) == 0
+    assert store.tier(3) == 4
+    store.close()
+
+    store = MetadataStore(path)
+    assert store.get(1) == {'tier': 2, 'region': 'Taiga'}
+    assert sorted(fetched) == [1, 2, 3]
+
+    store = MetadataStore(path, ttl=0)
+    store.get(1)
+    assert sorted(fetched) == [1, 1, 2, 3]
+
+
+def test_error_bodies_are_not_stored(monkeypatch):
+    responses = {1: {'message': 'Service Unavailable'}, 2: {'tier': 3, 'region': 'Taiga'}}
+    monkeypatch.setattr(metadata_store, 'get_plot_metadata', lambda land_id, client=None: responses[land_id])
+    store = MetadataStore()
+    assert store.prefetch([1, 2]) == 1
+    with pytest.raises(ValueError):
+        store.tier(1)
+    responses[1] = {'tier': 2, 'region': 'Taiga'}
+    assert store.tier(1) == 2 and len(store) == 2
+
+
+def test_prefetch_stores_fetches_before_raising(monkeypatch):
+    def get_plot_metadata(land_id, client=None):
+        if land_id == 2:
+            raise requests.ConnectionError('unreachable')
+        return {'tier': 1, 'region': 'Taiga'}
+
+    monkeypatch.setattr(metadata_store, 'get_plot_metadata', get_plot_metadata)
+    store = MetadataStore()
+    with pytest.raises(requests.ConnectionError):
+        store.prefetch([1, 2, 3])
+    assert len(store) == 2 and store.prefetch([1, 3]) == 0
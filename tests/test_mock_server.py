@@ -0,0 +1,30 @@
+import pytest
+from pyilz.gamedata_client import GameDataClient
+from pyilz.get_game_state import get_game_state
+from pyilz.get_plots import get_my_plots
+from pyilz.mock_server import MockServer
+from pyilz.synthetic import synthetic_game_state
+from pyilz.token_manager import TokenManager
+
+
+@pytest.fixture
+def server(monkeypatch):
+    with MockServer({'account': synthetic_game_state(plots=2, buildings=5)}) as server:
+        monkeypatch.setenv('PYILZ_COGNITO_URL', server.cognito_url)
+        yield server
+
+
+def test_retries_injected_errors(server):
+    client = GameDataClient(api_key=server.issue_token('account'), base_url=server.gamedata_url, backoff=0)
+    server.fail_next(2, 502)
+    assert len(get_game_state(device_id='device', client=client)['data']) == 2
+    assert server.requests['/gamedata/api/zero/gamestate'] == 3
+
+
+def test_refreshes_expired_tokens(server):
+    tokens = TokenManager('account', server.issue_token('account', lifetime=-1), background=False)
+    client = GameDataClient(base_url=server.gamedata_url, tokens=tokens)
+    assert len(get_my_plots(client=client)) == 2
+    server.expire_tokens()
+    assert len(get_my_plots(client=client)) == 2
+    assert tokens.refreshes == 2
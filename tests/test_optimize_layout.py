@@ -0,0 +1,31 @@
+from pyilz.calculate_efficiency import EfficiencyModel
+from pyilz.metadata_to_array import array_to_import_string, import_string_to_array
+from pyilz.optimize_layout import optimize_layout, score_layout
+
+LAYOUT = ('[["POWER_STATION_1",10,16],["HYDROGEN_PUMP_5",31,31],["MINE_5",35,27],["SEDIMENT_EXCAVATOR_4",35,31],'
+          '["PHOTODISINTEGRATION_PLANT_4",35,23],["POWER_STATION_1",2,22],["SEQUESTRIAN_PLANT_5",9,28],'
+          '["CONDENSER_PLANT_4",27,39],["POWER_STATION_1",32,28],["SEQUESTRIAN_PLANT_4",34,34],'
+          '["L-CRYPTON_COLLIDER_3",9,19],["CONDENSER_PLANT_5",5,21],["PHOTODISINTEGRATION_PLANT_5",13,25]]')
+
+
+def test_import_string_round_trip():
+    array = import_string_to_array(LAYOUT)
+    assert array_to_import_string(array) == LAYOUT
+    assert import_string_to_array(array_to_import_string(array)) == array
+
+
+def test_score_layout_skips_uninfluenced_buildings():
+    array = import_string_to_array(LAYOUT)
+    assert score_layout(array) > 0
+    assert score_layout(array, targets=['POWER_STATION']) == 0
+
+
+def test_optimize_layout():
+    array = import_string_to_array(LAYOUT)
+    best = import_string_to_array(optimize_layout(LAYOUT, iterations=500, restarts=2, processes=1, seed=0)[0])
+    assert sorted(building['buildingTypeString'] for building in best) == \
+        sorted(building['buildingTypeString'] for building in array)
+    assert score_layout(best) >= score_layout(array)
+    model = EfficiencyModel(best)
+    for key in model:
+        assert model.occupied(*model.rect(key)) == {key}
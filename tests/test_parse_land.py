@@ -0,0 +1,108 @@
+import json
+import os
+import pandas as pd
+import pytest
+import xmltodict
+from pyilz.parse_land import (SaveGame, get_buildings_and_activities, parse_land, parse_research_data,
+                              parse_scanning_data)
+
+EXAMPLE_PATH = os.path.join(os.path.dirname(__file__), 'example_game_state.json')
+
+with open(EXAMPLE_PATH, 'r') as f:
+    SAVES = [plot['data'] for plot in json.load(f)['data']]
+
+
+@pytest.mark.parametrize('data', SAVES, ids=range(len(SAVES)))
+def test_save_game_matches_xmltodict(data):
+    expected = xmltodict.parse(data)
+    save = SaveGame(data)
+    assert save.root == 'SaveGameData'
+    assert save.sections == [key for key in expected['SaveGameData'] if not key.startswith('@')]
+    for section in save.sections:
+        assert save[section] == expected['SaveGameData'][section]
+    assert save.to_dict() == expected
+
+
+def test_save_game_missing_and_empty_sections():
+    data = ('<SaveGameData version="2"><Buildings /><ResearchData></ResearchData>'
+            '<Item>1</Item><Item><a>2</a></Item></SaveGameData>')
+    save = SaveGame(data)
+    assert save.to_dict() == xmltodict.parse(data)
+    assert save['Buildings'] is None and save['ResearchData'] is None
+    assert save['Item'] == ['1', {'a': '2'}]
+    assert 'ScanningData' not in save and save.get('ScanningData', 'missing') == 'missing'
+    with pytest.raises(KeyError):
+        save['ScanningData']
+    assert SaveGame('<SaveGameData />').to_dict() == xmltodict.parse('<SaveGameData />')
+
+
+@pytest.mark.parametrize('data', SAVES, ids=range(len(SAVES)))
+def test_parsers_accept_save_games(data):
+    save = SaveGame(data)
+    assert parse_land(save).equals(parse_land(data))
+    assert parse_research_data(save) == parse_research_data(data)
+    assert parse_scanning_data(save) == parse_scanning_data(data)
+
+
+def _reference_buildings_and_activities(df):
+    # the row-by-row implementation get_buildings_and_activities replaced
+    df = df.copy()
+    df['position'] = df['position'].apply(lambda x: x['@x'] + ',' + x['@y'])
+    df[['x', 'y']] = df['position'].str.split(',', expand=True)
+    df['x'] = df['x'].astype(int)
+    df['y'] = df['y'].astype(int)
+    df = df.drop(columns=['position'])
+    paths = df[df['buildingTypeString'] == 'PATH'][['x', 'y']]
+    buildings = df[df['buildingTypeString'] != 'PATH']
+    frames = []
+    for column in ('currentActivity', 'autoActivity', 'completedActivity'):
+        if column not in buildings.columns:
+            frames.append(None)
+            continue
+        rows = buildings[buildings[column].notnull()]
+        rows = rows.join(pd.json_normalize(rows[column]).set_index(rows.index).add_prefix(column + '.'), how='outer')
+        rows = rows.drop(columns=[column])
+        rows[column + '.StartTime'] = pd.to_datetime(rows[column + '.StartTime'])
+        rows[column + '.EndTime'] = pd.to_datetime(rows[column + '.EndTime'])
+        if column == 'currentActivity':
+            rows[column + '.Level'] = rows[column + '.Type'].str.extract(r'_(\d+)', expand=False).fillna(0).astype(int)
+            rows[column + '.Type'] = rows[column + '.Type'].str.replace(r'_(\d+)', '', regex=True)
+        else:
+            rows[column + '.Level'] = buildings['buildingTypeString'].str.extract(
+                r'(\d+)$', expand=False).fillna(0).astype(int)
+            rows[column + '.Type'] = buildings['buildingTypeString'].str.extract(
+                r'(.+?)\d+$', expand=False).str.rstrip('_') + '_AUTOMATIC'
+        frames.append(rows)
+    buildings = buildings.drop(columns=['uid', 'state', 'startTime'])
+    if 'generatedResources' in buildings.columns:
+        buildings['generatedResources'] = buildings['generatedResources'].astype(int)
+    buildings['level'] = buildings['buildingTypeString'].str.extract(r'(\d+)$', expand=False)
+    buildings['name'] = buildings['buildingTypeString'].str.extract(r'(.+?)\d+$', expand=False).str.rstrip('_')
+    buildings['name'] = buildings['name'].fillna(buildings['buildingTypeString'])
+    buildings['level'] = buildings['level'].fillna(0)
+    buildings = buildings.drop(columns=['buildingTypeString'])
+    return (paths, buildings, *frames)
+
+
+@pytest.mark.parametrize('data', SAVES, ids=range(len(SAVES)))
+def test_get_buildings_and_activities_matches_reference(data):
+    df = parse_land(data)
+    before = df.copy()
+    result = get_buildings_and_activities(df)
+    assert df.equals(before)
+    for frame, expected in zip(result, _reference_buildings_and_activities(df)):
+        if expected is None:
+            assert frame is None
+        else:
+            pd.testing.assert_frame_equal(frame, expected)
+
+
+def test_get_buildings_and_activities_typed():
+    paths, buildings, ca, aa, completed = get_buildings_and_activities(parse_land(SAVES[2]), typed=True)
+    assert (paths['x'].dtype, paths['y'].dtype) == ('int16', 'int16')
+    assert buildings['level'].dtype == 'int8' and buildings['name'].dtype == 'category'
+    for frame, column in ((ca, 'currentActivity'), (aa, 'autoActivity'), (completed, 'completedActivity')):
+        if frame is not None:
+            assert frame[column + '.Level'].dtype == 'int8'
+            assert frame[column + '.Type'].dtype == 'category'
+            assert frame['buildingTypeString'].dtype == 'category'
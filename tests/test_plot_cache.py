@@ -0,0 +1,40 @@
+from pyilz.get_timers import refresh_timers
+from pyilz.plot_cache import PlotCache, plot_key
+from pyilz.synthetic import synthetic_game_state
+
+PLOTS = synthetic_game_state(plots=3, buildings=20, paths=5)['data']
+
+
+def test_plot_cache_evicts_least_recently_used():
+    cache = PlotCache(maxsize=2)
+    first = cache.get(PLOTS[0])
+    cache.get(PLOTS[1])
+    assert cache.get(PLOTS[0]) is first
+    cache.get(PLOTS[2])
+    assert PLOTS[0] in cache and PLOTS[1] not in cache and len(cache) == 2
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_plot_cache_invalidates_on_last_updated():
+    cache = PlotCache()
+    parsed = cache.get(PLOTS[0])
+    updated = dict(PLOTS[0], lastUpdated='2023-06-11T16:00:00Z')
+    assert plot_key(updated) != plot_key(PLOTS[0])
+    assert cache.get(updated) is not parsed
+    assert cache.misses == 2
+
+
+def test_plot_cache_reloads_from_directory(tmp_path):
+    PlotCache(directory=str(tmp_path)).get(PLOTS[0])
+    cache = PlotCache(directory=str(tmp_path))
+    parsed = cache.get(PLOTS[0])
+    assert (cache.hits, cache.misses) == (1, 0)
+    assert parsed.building_data.equals(PlotCache().get(PLOTS[0]).building_data)
+
+
+def test_refresh_timers():
+    timers = {'uid:current': {'start': 1000.0, 'end': 1600.0, 'minutes': 0, 'percentage': 0}}
+    refreshed = refresh_timers(timers, now=1300.0)
+    assert refreshed['uid:current']['minutes'] == 5
+    assert refreshed['uid:current']['percentage'] == 50
+    assert timers['uid:current']['minutes'] == 0
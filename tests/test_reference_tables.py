@@ -0,0 +1,27 @@
+from pyilz.get_buildings import get_catalog
+from pyilz.reference_tables import ReferenceTables, parse_duration, parse_amount, source_sha1
+
+
+def test_bundled_tables_are_current():
+    bundled = ReferenceTables.load()
+    compiled = ReferenceTables.compile()
+    # rerun `python -m pyilz.reference_tables` after editing the JSON reference data
+    assert bundled.source_sha1 == compiled.source_sha1 == source_sha1()
+    assert bundled.name_ids == compiled.name_ids
+
+
+def test_tables_match_catalog():
+    tables = ReferenceTables.load()
+    catalog = get_catalog()
+    pump = catalog.type_id('HYDROGEN_PUMP')
+    silo = catalog.type_id('CARBON_MATTER_SILO')
+    assert tables.active_output[pump, 9, 1] == catalog.active_output(pump, 9, 1)
+    assert tables.storage[silo, 5, 2] == catalog.storage(silo, 5, 2)[0]
+    assert tables.resources[tables.storage_resource[silo, 5]] == catalog.storage(silo, 5, 2)[1]
+    assert (tables.width[pump], tables.height[pump]) == catalog.dimensions(pump)
+    assert tables.active_seconds[pump, 1] == 60
+
+
+def test_parse_units():
+    assert [parse_duration(d) for d in ('15s', '1.5m', '30min', '2.5h', '1.3d', None)] == [15, 90, 1800, 9000, 112320, -1]
+    assert [parse_amount(a) for a in (250, '7100', '9.9K')] == [250, 7100, 9900]
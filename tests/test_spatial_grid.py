@@ -0,0 +1,16 @@
+from pyilz.spatial_grid import SpatialGrid
+
+
+def test_spatial_grid_queries():
+    grid = SpatialGrid(cell_size=4)
+    grid.insert('a', 0, 0, 2, 2)
+    grid.insert('b', 10, 10, 3, 3)
+    grid.insert('c', 5, 0, 2, 2)
+    assert grid.query_point(1, 1) == {'a'}
+    assert grid.query_radius(0, 0, 2, 2, 3) == {'a'}
+    assert grid.query_radius(0, 0, 2, 2, 4) == {'a', 'c'}
+    assert grid.query_radius(0, 0, 2, 2, 9) == {'a', 'b', 'c'}
+    grid.move('b', 3, 3)
+    assert grid.query_radius(0, 0, 2, 2, 2) == {'a', 'b'}
+    grid.remove('a')
+    assert 'a' not in grid and len(grid) == 2
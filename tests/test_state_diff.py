@@ -0,0 +1,37 @@
+import copy
+import json
+import os
+from pyilz.state_diff import diff_states, index_state
+
+EXAMPLE_PATH = os.path.join(os.path.dirname(__file__), 'example_game_state.json')
+
+
+def _building(xml, uid):
+    start = xml.rindex('<BuildingData>', 0, xml.index(f'<uid>{uid}</uid>'))
+    end = xml.index('</BuildingData>', start) + len('</BuildingData>')
+    return start, end
+
+
+def test_diff_states():
+    with open(EXAMPLE_PATH, 'r') as f:
+        old = json.load(f)
+    new = copy.deepcopy(old)
+    xml = new['data'][2]['data']
+    upgraded = 'e7b3ecef-e56b-4afc-a069-1d569dd85c89'
+    removed = '30cbb2c9-886c-42b7-af56-9dad45e70d7a'
+    start, end = _building(xml, upgraded)
+    building = xml[start:end].replace('MINE_5', 'MINE_6').replace(
+        '<fractionalGeneratedResources>0<', '<fractionalGeneratedResources>12<')
+    xml = xml[:start] + building + xml[end:]
+    start, end = _building(xml, removed)
+    new['data'][2]['data'] = xml[:start] + xml[end:]
+
+    assert diff_states(old, old) == {}
+    diffs = diff_states(index_state(old), new)
+    assert list(diffs) == [new['data'][2]['landId']]
+    diff = diffs[new['data'][2]['landId']]
+    assert diff.changed == [(upgraded, 'MINE_5', 'MINE_6')]
+    assert diff.fractional == [(upgraded, '0', '12')]
+    assert diff.removed == [(removed, 'SEDIMENT_EXCAVATOR_6')]
+    assert not diff.added and not diff.started and not diff.completed
+    assert diff_states(new, old)[new['data'][2]['landId']].added == [(removed, 'SEDIMENT_EXCAVATOR_6')]
@@ -0,0 +1,17 @@
+from pyilz.parse_land import parse_land, get_buildings_and_activities
+from pyilz.synthetic import synthetic_save, synthetic_game_state
+
+
+def test_synthetic_save_parses():
+    xml = synthetic_save(buildings=120, seed=3)
+    assert xml == synthetic_save(buildings=120, seed=3)
+    building_data = parse_land(xml)
+    assert len(building_data) == 120
+    paths, buildings, ca, aa, completed = get_buildings_and_activities(building_data)
+    assert len(buildings) == 120 and len(ca) > 0 and len(aa) > 0
+
+
+def test_synthetic_game_state():
+    plots = synthetic_game_state(plots=4, buildings=10)['data']
+    assert len({plot['landId'] for plot in plots}) == 4
+    assert len({plot['data'] for plot in plots}) == 4
@@ -0,0 +1,61 @@
+import asyncio
+import time
+from pyilz.timer_watcher import TimerWatcher
+
+
+def _timer(end, notified=False):
+    return {'uid': 'u', 'name': 'MINE_5', 'type': 'EXTRACT', 'minutes': 0, 'notified': notified,
+            'percentage': 0, 'end': end, 'start': end - 60, 'x': 0, 'y': 0}
+
+
+def test_timer_watcher_fires_in_order():
+    async def watch():
+        fired = []
+        watcher = TimerWatcher(callback=lambda plot, key, timer: fired.append((plot, key)))
+        now = time.time()
+        watcher.update({'a': _timer(now + 0.05), 'b': _timer(now - 1), 'c': _timer(now - 1, notified=True)}, plot=1)
+        watcher.update({'d': _timer(now + 0.02)}, plot=2)
+        events = watcher.__aiter__()
+        first = await asyncio.wait_for(events.__anext__(), 1)
+        # moving a timer's end merges it without firing the old deadline
+        watcher.update({'a': _timer(now + 0.1)}, plot=1)
+        await asyncio.sleep(0.2)
+        await watcher.stop()
+        return first, fired
+
+    first, fired = asyncio.run(watch())
+    assert first[:2] == (1, 'b')
+    assert fired == [(1, 'b'), (2, 'd'), (1, 'a')]
+
+
+def test_timer_watcher_counts_timers():
+    watcher = TimerWatcher()
+    watcher.update({'a': _timer(1), 'b': _timer(2)}, plot=1)
+    watcher.update({'c': _timer(3)}, plot=2)
+    watcher.update({'a': _timer(1)}, plot=1)
+    assert len(watcher) == 2
+    watcher.remove(1)
+    watcher.remove(3)
+    assert len(watcher) == 1
+
+
+def test_timer_watcher_survives_failing_callbacks(caplog):
+    async def watch():
+        fired = []
+
+        async def callback(plot, key, timer):
+            fired.append(key)
+            if key == 'a':
+                raise RuntimeError('callback failed')
+
+        watcher = TimerWatcher(callback=callback)
+        now = time.time()
+        watcher.update({'a': _timer(now - 1), 'b': _timer(now + 0.05)}, plot=1)
+        events = watcher.__aiter__()
+        keys = [(await asyncio.wait_for(events.__anext__(), 1))[1] for _ in range(2)]
+        await watcher.stop()
+        return keys, fired
+
+    keys, fired = asyncio.run(watch())
+    assert keys == fired == ['a', 'b']
+    assert 'callback failed' in caplog.text
@@ -0,0 +1,36 @@
+import base64
+import json
+import threading
+import time
+import pyilz.refresh_token as refresh_token
+from pyilz.token_manager import TokenManager, decode_expiry
+
+
+def make_token(exp):
+    payload = base64.urlsafe_b64encode(json.dumps({'exp': exp}).encode()).rstrip(b'=').decode()
+    return f'header.{payload}.signature'
+
+
+def test_single_flight_refresh(monkeypatch):
+    calls = []
+
+    def refresh(ref_token=None):
+        calls.append(ref_token)
+        time.sleep(0.05)
+        return make_token(time.time() + 3600)
+
+    monkeypatch.setattr(refresh_token, 'refresh_token', refresh)
+    expired = make_token(time.time() - 10)
+    assert decode_expiry(expired) < time.time()
+    manager = TokenManager('account', expired, background=False)
+
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(manager.token())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == ['account']
+    assert len(set(tokens)) == 1 and decode_expiry(tokens[0]) > time.time()
+    assert manager.invalidate(expired) == tokens[0]
+    assert calls == ['account']